@@ -0,0 +1,46 @@
+"""Add song_id indexes for set-based cascade deletes
+
+Revision ID: 0b0f84f5914f
+Revises: a813d6dbbedd
+Create Date: 2026-10-19 15:48:31.602714
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b0f84f5914f'
+down_revision: Union[str, None] = 'a813d6dbbedd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns): song references that are not the leading
+# column of a primary key, looked up when songs are deleted in bulk.
+INDEXES = [
+    ('ix_playlist_songs_song_id', 'playlist_songs', ['song_id']),
+    ('ix_playback_history_song_id', 'playback_history', ['song_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False, schema='vibesia_schema',
+                postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, schema='vibesia_schema',
+                postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,211 @@
+"""Partition audit_log by month
+
+Revision ID: 2bbd74687f0f
+Revises: 7807bc4ff81e
+Create Date: 2026-10-19 11:27:40.662981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2bbd74687f0f'
+down_revision: Union[str, None] = '7807bc4ff81e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Same index set as 7807bc4ff81e, now declared on the partitioned parent.
+PARENT_INDEXES = [
+    "CREATE INDEX ix_audit_log_timestamp_audit_id ON vibesia_schema.audit_log (\"timestamp\", audit_id)",
+    "CREATE INDEX ix_audit_log_table_name_timestamp ON vibesia_schema.audit_log (table_name, \"timestamp\", audit_id)",
+    "CREATE INDEX ix_audit_log_table_record_timestamp ON vibesia_schema.audit_log (table_name, record_id, \"timestamp\", audit_id)",
+    "CREATE INDEX ix_audit_log_app_user_timestamp ON vibesia_schema.audit_log (app_user_id, \"timestamp\", audit_id)",
+    "CREATE INDEX ix_audit_log_action_type_timestamp ON vibesia_schema.audit_log (action_type, \"timestamp\", audit_id)",
+    "CREATE INDEX ix_audit_log_request_id_timestamp ON vibesia_schema.audit_log (request_id, \"timestamp\", audit_id)",
+    "CREATE INDEX ix_audit_log_timestamp_brin ON vibesia_schema.audit_log USING brin (\"timestamp\") WITH (pages_per_range = 32)",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 1. Everything that has to read the whole table runs first, outside the
+    #    migration transaction, so audit_log keeps taking inserts meanwhile:
+    #    - the (audit_id, "timestamp") index the new primary key needs, built
+    #      CONCURRENTLY as in 7807bc4ff81e;
+    #    - the CHECK that proves every row falls below the legacy partition's
+    #      upper bound, added NOT VALID (a brief lock) and then validated in
+    #      its own transaction, which scans the table under SHARE UPDATE
+    #      EXCLUSIVE and so does not block writes. The CHECK also rejects
+    #      rows past the bound until the migration commits: do not run it in
+    #      the last minutes of a month.
+    legacy_upper = op.get_bind().execute(
+        sa.text("SELECT (date_trunc('month', now()) + interval '1 month')::date")
+    ).scalar()
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_audit_log_audit_id_timestamp', 'audit_log', ['audit_id', 'timestamp'], unique=True,
+            schema='vibesia_schema', postgresql_concurrently=True, if_not_exists=True
+        )
+        op.execute("ALTER TABLE vibesia_schema.audit_log DROP CONSTRAINT IF EXISTS audit_log_legacy_range_chk")
+        op.execute(
+            "ALTER TABLE vibesia_schema.audit_log ADD CONSTRAINT audit_log_legacy_range_chk "
+            f"CHECK (\"timestamp\" IS NOT NULL AND \"timestamp\" < '{legacy_upper}') NOT VALID"
+        )
+        op.execute("ALTER TABLE vibesia_schema.audit_log VALIDATE CONSTRAINT audit_log_legacy_range_chk")
+
+    # 2. Keep the existing rows in place: the current table becomes the first
+    #    partition instead of being copied.
+    op.execute("ALTER TABLE vibesia_schema.audit_log RENAME TO audit_log_legacy")
+    op.execute("""
+        DO $$
+        DECLARE r record;
+        BEGIN
+            FOR r IN
+                SELECT indexname FROM pg_indexes
+                WHERE schemaname = 'vibesia_schema' AND tablename = 'audit_log_legacy'
+            LOOP
+                EXECUTE format(
+                    'ALTER INDEX vibesia_schema.%I RENAME TO %I',
+                    r.indexname, left(replace(r.indexname, 'audit_log', 'audit_log_legacy'), 63)
+                );
+            END LOOP;
+        END $$
+    """)
+    # A partitioned table's primary key must include the partition key. The
+    # prebuilt index becomes the legacy primary key, a catalog-only change
+    # (the validated CHECK covers the NOT NULL), because ATTACH only adopts an
+    # index for the parent's primary key if it already backs one.
+    op.execute("ALTER TABLE vibesia_schema.audit_log_legacy DROP CONSTRAINT audit_log_legacy_pkey")
+    op.execute("""
+        ALTER TABLE vibesia_schema.audit_log_legacy
+        ADD CONSTRAINT audit_log_legacy_pkey PRIMARY KEY USING INDEX ix_audit_log_legacy_audit_id_timestamp
+    """)
+
+    # 3. Partitioned parent with the same columns, defaults (including the
+    #    audit_id sequence) and checks.
+    op.execute("""
+        CREATE TABLE vibesia_schema.audit_log (
+            LIKE vibesia_schema.audit_log_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+        ) PARTITION BY RANGE ("timestamp")
+    """)
+    op.execute('ALTER TABLE vibesia_schema.audit_log ADD CONSTRAINT audit_log_pkey PRIMARY KEY (audit_id, "timestamp")')
+    op.execute("""
+        ALTER TABLE vibesia_schema.audit_log
+        ADD CONSTRAINT audit_log_app_user_id_fkey FOREIGN KEY (app_user_id)
+        REFERENCES vibesia_schema.users (user_id) ON DELETE SET NULL
+    """)
+    # Detaching and dropping the legacy partition later must not drop the sequence.
+    op.execute("ALTER SEQUENCE vibesia_schema.audit_log_audit_id_seq OWNED BY vibesia_schema.audit_log.audit_id")
+
+    # 4. Attach the legacy table for everything up to the end of the month
+    #    the CHECK was validated for, which lets ATTACH skip its own full scan;
+    #    the legacy primary key is attached as the parent's partition of it.
+    op.execute(
+        "ALTER TABLE vibesia_schema.audit_log ATTACH PARTITION vibesia_schema.audit_log_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{legacy_upper}')"
+    )
+    op.execute("ALTER TABLE vibesia_schema.audit_log_legacy DROP CONSTRAINT audit_log_legacy_range_chk")
+
+    # 5. Parent indexes; the equivalent legacy indexes are attached, not rebuilt.
+    for statement in PARENT_INDEXES:
+        op.execute(statement)
+
+    # 6. Monthly partitions are created ahead of time by the archival job
+    #    (app.jobs.audit_archive); the default partition catches anything that
+    #    arrives before they exist so audit triggers never fail.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION vibesia_schema.fn_audit_log_ensure_partitions(p_months_ahead integer DEFAULT 2)
+        RETURNS integer
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_from date;
+            v_to date;
+            v_name text;
+            v_created integer := 0;
+        BEGIN
+            FOR i IN 0..p_months_ahead LOOP
+                v_from := (date_trunc('month', now()) + make_interval(months => i))::date;
+                v_to := (v_from + interval '1 month')::date;
+                v_name := 'audit_log_p' || to_char(v_from, 'YYYYMM');
+                CONTINUE WHEN to_regclass('vibesia_schema.' || v_name) IS NOT NULL;
+                BEGIN
+                    IF EXISTS (
+                        SELECT 1 FROM vibesia_schema.audit_log_default
+                        WHERE "timestamp" >= v_from AND "timestamp" < v_to
+                    ) THEN
+                        -- Rows for this month already landed in the default partition, which
+                        -- would make the new partition fail its check: move them into it. The
+                        -- parent stays locked against inserts until the transaction commits.
+                        ALTER TABLE vibesia_schema.audit_log DETACH PARTITION vibesia_schema.audit_log_default;
+                        EXECUTE format(
+                            'CREATE TABLE vibesia_schema.%I PARTITION OF vibesia_schema.audit_log '
+                            'FOR VALUES FROM (%L) TO (%L)', v_name, v_from, v_to
+                        );
+                        INSERT INTO vibesia_schema.audit_log
+                        SELECT * FROM vibesia_schema.audit_log_default
+                        WHERE "timestamp" >= v_from AND "timestamp" < v_to;
+                        DELETE FROM vibesia_schema.audit_log_default
+                        WHERE "timestamp" >= v_from AND "timestamp" < v_to;
+                        ALTER TABLE vibesia_schema.audit_log ATTACH PARTITION vibesia_schema.audit_log_default DEFAULT;
+                    ELSE
+                        EXECUTE format(
+                            'CREATE TABLE vibesia_schema.%I PARTITION OF vibesia_schema.audit_log '
+                            'FOR VALUES FROM (%L) TO (%L)', v_name, v_from, v_to
+                        );
+                    END IF;
+                    v_created := v_created + 1;
+                EXCEPTION
+                    -- Month already covered by another partition (e.g. legacy)
+                    WHEN invalid_object_definition THEN NULL;
+                END;
+            END LOOP;
+            RETURN v_created;
+        END;
+        $$
+    """)
+    op.execute("CREATE TABLE vibesia_schema.audit_log_default PARTITION OF vibesia_schema.audit_log DEFAULT")
+    op.execute("SELECT vibesia_schema.fn_audit_log_ensure_partitions(2)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE vibesia_schema.audit_log DETACH PARTITION vibesia_schema.audit_log_legacy")
+    op.execute("INSERT INTO vibesia_schema.audit_log_legacy SELECT * FROM vibesia_schema.audit_log")
+    op.execute("ALTER SEQUENCE vibesia_schema.audit_log_audit_id_seq OWNED BY vibesia_schema.audit_log_legacy.audit_id")
+    op.execute("DROP FUNCTION IF EXISTS vibesia_schema.fn_audit_log_ensure_partitions(integer)")
+    op.execute("DROP TABLE vibesia_schema.audit_log CASCADE")
+    op.execute("""
+        DO $$
+        DECLARE r record;
+        BEGIN
+            FOR r IN
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = 'vibesia_schema.audit_log_legacy'::regclass AND contype = 'p'
+            LOOP
+                EXECUTE format('ALTER TABLE vibesia_schema.audit_log_legacy DROP CONSTRAINT %I', r.conname);
+            END LOOP;
+        END $$
+    """)
+    op.execute("ALTER TABLE vibesia_schema.audit_log_legacy ADD CONSTRAINT audit_log_legacy_pkey PRIMARY KEY (audit_id)")
+    op.execute("ALTER TABLE vibesia_schema.audit_log_legacy RENAME TO audit_log")
+    op.execute("""
+        DO $$
+        DECLARE r record;
+        BEGIN
+            FOR r IN
+                SELECT indexname FROM pg_indexes
+                WHERE schemaname = 'vibesia_schema' AND tablename = 'audit_log'
+                AND indexname LIKE '%audit_log_legacy%'
+            LOOP
+                EXECUTE format(
+                    'ALTER INDEX vibesia_schema.%I RENAME TO %I',
+                    r.indexname, replace(r.indexname, 'audit_log_legacy', 'audit_log')
+                );
+            END LOOP;
+        END $$
+    """)
@@ -0,0 +1,153 @@
+"""Add playlist song_count/total_duration maintained by triggers and position index
+
+Revision ID: 660daf9b7ca0
+Revises: 0b0f84f5914f
+Create Date: 2026-10-19 16:27:54.093118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '660daf9b7ca0'
+down_revision: Union[str, None] = '0b0f84f5914f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'playlists',
+        sa.Column('song_count', sa.Integer(), server_default='0', nullable=False),
+        schema='vibesia_schema'
+    )
+    op.add_column(
+        'playlists',
+        sa.Column('total_duration', sa.Integer(), server_default='0', nullable=False),
+        schema='vibesia_schema'
+    )
+
+    # Backfill once; from here on the stats are maintained incrementally.
+    op.execute("""
+        UPDATE vibesia_schema.playlists p
+        SET song_count = c.n, total_duration = c.duration
+        FROM (
+            SELECT ps.playlist_id, COUNT(*) AS n, COALESCE(SUM(s.duration), 0) AS duration
+            FROM vibesia_schema.playlist_songs ps
+            LEFT JOIN vibesia_schema.songs s ON s.song_id = ps.song_id
+            GROUP BY ps.playlist_id
+        ) c
+        WHERE p.playlist_id = c.playlist_id
+    """)
+
+    # Same shape as fn_song_genres_maintain_count: one UPDATE per affected
+    # playlist per statement, computed from the transition tables.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION vibesia_schema.fn_playlist_songs_maintain_stats()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                UPDATE vibesia_schema.playlists p
+                SET song_count = p.song_count - d.n,
+                    total_duration = p.total_duration - d.duration
+                FROM (
+                    SELECT o.playlist_id, COUNT(*) AS n, COALESCE(SUM(s.duration), 0) AS duration
+                    FROM old_rows o
+                    LEFT JOIN vibesia_schema.songs s ON s.song_id = o.song_id
+                    GROUP BY o.playlist_id
+                ) d
+                WHERE p.playlist_id = d.playlist_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                UPDATE vibesia_schema.playlists p
+                SET song_count = p.song_count + d.n,
+                    total_duration = p.total_duration + d.duration
+                FROM (
+                    SELECT n.playlist_id, COUNT(*) AS n, COALESCE(SUM(s.duration), 0) AS duration
+                    FROM new_rows n
+                    LEFT JOIN vibesia_schema.songs s ON s.song_id = n.song_id
+                    GROUP BY n.playlist_id
+                ) d
+                WHERE p.playlist_id = d.playlist_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_playlist_songs_stats_insert
+        AFTER INSERT ON vibesia_schema.playlist_songs
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION vibesia_schema.fn_playlist_songs_maintain_stats()
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_playlist_songs_stats_delete
+        AFTER DELETE ON vibesia_schema.playlist_songs
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION vibesia_schema.fn_playlist_songs_maintain_stats()
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_playlist_songs_stats_update
+        AFTER UPDATE ON vibesia_schema.playlist_songs
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION vibesia_schema.fn_playlist_songs_maintain_stats()
+    """)
+
+    # A song's duration is part of every playlist that contains it.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION vibesia_schema.fn_songs_sync_playlist_duration()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            UPDATE vibesia_schema.playlists p
+            SET total_duration = p.total_duration + d.delta
+            FROM (
+                SELECT ps.playlist_id, SUM(n.duration - o.duration) AS delta
+                FROM new_rows n
+                JOIN old_rows o ON o.song_id = n.song_id
+                JOIN vibesia_schema.playlist_songs ps ON ps.song_id = n.song_id
+                WHERE n.duration IS DISTINCT FROM o.duration
+                GROUP BY ps.playlist_id
+            ) d
+            WHERE p.playlist_id = d.playlist_id;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_songs_playlist_duration_update
+        AFTER UPDATE ON vibesia_schema.songs
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION vibesia_schema.fn_songs_sync_playlist_duration()
+    """)
+
+    with op.get_context().autocommit_block():
+        # Next position on append (MAX) and ordered reads of a playlist.
+        op.create_index(
+            'ix_playlist_songs_playlist_id_position', 'playlist_songs', ['playlist_id', 'position', 'song_id'],
+            unique=False, schema='vibesia_schema', postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_playlist_songs_playlist_id_position', table_name='playlist_songs', schema='vibesia_schema',
+            postgresql_concurrently=True, if_exists=True
+        )
+    op.execute("DROP TRIGGER IF EXISTS trg_songs_playlist_duration_update ON vibesia_schema.songs")
+    op.execute("DROP FUNCTION IF EXISTS vibesia_schema.fn_songs_sync_playlist_duration()")
+    op.execute("DROP TRIGGER IF EXISTS trg_playlist_songs_stats_update ON vibesia_schema.playlist_songs")
+    op.execute("DROP TRIGGER IF EXISTS trg_playlist_songs_stats_delete ON vibesia_schema.playlist_songs")
+    op.execute("DROP TRIGGER IF EXISTS trg_playlist_songs_stats_insert ON vibesia_schema.playlist_songs")
+    op.execute("DROP FUNCTION IF EXISTS vibesia_schema.fn_playlist_songs_maintain_stats()")
+    op.drop_column('playlists', 'total_duration', schema='vibesia_schema')
+    op.drop_column('playlists', 'song_count', schema='vibesia_schema')
@@ -0,0 +1,97 @@
+"""Add genre song_count maintained by triggers and song_genres browse index
+
+Revision ID: 6d79451965ef
+Revises: ecf5acd6708d
+Create Date: 2026-10-19 09:12:31.418220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d79451965ef'
+down_revision: Union[str, None] = 'ecf5acd6708d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'genres',
+        sa.Column('song_count', sa.Integer(), server_default='0', nullable=False),
+        schema='vibesia_schema'
+    )
+
+    # Backfill once; from here on the counters are maintained incrementally.
+    op.execute("""
+        UPDATE vibesia_schema.genres g
+        SET song_count = c.n
+        FROM (
+            SELECT genre_id, COUNT(*) AS n
+            FROM vibesia_schema.song_genres
+            GROUP BY genre_id
+        ) c
+        WHERE g.genre_id = c.genre_id
+    """)
+
+    op.create_index(
+        'ix_song_genres_genre_id_song_id', 'song_genres', ['genre_id', 'song_id'],
+        unique=False, schema='vibesia_schema'
+    )
+
+    # Statement-level triggers with transition tables: a bulk insert/delete of
+    # N links costs one UPDATE per affected genre instead of N row triggers.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION vibesia_schema.fn_song_genres_maintain_count()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                UPDATE vibesia_schema.genres g
+                SET song_count = g.song_count - d.n
+                FROM (SELECT genre_id, COUNT(*) AS n FROM old_rows GROUP BY genre_id) d
+                WHERE g.genre_id = d.genre_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                UPDATE vibesia_schema.genres g
+                SET song_count = g.song_count + d.n
+                FROM (SELECT genre_id, COUNT(*) AS n FROM new_rows GROUP BY genre_id) d
+                WHERE g.genre_id = d.genre_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_song_genres_count_insert
+        AFTER INSERT ON vibesia_schema.song_genres
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION vibesia_schema.fn_song_genres_maintain_count()
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_song_genres_count_delete
+        AFTER DELETE ON vibesia_schema.song_genres
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION vibesia_schema.fn_song_genres_maintain_count()
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_song_genres_count_update
+        AFTER UPDATE ON vibesia_schema.song_genres
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION vibesia_schema.fn_song_genres_maintain_count()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS trg_song_genres_count_update ON vibesia_schema.song_genres")
+    op.execute("DROP TRIGGER IF EXISTS trg_song_genres_count_delete ON vibesia_schema.song_genres")
+    op.execute("DROP TRIGGER IF EXISTS trg_song_genres_count_insert ON vibesia_schema.song_genres")
+    op.execute("DROP FUNCTION IF EXISTS vibesia_schema.fn_song_genres_maintain_count()")
+    op.drop_index('ix_song_genres_genre_id_song_id', table_name='song_genres', schema='vibesia_schema')
+    op.drop_column('genres', 'song_count', schema='vibesia_schema')
@@ -0,0 +1,64 @@
+"""Add audit_log keyset indexes and BRIN index on timestamp
+
+Revision ID: 7807bc4ff81e
+Revises: 6d79451965ef
+Create Date: 2026-10-19 10:03:55.207114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7807bc4ff81e'
+down_revision: Union[str, None] = '6d79451965ef'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Each filter of GET /audit-logs followed by the (timestamp, audit_id) keyset,
+# so any single-filter page is an index range scan in keyset order.
+BTREE_INDEXES = {
+    'ix_audit_log_timestamp_audit_id': ['timestamp', 'audit_id'],
+    'ix_audit_log_table_name_timestamp': ['table_name', 'timestamp', 'audit_id'],
+    'ix_audit_log_table_record_timestamp': ['table_name', 'record_id', 'timestamp', 'audit_id'],
+    'ix_audit_log_app_user_timestamp': ['app_user_id', 'timestamp', 'audit_id'],
+    'ix_audit_log_action_type_timestamp': ['action_type', 'timestamp', 'audit_id'],
+    'ix_audit_log_request_id_timestamp': ['request_id', 'timestamp', 'audit_id'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # audit_log takes a row for every write in the system; build the indexes
+    # CONCURRENTLY so the table is never locked against inserts.
+    with op.get_context().autocommit_block():
+        for name, columns in BTREE_INDEXES.items():
+            op.create_index(
+                name, 'audit_log', columns, unique=False, schema='vibesia_schema',
+                postgresql_concurrently=True, if_not_exists=True
+            )
+        # Rows arrive in timestamp order, so a BRIN index prunes time ranges
+        # for a few pages of storage instead of a full btree.
+        op.create_index(
+            'ix_audit_log_timestamp_brin', 'audit_log', ['timestamp'], unique=False,
+            schema='vibesia_schema', postgresql_using='brin',
+            postgresql_with={'pages_per_range': 32},
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_audit_log_timestamp_brin', table_name='audit_log', schema='vibesia_schema',
+            postgresql_concurrently=True, if_exists=True
+        )
+        for name in reversed(list(BTREE_INDEXES)):
+            op.drop_index(
+                name, table_name='audit_log', schema='vibesia_schema',
+                postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,52 @@
+"""Add users.deletion_requested_at and playlists.user_id index
+
+Revision ID: a813d6dbbedd
+Revises: feb63a8c3533
+Create Date: 2026-10-19 15:02:47.190331
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a813d6dbbedd'
+down_revision: Union[str, None] = 'feb63a8c3533'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column('deletion_requested_at', sa.DateTime(timezone=True), nullable=True),
+        schema='vibesia_schema'
+    )
+
+    with op.get_context().autocommit_block():
+        # Lets the deletion job find pending accounts without scanning users
+        op.create_index(
+            'ix_users_deletion_requested_at', 'users', ['deletion_requested_at'], unique=False,
+            schema='vibesia_schema', postgresql_where=sa.text('deletion_requested_at IS NOT NULL'),
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        # Deletion chunks select playlists by user_id; the old index was dropped in
+        # 2d12193b6184 and uk_playlist_user_name leads with name, so it cannot serve it.
+        # playback_history is covered by playback_unique_user_song_time (user_id first).
+        op.create_index(
+            'ix_playlists_user_id', 'playlists', ['user_id'], unique=False,
+            schema='vibesia_schema', postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_playlists_user_id', table_name='playlists', schema='vibesia_schema',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_users_deletion_requested_at', table_name='users', schema='vibesia_schema',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column('users', 'deletion_requested_at', schema='vibesia_schema')
@@ -0,0 +1,43 @@
+"""Add user_deletions progress table
+
+Revision ID: b5e1c9a7d3f2
+Revises: 660daf9b7ca0
+Create Date: 2026-10-19 18:12:05.418377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e1c9a7d3f2'
+down_revision: Union[str, None] = '660daf9b7ca0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # No foreign key to users: the row has to outlive the account it purges.
+    op.create_table(
+        'user_deletions',
+        sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('state', sa.String(length=20), nullable=False),
+        sa.Column('step', sa.String(length=50), nullable=True),
+        sa.Column('deleted', postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'{}'::jsonb"), nullable=False),
+        sa.Column('deletion_requested_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('user_id'),
+        schema='vibesia_schema'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_deletions', schema='vibesia_schema')
@@ -0,0 +1,47 @@
+"""Add catalog lookup indexes for bulk import merges
+
+Revision ID: feb63a8c3533
+Revises: 2bbd74687f0f
+Create Date: 2026-10-19 13:41:08.573190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'feb63a8c3533'
+down_revision: Union[str, None] = '2bbd74687f0f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns): the natural keys the import merge resolves
+# artists, albums and songs by.
+INDEXES = [
+    ('ix_artists_name', 'artists', ['name']),
+    ('ix_albums_artist_id_title', 'albums', ['artist_id', 'title']),
+    ('ix_songs_album_id_title', 'songs', ['album_id', 'title']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False, schema='vibesia_schema',
+                postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, schema='vibesia_schema',
+                postgresql_concurrently=True, if_exists=True
+            )
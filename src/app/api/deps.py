@@ -1,15 +1,22 @@
-from typing import Optional, Generator
-from fastapi import Depends, HTTPException, status, Request
+from typing import Dict, Optional, Generator, Tuple
+import anyio
+from fastapi import Depends, Header, HTTPException, Query, status, Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 
-from app.core.database import SessionLocal
+from app.core.database import SessionLocal, pipeline, read_session
 from app.core.config import settings
+from app.core.audit import build_audit_context, apply_audit_context, queue_audit_context_for_email
+from app.core.security import StreamGrant, verify_stream_token
+from app.core.read_your_writes import reads_pinned_to_primary
+from app.core.tracing import traced
 from app.crud.crud_user import user as user_crud
+from app.crud.loader import Loaders
 from app.models.User import User as UserModel
 from app.utils.admin_utils import is_admin_user
+from starlette.datastructures import Headers
+from starlette.types import Scope
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False)
 
@@ -18,12 +25,63 @@ def get_db_session() -> Generator[Session, None, None]:
     db = SessionLocal()
     try:
         yield db
-    finally:
+    except Exception:
+        # Raised by the endpoint (HTTPException included): keep none of its writes
+        print("[DEBUG] 10. Rolling back transaction after an error.")
+        db.rollback()
+        raise
+    else:
         print("[DEBUG] 10. Committing transaction.")
         db.commit()
+    finally:
         print("[DEBUG] 11. Closing DB session.")
         db.close()
 
+def get_read_db_session(request: Request) -> Generator[Session, None, None]:
+    """
+    Session for endpoints that only read. It runs on a read replica, or on the
+    primary if the client wrote recently. Its transaction is READ ONLY (the
+    driver opens it with BEGIN READ ONLY, so that costs no extra round trip),
+    and it ends with a rollback instead of a commit.
+    """
+    db = read_session(use_primary=reads_pinned_to_primary(request.headers))
+    try:
+        db.connection(execution_options={"postgresql_readonly": True})
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+
+def load_user_and_audit_context(
+    db: Session, email: Optional[str], *, user_agent: str = "", api_endpoint: str = "", request_id: str = ""
+) -> Tuple[Optional[UserModel], Dict[str, str]]:
+    """
+    The prologue of an authenticated request: the user lookup and the audit
+    settings. With psycopg 3 both go out in one pipeline, so together with the
+    transaction's BEGIN they cost about one round trip; other drivers run
+    them one after the other.
+    """
+    request_fields = {"user_agent": user_agent, "api_endpoint": api_endpoint, "request_id": request_id}
+    db_user = None
+    pipelined = False
+    if email:
+        with pipeline(db) as dbapi_connection:
+            if dbapi_connection is not None:
+                queue_audit_context_for_email(dbapi_connection, email, build_audit_context(**request_fields))
+                pipelined = True
+            db_user = user_crud.get_by_email(db, email=email)
+
+    audit_context = build_audit_context(
+        app_user_id=db_user.user_id if db_user else None,
+        app_user_email=db_user.email if db_user else None,
+        app_user_role=getattr(db_user, 'role', None) if db_user else None,
+        **request_fields,
+    )
+    if not pipelined:
+        apply_audit_context(db, audit_context)
+    return db_user, audit_context
+
+@traced()
 def set_audit_context_and_get_user(
     request: Request,
     db: Session = Depends(get_db_session),
@@ -36,49 +94,40 @@ def set_audit_context_and_get_user(
         print("[DEBUG] 2.1. User already processed for this request. Skipping.")
         return request.state.current_user_from_audit
     
-    db_user = None
+    user_email: Optional[str] = None
     if token:
         print("[DEBUG] 3. Bearer token found. Attempting to decode.")
         try:
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-            user_email: Optional[str] = payload.get("sub")
+            user_email = payload.get("sub")
             print(f"[DEBUG] 4. Token decoded. Email found: {user_email}")
             
-            if user_email:
-                print(f"[DEBUG] 5. Fetching user '{user_email}' from database...")
-                db_user = user_crud.get_by_email(db, email=user_email)
-                request.state.current_user_from_audit = db_user
-            else:
+            if not user_email:
                 print("[DEBUG] 4.1. FAIL: Token payload does not contain 'sub' (email) field.")
-                request.state.current_user_from_audit = None
 
         except (JWTError, AttributeError) as e:
             print(f"[DEBUG] 3.1. FAIL: Token is invalid or an error occurred. Detail: {e}")
-            request.state.current_user_from_audit = None
+            user_email = None
     else:
         print("[DEBUG] 3. No token found in request.")
-        request.state.current_user_from_audit = None
         
-    user_agent = request.headers.get("user-agent", "")
-    api_endpoint = request.url.path
-    request_id = request.headers.get("x-request-id", "")
-    
-    app_user_id = str(db_user.user_id) if db_user and db_user.user_id else ""
-    app_user_email = db_user.email if db_user and db_user.email else ""
-    app_user_role = db_user.role if db_user and hasattr(db_user, 'role') and db_user.role else ""
-
-    print("[DEBUG] 6. Setting audit variables in DB session.")
-    db.execute(text("SET LOCAL audit.app_user_id = :val"), {'val': app_user_id})
-    db.execute(text("SET LOCAL audit.app_user_email = :val"), {'val': app_user_email})
-    db.execute(text("SET LOCAL audit.app_user_role = :val"), {'val': app_user_role})
-    db.execute(text("SET LOCAL audit.user_agent = :val"), {'val': user_agent})
-    db.execute(text("SET LOCAL audit.api_endpoint = :val"), {'val': api_endpoint})
-    db.execute(text("SET LOCAL audit.request_id = :val"), {'val': request_id})
-    print(f"[DEBUG] 7. AUDIT CONTEXT ESTABLISHED for user: {app_user_email or 'Anonymous'}")
+    print(f"[DEBUG] 5. Fetching user '{user_email}' and setting audit variables in DB session.")
+    db_user, audit_context = load_user_and_audit_context(
+        db,
+        user_email,
+        user_agent=request.headers.get("user-agent", ""),
+        api_endpoint=request.url.path,
+        request_id=request.headers.get("x-request-id", ""),
+    )
+    request.state.current_user_from_audit = db_user
+    request.state.audit_context = audit_context
+
+    print(f"[DEBUG] 7. AUDIT CONTEXT ESTABLISHED for user: {audit_context['app_user_email'] or 'Anonymous'}")
 
     return db_user
 
 
+@traced()
 def get_current_user(
     db_user: Optional[UserModel] = Depends(set_audit_context_and_get_user)
 ) -> UserModel:
@@ -93,17 +142,19 @@ def get_current_user(
     print(f"[DEBUG] 8.2. SUCCESS: Valid user '{db_user.email}' confirmed.")
     return db_user
 
+@traced()
 def get_current_active_user(
     current_user: UserModel = Depends(get_current_user)
 ) -> UserModel:
     print("[DEBUG] 9. Checking if current user is active.")
     if not current_user.is_active:
         print("[DEBUG] 9.1. FAIL: User is inactive. Raising 400 Bad Request.")
-        raise HTTPException(status_code=status.HTTP_400, detail="Inactive user")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     
     print("[DEBUG] 9.2. SUCCESS: User is active.")
     return current_user
 
+@traced()
 def get_current_admin_user(
     current_user: UserModel = Depends(get_current_active_user)
 ) -> UserModel:
@@ -115,4 +166,107 @@ def get_current_admin_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin privileges are required for this operation."
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+def get_user_from_token(db: Session, token: Optional[str]) -> Optional[UserModel]:
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    user_email: Optional[str] = payload.get("sub")
+    return user_crud.get_by_email(db, email=user_email) if user_email else None
+
+@traced()
+def get_current_active_reader(
+    db: Session = Depends(get_read_db_session),
+    token: Optional[str] = Depends(oauth2_scheme),
+) -> UserModel:
+    """
+    get_current_active_user for read-only endpoints: the user is loaded in the
+    read-only session, so `Session.object_session(current_user)` is that
+    session, and no audit context is set because nothing can be written.
+    """
+    with pipeline(db):
+        # BEGIN READ ONLY and the lookup in one round trip under psycopg 3
+        db_user = get_user_from_token(db, token)
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not db_user.is_active:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
+    return db_user
+
+def is_admin_token(token: str) -> bool:
+    """Whether a bearer token belongs to an active administrator, outside of a request's dependencies."""
+    db = SessionLocal()
+    try:
+        db_user = get_user_from_token(db, token)
+        return bool(db_user and db_user.is_active and is_admin_user(db_user))
+    finally:
+        db.close()
+
+async def is_admin_request(scope: Scope) -> bool:
+    """Authorization check for ASGI middleware, such as the X-Profile header's."""
+    scheme, _, token = Headers(scope=scope).get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    return await anyio.to_thread.run_sync(is_admin_token, token)
+
+# Prefer tokens (RFC 7240) that ask a mutation to answer with a delta instead of the full resource.
+DELTA_PREFERENCES = {"return=minimal", "representation=delta"}
+
+def get_delta_preference(
+    prefer: Optional[str] = Header(None, description="`return=minimal` or `representation=delta` to receive only the change")
+) -> Optional[str]:
+    """
+    Returns the Prefer token that selected a delta response, or None when the
+    client wants the full representation. Unknown preferences are ignored.
+    """
+    if not prefer:
+        return None
+    for token in prefer.split(","):
+        name, _, value = token.split(";")[0].partition("=")
+        preference = f"{name.strip().lower()}={value.strip().strip(chr(34)).lower()}"
+        if preference in DELTA_PREFERENCES:
+            return preference
+    return None
+
+
+async def get_stream_grant(
+    song_id: int,
+    token: str = Query(..., description="Signed token from the song's `stream_url`"),
+) -> StreamGrant:
+    """
+    Authorizes an audio stream request from its signed URL alone: no session,
+    no user lookup, so every Range request of a player stays cheap. Declared
+    async because it never blocks, which keeps it off the threadpool.
+    """
+    grant = verify_stream_token(token, song_id)
+    if grant is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired stream URL")
+    return grant
+
+
+def get_loaders(db: Session = Depends(get_db_session)) -> Loaders:
+    """
+    Batching loaders for this request. FastAPI caches dependencies per
+    request, so every dependency and the endpoint share the same instance.
+    """
+    return Loaders(db)
+
+
+async def get_thumbnail_size(
+    size: int = Query(256, description=f"Edge length in pixels, one of {settings.THUMBNAIL_SIZES}"),
+) -> int:
+    """Thumbnails only come in the configured sizes, which bounds the disk cache."""
+    if size not in settings.THUMBNAIL_SIZES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"size must be one of {settings.THUMBNAIL_SIZES}",
+        )
+    return size
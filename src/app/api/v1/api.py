@@ -1,13 +1,20 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, users, playlist, artist, password, song
+from app.api.v1.endpoints import auth, users, playlist, artist, password, song, genre, audit_log, catalog, audio_upload, album, home, admin
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, prefix="/auth")
 api_router.include_router(users.router, prefix="/users")
 api_router.include_router(password.router, prefix="/password")
+api_router.include_router(home.router, prefix="/home")
 
 api_router.include_router(playlist.router, prefix="/playlists")
 api_router.include_router(artist.router, prefix="/artists")
-api_router.include_router(song.router, prefix="/songs")
\ No newline at end of file
+api_router.include_router(album.router, prefix="/albums")
+api_router.include_router(song.router, prefix="/songs")
+api_router.include_router(genre.router, prefix="/genres")
+api_router.include_router(audit_log.router, prefix="/audit-logs")
+api_router.include_router(catalog.router, prefix="/catalog")
+api_router.include_router(audio_upload.router, prefix="/audio-uploads")
+api_router.include_router(admin.router, prefix="/admin")
\ No newline at end of file
@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+from typing import Any, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app import models
+from app.api import deps
+from app.core.profiling import profile_store
+from app.core.query_log import query_log
+from app.core.tracing import RingBufferExporter, trace_exporter
+from app.schemas.admin import ProfileReport, ProfileSummary, StatementStats, TraceEntry
+
+router = APIRouter()
+
+@router.get("/queries", response_model=List[StatementStats], tags=["Admin"])
+def read_query_stats(
+    limit: int = Query(20, ge=1, le=500),
+    order_by: Literal["total", "mean", "max", "calls"] = "total",
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Top SQL statements of this worker process since it started (or since the
+    last reset), by total time unless `order_by` says otherwise. Slow reads
+    carry the last EXPLAIN (ANALYZE, BUFFERS) plan captured for them - only
+    for administrators.
+    """
+    return [
+        StatementStats(
+            statement=stats.statement,
+            calls=stats.calls,
+            total_ms=stats.total_seconds * 1000,
+            mean_ms=stats.total_seconds * 1000 / stats.calls,
+            max_ms=stats.max_seconds * 1000,
+            slow_calls=stats.slow_calls,
+            last_route=stats.last_route,
+            plan=stats.plan,
+            plan_captured_at=(
+                datetime.fromtimestamp(stats.plan_captured_at, timezone.utc) if stats.plan_captured_at else None
+            ),
+        )
+        for stats in query_log.top(limit, order_by)
+    ]
+
+@router.delete("/queries", status_code=status.HTTP_204_NO_CONTENT, tags=["Admin"])
+def reset_query_stats(
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> None:
+    """Clear this process's statement timings - only for administrators."""
+    query_log.reset()
+
+@router.get("/profiles", response_model=List[ProfileSummary], tags=["Admin"])
+def read_profiles(
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Requests profiled with the `X-Profile: cpu|memory|all` header, newest
+    first - only for administrators.
+    """
+    return profile_store.list()
+
+@router.get("/profiles/{profile_id}", response_model=ProfileReport, tags=["Admin"])
+def read_profile(
+    profile_id: str,
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """The report named by a response's `X-Profile-Id` header - only for administrators."""
+    report = profile_store.load(profile_id)
+    if report is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return report
+
+@router.get("/profiles/{profile_id}/collapsed", response_class=PlainTextResponse, tags=["Admin"])
+def read_profile_stacks(
+    profile_id: str,
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """CPU samples as collapsed stacks, ready for flamegraph.pl or speedscope - only for administrators."""
+    report = profile_store.load(profile_id)
+    if report is None or report.get("collapsed") is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="CPU profile not found")
+    return PlainTextResponse("\n".join(report["collapsed"]) + "\n")
+
+@router.get("/traces", response_model=List[TraceEntry], tags=["Admin"])
+def read_traces(
+    request_id: Optional[str] = Query(None, description="`x-request-id` of the traced request"),
+    trace_id: Optional[str] = Query(None, description="`X-Trace-Id` of the response"),
+    limit: int = Query(20, ge=1, le=200),
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Recent sampled traces of this worker process, newest first, with spans
+    for dependencies, CRUD methods and SQL statements - only for
+    administrators. Empty unless TRACE_EXPORTER is `memory`.
+    """
+    if not isinstance(trace_exporter, RingBufferExporter):
+        return []
+    return trace_exporter.find(trace_id=trace_id, request_id=request_id, limit=limit)
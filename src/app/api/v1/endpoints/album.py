@@ -0,0 +1,75 @@
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.api import deps
+from app.core.config import settings
+from app.core.thumbnails import cover_paths, thumbnail_response
+from app.crud.loader import Loaders
+from app.schemas import album as schemas
+
+router = APIRouter()
+
+@router.get("/", response_model=List[schemas.AlbumWithArtist], tags=["Albums"])
+def read_albums(
+    skip: int = 0,
+    limit: int = 100,
+    ids: Optional[List[int]] = Query(None, max_length=settings.BULK_MAX_ITEMS, description="Only these albums, in this order (repeat the parameter)"),
+    current_user: models.User = Depends(deps.get_current_active_user),
+    loaders: Loaders = Depends(deps.get_loaders),
+) -> Any:
+    """
+    Read albums with their artist. With `ids`, returns those albums (unknown
+    ids are left out). Albums and artists are fetched with one query each,
+    however many are returned.
+    """
+    db = Session.object_session(current_user)
+    albums = crud.album.get_many(db, ids) if ids else crud.album.get_multi(db, skip=skip, limit=limit)
+    loaders.attach(albums, "artist", crud.artist, "artist_id")
+    return albums
+
+@router.get("/{album_id}", response_model=schemas.AlbumWithArtist, tags=["Albums"])
+def read_album(
+    album_id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+    loaders: Loaders = Depends(deps.get_loaders),
+) -> Any:
+    """Read an album with its artist."""
+    db = Session.object_session(current_user)
+    album = crud.album.get(db, album_id)
+    if not album:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Album not found")
+    loaders.attach([album], "artist", crud.artist, "artist_id")
+    return album
+
+def album_cover_sources(
+    album_id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> List[str]:
+    db = Session.object_session(current_user)
+    album = crud.album.get(db, album_id)
+    if not album:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Album not found")
+    return cover_paths([album.cover_image])
+
+@router.get(
+    "/{album_id}/cover",
+    response_class=Response,
+    responses={200: {"content": {"image/jpeg": {}}}, 304: {"description": "Not modified"}},
+    tags=["Albums"],
+)
+async def read_album_cover(
+    request: Request,
+    size: int = Depends(deps.get_thumbnail_size),
+    sources: List[str] = Depends(album_cover_sources),
+) -> Any:
+    """
+    Square JPEG thumbnail of the album cover.
+
+    Rendered once per size and served from a disk cache with a strong ETag.
+    """
+    if not sources:
+        return Response("Album has no cover image", status_code=404, media_type="text/plain")
+    return await thumbnail_response(request.headers, sources, size, cache_control="public, max-age=604800")
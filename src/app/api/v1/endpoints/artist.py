@@ -1,21 +1,29 @@
 # ====== app/api/v1/endpoints/artist.py (update) ======
-from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Any, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from sqlalchemy import exc
 from sqlalchemy.orm import Session
 
 from app import crud, models
 from app.schemas import artist as schemas
 from app.api import deps
+from app.core.config import settings
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.Artist], tags=["Artists"])
 def read_artists(
-    db: Session = Depends(deps.get_db_session),
+    db: Session = Depends(deps.get_read_db_session),
     skip: int = 0,
     limit: int = 100,
+    ids: Optional[List[int]] = Query(None, max_length=settings.BULK_MAX_ITEMS, description="Only these artists, in this order (repeat the parameter)"),
 ) -> Any:
-    """Read artists - available to all authenticated users."""
+    """
+    Read artists - available to all authenticated users. With `ids`, returns
+    those artists from one query instead of a request per artist.
+    """
+    if ids:
+        return crud.artist.get_many(db, ids)
     artists = crud.artist.get_multi(db, skip=skip, limit=limit)
     return artists
 
@@ -37,10 +45,59 @@ def create_artist(
     artist = crud.artist.create(db=db, obj_in=artist_in)
     return artist
 
+@router.post("/bulk", response_model=List[schemas.Artist], status_code=status.HTTP_201_CREATED, tags=["Artists"])
+def create_artists_bulk(
+    artists_in: List[schemas.ArtistCreate] = Body(..., min_length=1, max_length=settings.BULK_MAX_ITEMS),
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """Create several artists in one statement - only for administrators."""
+    db = Session.object_session(current_user)
+
+    names = [artist_in.name for artist_in in artists_in]
+    duplicates = {name for name in names if names.count(name) > 1}
+    duplicates.update(artist.name for artist in crud.artist.get_by_names(db, names=names))
+    if duplicates:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Artists with these names already exist or are repeated: {sorted(duplicates)}",
+        )
+    return crud.artist.create_many(db=db, objs_in=artists_in)
+
+@router.put("/bulk", response_model=List[schemas.Artist], tags=["Artists"])
+def update_artists_bulk(
+    bulk_in: schemas.ArtistBulkUpdate,
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """Apply the same changes to several artists - only for administrators."""
+    db = Session.object_session(current_user)
+
+    if len(bulk_in.ids) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BULK_MAX_ITEMS} artists can be updated at once.",
+        )
+    return crud.artist.update_many(db=db, ids=bulk_in.ids, obj_in=bulk_in.changes)
+
+@router.delete("/bulk", response_model=List[int], tags=["Artists"])
+def delete_artists_bulk(
+    ids: List[int] = Query(..., min_length=1, max_length=settings.BULK_MAX_ITEMS),
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """Delete several artists without albums; returns the deleted ids - only for administrators."""
+    db = Session.object_session(current_user)
+    try:
+        with db.begin_nested():
+            return crud.artist.remove_many(db=db, ids=ids)
+    except exc.IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Some of these artists still have albums; delete them individually instead.",
+        )
+
 @router.get("/{artist_id}", response_model=schemas.Artist, tags=["Artists"])
 def read_artist_by_id(
     artist_id: int,
-    db: Session = Depends(deps.get_db_session),
+    db: Session = Depends(deps.get_read_db_session),
 ) -> Any:
     """Read artist by ID - available to everyone."""
     artist = crud.artist.get(db=db, id=artist_id)
@@ -71,12 +128,14 @@ def delete_artist(
     # Protect with admin dependency
     current_user: models.User = Depends(deps.get_current_admin_user),
 ) -> Any:
-    """Delete artist - only for administrators."""
+    """Delete artist with all their albums and songs - only for administrators."""
     db = Session.object_session(current_user)
     
     artist = crud.artist.get(db=db, id=artist_id)
     if not artist:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Artist not found")
-        
-    artist = crud.artist.remove(db=db, id=artist_id)
+    
+    # Rows are deleted in SQL, so keep the loaded artist out of the session's flush
+    db.expunge(artist)
+    crud.artist.delete_cascade(db=db, id=artist_id)
     return artist
\ No newline at end of file
@@ -0,0 +1,123 @@
+from typing import Any
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.api import deps
+from app.core.security import create_stream_url
+from app.core.uploads import UploadConflict, UploadError, UploadNotFound, upload_store
+from app.schemas.audio_upload import AudioUploadCreate, AudioUploadResult, AudioUploadStatus
+
+router = APIRouter()
+
+def _upload_error(e: UploadError) -> Any:
+    if isinstance(e, UploadNotFound):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    if isinstance(e, UploadConflict):
+        # The current offset lets the client resume without another request
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"detail": str(e), "offset": e.offset},
+            headers={"Upload-Offset": str(e.offset)},
+        )
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+def _status(upload_id: str) -> AudioUploadStatus:
+    manifest = upload_store.get(upload_id)
+    return AudioUploadStatus(
+        upload_id=upload_id, song_id=manifest.song_id, size=manifest.size, offset=upload_store.offset(upload_id)
+    )
+
+@router.post("/", response_model=AudioUploadStatus, status_code=status.HTTP_201_CREATED, tags=["Audio Uploads"])
+def create_audio_upload(
+    upload_in: AudioUploadCreate,
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """Start a resumable audio upload for a song - only for administrators."""
+    db = Session.object_session(current_user)
+    if not crud.song.get(db, id=upload_in.song_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Song not found")
+    try:
+        manifest = upload_store.create(
+            song_id=upload_in.song_id, size=upload_in.size, filename=upload_in.filename, sha256=upload_in.sha256
+        )
+    except UploadError as e:
+        return _upload_error(e)
+    return AudioUploadStatus(upload_id=manifest.upload_id, song_id=manifest.song_id, size=manifest.size, offset=0)
+
+@router.get("/{upload_id}", response_model=AudioUploadStatus, tags=["Audio Uploads"])
+def get_audio_upload(
+    upload_id: str,
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """Current offset of an upload, to resume after an interruption - only for administrators."""
+    try:
+        return _status(upload_id)
+    except UploadError as e:
+        return _upload_error(e)
+
+@router.put("/{upload_id}", response_model=AudioUploadStatus, tags=["Audio Uploads"],
+            openapi_extra={"requestBody": {"content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}}}})
+async def put_audio_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="Must equal the upload's current offset"),
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Append a chunk (raw request body) at `offset` - only for administrators.
+
+    The body is written to disk as it arrives and hashed incrementally, so
+    chunks of any size use constant memory. An interrupted chunk keeps the
+    bytes that arrived; GET the upload for the offset to resume from.
+    """
+    # Nothing below needs the database: return the connection to the pool
+    # instead of holding it for the whole transfer. The commit, like the file
+    # work, runs in a worker thread to keep the event loop free.
+    await anyio.to_thread.run_sync(Session.object_session(current_user).commit)
+    try:
+        await upload_store.write_chunk(upload_id, offset, request.stream())
+        return await anyio.to_thread.run_sync(_status, upload_id)
+    except UploadError as e:
+        return _upload_error(e)
+
+@router.post("/{upload_id}/complete", response_model=AudioUploadResult, tags=["Audio Uploads"])
+def complete_audio_upload(
+    upload_id: str,
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """Verify the upload, store it by content and set the song's audio_path - only for administrators."""
+    db = Session.object_session(current_user)
+    try:
+        manifest = upload_store.get(upload_id)
+        song = crud.song.get(db, id=manifest.song_id)
+        if not song:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Song not found")
+        completed = upload_store.complete(upload_id)
+    except UploadError as e:
+        return _upload_error(e)
+
+    song.audio_path = completed.audio_path
+    db.add(song)
+    db.flush()
+    return AudioUploadResult(
+        song_id=song.song_id,
+        audio_path=completed.audio_path,
+        sha256=completed.sha256,
+        size=manifest.size,
+        deduplicated=completed.deduplicated,
+        stream_url=create_stream_url(song.song_id, completed.audio_path),
+    )
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Audio Uploads"])
+def abort_audio_upload(
+    upload_id: str,
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> None:
+    """Abort an upload and discard its data - only for administrators."""
+    try:
+        upload_store.abort(upload_id)
+    except UploadError as e:
+        return _upload_error(e)
@@ -0,0 +1,96 @@
+from datetime import datetime
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import exc, select
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.models.audit_log import AuditLog
+from app.schemas import audit_log as schemas
+from app.api import deps
+from app.core.config import settings
+from app.core.utils import encode_cursor, decode_cursor
+from app.core.streaming import stream_rows, ndjson_lines, coalesce, gzip_chunks
+
+router = APIRouter()
+
+@router.get("/", response_model=schemas.AuditLogPage, tags=["Audit Logs"])
+def read_audit_logs(
+    table_name: Optional[str] = None,
+    record_id: Optional[int] = None,
+    app_user_id: Optional[int] = None,
+    action_type: Optional[str] = None,
+    request_id: Optional[str] = None,
+    start: Optional[datetime] = Query(None, description="Inclusive lower bound on timestamp"),
+    end: Optional[datetime] = Query(None, description="Exclusive upper bound on timestamp"),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=settings.AUDIT_LOG_PAGE_MAX),
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """Query the audit trail, newest first - only for administrators."""
+    db = Session.object_session(current_user)
+
+    before = None
+    if cursor:
+        try:
+            timestamp, audit_id = decode_cursor(cursor, 2)
+            before = (datetime.fromisoformat(timestamp), int(audit_id))
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    try:
+        logs, has_more = crud.audit_log.get_page(
+            db,
+            table_name=table_name,
+            record_id=record_id,
+            app_user_id=app_user_id,
+            action_type=action_type.upper() if action_type else None,
+            request_id=request_id,
+            start=start,
+            end=end,
+            before=before,
+            limit=limit,
+            timeout_ms=settings.AUDIT_LOG_QUERY_TIMEOUT_MS,
+        )
+    except exc.OperationalError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Audit query timed out; narrow the filters or the time range.",
+        )
+
+    next_cursor = None
+    if has_more:
+        last = logs[-1]
+        next_cursor = encode_cursor(last.timestamp.isoformat(), last.audit_id)
+    return {"logs": logs, "next_cursor": next_cursor}
+
+
+@router.get("/export", tags=["Audit Logs"])
+def export_audit_logs(
+    start: datetime = Query(..., description="Inclusive lower bound on timestamp"),
+    end: datetime = Query(..., description="Exclusive upper bound on timestamp"),
+    table_name: Optional[str] = None,
+    gzip: bool = True,
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """Stream the audit trail of a time range as NDJSON - only for administrators."""
+    if end <= start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'end' must be after 'start'.")
+
+    statement = (
+        select(AuditLog.__table__)
+        .where(AuditLog.timestamp >= start, AuditLog.timestamp < end)
+        .order_by(AuditLog.timestamp, AuditLog.audit_id)
+    )
+    if table_name is not None:
+        statement = statement.where(AuditLog.table_name == table_name)
+
+    body = coalesce(ndjson_lines(stream_rows(statement)))
+    filename = f"audit_log_{start:%Y%m%dT%H%M%S}_{end:%Y%m%dT%H%M%S}.ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        body = gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
@@ -0,0 +1,33 @@
+import io
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from sqlalchemy.orm import Session
+
+from app import models
+from app.api import deps
+from app.core.config import settings
+from app.jobs import catalog_import
+from app.schemas.catalog_import import ImportReport
+
+router = APIRouter()
+
+@router.post("/import", response_model=ImportReport, tags=["Catalog"])
+def import_catalog(
+    file: UploadFile = File(..., description="CSV or NDJSON file, one song per row"),
+    format: Optional[str] = Query(None, description="csv or ndjson; defaults to the file extension"),
+    batch_size: int = Query(settings.IMPORT_BATCH_SIZE, ge=100, le=50000),
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """Bulk import artists, albums and songs - only for administrators."""
+    db = Session.object_session(current_user)
+
+    filename = file.filename or ""
+    fmt = format or ("ndjson" if filename.endswith((".ndjson", ".jsonl")) else "csv")
+    if fmt not in catalog_import.FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format '{fmt}'. Use one of: {', '.join(catalog_import.FORMATS)}",
+        )
+
+    stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    return catalog_import.import_catalog(db, stream, fmt=fmt, batch_size=batch_size)
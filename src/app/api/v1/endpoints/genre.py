@@ -0,0 +1,45 @@
+from typing import List, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.schemas import genre as schemas
+from app.api import deps
+from app.core.utils import encode_cursor, decode_cursor
+
+router = APIRouter()
+
+@router.get("/", response_model=List[schemas.Genre], tags=["Genres"])
+def read_genres(
+    db: Session = Depends(deps.get_db_session),
+    skip: int = 0,
+    limit: int = 100,
+) -> Any:
+    """List genres with their precomputed song counts."""
+    return crud.genre.get_multi_ordered(db, skip=skip, limit=limit)
+
+@router.get("/{genre_id}/songs", response_model=schemas.GenreSongPage, tags=["Genres"])
+def read_genre_songs(
+    genre_id: int,
+    db: Session = Depends(deps.get_db_session),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+) -> Any:
+    """Browse the songs of a genre using keyset pagination."""
+    after_song_id = None
+    if cursor:
+        try:
+            (after_song_id,) = decode_cursor(cursor, 1)
+            after_song_id = int(after_song_id)
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    songs, has_more = crud.genre.get_songs_page(
+        db, genre_id=genre_id, after_song_id=after_song_id, limit=limit
+    )
+    # Only pay for the existence check when there is nothing to return
+    if not songs and cursor is None and not crud.genre.get(db, id=genre_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Genre not found")
+
+    next_cursor = encode_cursor(songs[-1]["song_id"]) if has_more else None
+    return {"items": songs, "next_cursor": next_cursor}
@@ -0,0 +1,91 @@
+import logging
+from typing import Any, Callable, Dict, List, Tuple
+
+import anyio
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.api import deps
+from app.core.config import settings
+from app.core.database import read_session
+from app.core.read_your_writes import reads_pinned_to_primary
+from app.schemas.home import HomeScreen
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+Section = Callable[[Session], Any]
+
+def _run_section(section: Section, timeout_ms: int, use_primary: bool) -> Any:
+    """
+    Runs one read-only section on its own pooled connection, on a replica
+    unless `use_primary`. The statement timeout makes PostgreSQL give up at
+    the same time the endpoint does, so an abandoned section does not keep
+    its connection busy.
+    """
+    db = read_session(use_primary=use_primary)
+    try:
+        db.execute(text("SELECT set_config('statement_timeout', :ms, true)"), {"ms": str(timeout_ms)})
+        return section(db)
+    finally:
+        db.rollback()
+        db.close()
+
+async def run_sections(
+    sections: Dict[str, Section], timeout_ms: int, use_primary: bool = False
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Runs the sections concurrently, each in a worker thread with its own
+    session. Returns the results of the sections that finished in time, and
+    the names of those that timed out or failed.
+    """
+    results: Dict[str, Any] = {}
+    incomplete: List[str] = []
+
+    async def run(name: str, section: Section) -> None:
+        try:
+            with anyio.fail_after(timeout_ms / 1000):
+                results[name] = await anyio.to_thread.run_sync(
+                    _run_section, section, timeout_ms, use_primary, abandon_on_cancel=True
+                )
+        except TimeoutError:
+            logger.warning(f"Home section '{name}' timed out after {timeout_ms} ms")
+            incomplete.append(name)
+        except Exception:
+            logger.exception(f"Home section '{name}' failed")
+            incomplete.append(name)
+
+    async with anyio.create_task_group() as tg:
+        for name, section in sections.items():
+            tg.start_soon(run, name, section)
+    return results, sorted(incomplete)
+
+@router.get("/", response_model=HomeScreen, tags=["Home"])
+async def read_home(
+    request: Request,
+    playlists_limit: int = Query(20, ge=1, le=100),
+    songs_limit: int = Query(20, ge=1, le=100),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Launch screen in one request: profile, playlists, playlist count and
+    songs.
+
+    Authentication and the audit context run once. The sections are
+    independent queries run concurrently on separate pooled connections (on
+    the read replicas, if any), each limited to HOME_SECTION_TIMEOUT_MS; a section that is slow or fails is
+    returned as null and listed in `incomplete` instead of delaying the rest.
+    """
+    user_id = current_user.user_id
+    sections: Dict[str, Section] = {
+        "playlists": lambda db: crud.playlist.get_summaries_by_user(db=db, user_id=user_id, limit=playlists_limit),
+        "playlist_count": lambda db: crud.playlist.count_by_user(db=db, user_id=user_id),
+        "songs": lambda db: crud.song.get_multi_with_details(db=db, limit=songs_limit),
+    }
+    results, incomplete = await run_sections(
+        sections, settings.HOME_SECTION_TIMEOUT_MS, use_primary=reads_pinned_to_primary(request.headers)
+    )
+    return {"user": current_user, **results, "incomplete": incomplete}
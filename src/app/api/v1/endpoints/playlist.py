@@ -1,11 +1,13 @@
-from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Any, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app import crud
 from app import models
 from app.schemas import playlist as schemas
 from app.api import deps
+from app.core.thumbnails import cover_paths, thumbnail_response
+from app.core.utils import decode_cursor, encode_cursor
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -13,9 +15,14 @@ router = APIRouter()
 class MessageResponse(BaseModel):
     message: str
 
+def _apply_preference(response: Response, preference: Optional[str]) -> None:
+    response.headers["Vary"] = "Prefer"
+    if preference:
+        response.headers["Preference-Applied"] = preference
+
 @router.get("/", response_model=List[schemas.PlaylistSummary], tags=["Playlists"])
 def get_user_playlists(
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_reader),
     skip: int = 0,
     limit: int = 100,
 ) -> Any:
@@ -25,25 +32,29 @@ def get_user_playlists(
     )
 
 
-@router.post("/", response_model=schemas.Playlist, status_code=status.HTTP_201_CREATED, tags=["Playlists"])
+@router.post("/", response_model=Union[schemas.Playlist, schemas.PlaylistDelta], status_code=status.HTTP_201_CREATED, tags=["Playlists"])
 def create_user_playlist(
     playlist_in: schemas.PlaylistCreate,
+    response: Response,
     current_user: models.User = Depends(deps.get_current_active_user),
+    preference: Optional[str] = Depends(deps.get_delta_preference),
 ) -> Any:
     db = Session.object_session(current_user)
     playlist = crud.playlist.create_for_user(
-        db=db, obj_in=playlist_in, user_id=current_user.user_id
+        db=db, obj_in=playlist_in, user_id=current_user.user_id, delta=preference is not None
     )
+    _apply_preference(response, preference)
     return playlist
 
 @router.get("/{playlist_id}", response_model=schemas.Playlist, tags=["Playlists"])
 def get_user_playlist(
     playlist_id: int,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_reader),
+    songs_limit: Optional[int] = Query(None, ge=1, le=200, description="Only include the first N songs; the rest via GET /{playlist_id}/songs"),
 ) -> Any:
     db = Session.object_session(current_user)
     playlist = crud.playlist.get_playlist_with_songs(
-        db=db, playlist_id=playlist_id, user_id=current_user.user_id
+        db=db, playlist_id=playlist_id, user_id=current_user.user_id, songs_limit=songs_limit
     )
     if not playlist:
         raise HTTPException(
@@ -52,24 +63,87 @@ def get_user_playlist(
         )
     return playlist
 
-@router.put("/{playlist_id}", response_model=schemas.Playlist, tags=["Playlists"])
+@router.get("/{playlist_id}/songs", response_model=schemas.PlaylistSongPage, tags=["Playlists"])
+def get_user_playlist_songs(
+    playlist_id: int,
+    current_user: models.User = Depends(deps.get_current_active_reader),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+) -> Any:
+    """Browse the songs of a playlist in order using keyset pagination."""
+    after = None
+    if cursor:
+        try:
+            position, song_id = decode_cursor(cursor, 2)
+            after = (int(position), int(song_id))
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    db = Session.object_session(current_user)
+    if not crud.playlist.get_user_playlist(db=db, playlist_id=playlist_id, user_id=current_user.user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Playlist not found or does not belong to user."
+        )
+
+    songs, has_more = crud.playlist.get_songs_page(db=db, playlist_id=playlist_id, after=after, limit=limit)
+    next_cursor = encode_cursor(songs[-1]["position"], songs[-1]["song_id"]) if has_more else None
+    return {"items": songs, "next_cursor": next_cursor}
+
+def playlist_cover_sources(
+    playlist_id: int,
+    current_user: models.User = Depends(deps.get_current_active_reader),
+) -> List[str]:
+    db = Session.object_session(current_user)
+    if not crud.playlist.get_user_playlist(db=db, playlist_id=playlist_id, user_id=current_user.user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Playlist not found or does not belong to user."
+        )
+    return cover_paths(crud.playlist.get_cover_images(db=db, playlist_id=playlist_id))
+
+@router.get(
+    "/{playlist_id}/cover",
+    response_class=Response,
+    responses={200: {"content": {"image/jpeg": {}}}, 304: {"description": "Not modified"}},
+    tags=["Playlists"],
+)
+async def get_user_playlist_cover(
+    request: Request,
+    size: int = Depends(deps.get_thumbnail_size),
+    sources: List[str] = Depends(playlist_cover_sources),
+) -> Any:
+    """
+    Cover of the playlist: a 2x2 mosaic of its first four album covers, or
+    the first cover alone when there are fewer. Pre-generated by
+    `python -m app.jobs.cover_thumbnails`, otherwise rendered on first request.
+    """
+    if not sources:
+        return Response("Playlist has no album covers", status_code=404, media_type="text/plain")
+    return await thumbnail_response(request.headers, sources, size, cache_control="private, max-age=86400")
+
+@router.put("/{playlist_id}", response_model=Union[schemas.Playlist, schemas.PlaylistDelta], tags=["Playlists"])
 def update_user_playlist(
     playlist_id: int,
     playlist_in: schemas.PlaylistUpdate,
+    response: Response,
     current_user: models.User = Depends(deps.get_current_active_user),
+    preference: Optional[str] = Depends(deps.get_delta_preference),
 ) -> Any:
     db = Session.object_session(current_user)
     playlist = crud.playlist.update_user_playlist(
         db=db,
         playlist_id=playlist_id,
         user_id=current_user.user_id,
-        obj_in=playlist_in
+        obj_in=playlist_in,
+        delta=preference is not None
     )
     if not playlist:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Playlist not found or does not belong to user."
         )
+    _apply_preference(response, preference)
     return playlist
 
 @router.delete("/{playlist_id}", response_model=schemas.PlaylistSummary, tags=["Playlists"])
@@ -90,13 +164,25 @@ def delete_user_playlist(
         )
     return deleted_playlist_orm
 
-@router.post("/{playlist_id}/songs", response_model=schemas.Playlist, tags=["Playlists"])
+@router.post("/{playlist_id}/songs", response_model=Union[schemas.Playlist, schemas.PlaylistDelta], tags=["Playlists"])
 def add_song_to_playlist_endpoint(
     playlist_id: int,
     song_in: schemas.PlaylistSongCreate,
+    response: Response,
     current_user: models.User = Depends(deps.get_current_active_user),
+    preference: Optional[str] = Depends(deps.get_delta_preference),
 ):
     db = Session.object_session(current_user)
+    _apply_preference(response, preference)
+    if preference:
+        # Same procedure; the response is built from primary-key reads only
+        return crud.playlist.add_song_delta(
+            db=db,
+            playlist_id=playlist_id,
+            song_id=song_in.song_id,
+            user_id=current_user.user_id,
+        )
+
     crud.playlist.add_song_to_playlist(
         db=db,
         playlist_id=playlist_id,
@@ -131,7 +217,7 @@ def remove_song_from_playlist_endpoint(
 
 @router.get("/info/count", response_model=int, tags=["Playlists"])
 def get_user_playlist_count(
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_reader),
 ) -> Any:
     db = Session.object_session(current_user)
     return crud.playlist.count_by_user(
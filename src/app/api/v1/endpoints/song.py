@@ -1,21 +1,122 @@
-from typing import List, Any
-from fastapi import APIRouter, Depends
+import enum
+import math
+from typing import List, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.core.config import settings
+from app.core.media import MediaFileResponse, resolve_media_path
+from app.core.waveform import read_peaks, waveform_path
+from app.core.security import StreamGrant
+from app.core.streaming import stream_rows, ndjson_lines, csv_lines, coalesce, gzip_chunks
 
 router = APIRouter()
 
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
 @router.get("/", response_model=List[schemas.SongDetail], tags=["Songs"])
 def read_songs(
-    db: Session = Depends(deps.get_db_session),
+    db: Session = Depends(deps.get_read_db_session),
     skip: int = 0,
     limit: int = 100,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    ids: Optional[List[int]] = Query(None, max_length=settings.BULK_MAX_ITEMS, description="Only these songs, in this order (repeat the parameter)"),
+    current_user: models.User = Depends(deps.get_current_active_reader),
 ) -> Any:
     """
-    Retrieve all songs with artist details.
+    Retrieve all songs with artist details, or the songs in `ids` with a
+    single query (unknown ids are left out).
     """
+    if ids:
+        return crud.song.get_many_with_details(db=db, ids=ids)
     songs = crud.song.get_multi_with_details(db=db, skip=skip, limit=limit)
-    return songs
\ No newline at end of file
+    return songs
+
+@router.get("/export", tags=["Songs"])
+def export_songs(
+    format: ExportFormat = ExportFormat.NDJSON,
+    gzip: bool = False,
+    current_user: models.User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Stream the full catalog (songs with album and artist) - only for administrators.
+
+    Rows are read from a server-side cursor in fixed-size batches and sent as
+    they are encoded, so memory use does not depend on catalog size and a slow
+    client slows the producer down instead of buffering.
+    """
+    statement = crud.song.export_statement()
+    rows = stream_rows(statement)
+    if format == ExportFormat.CSV:
+        fieldnames = [column.name for column in statement.selected_columns]
+        body = coalesce(csv_lines(rows, fieldnames))
+        media_type, extension = "text/csv", "csv"
+    else:
+        body = coalesce(ndjson_lines(rows))
+        media_type, extension = "application/x-ndjson", "ndjson"
+
+    headers = {"Content-Disposition": f'attachment; filename="catalog.{extension}"'}
+    if gzip:
+        body = gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+@router.api_route(
+    "/{song_id}/stream",
+    methods=["GET", "HEAD"],
+    response_class=Response,
+    responses={200: {"content": {"audio/mpeg": {}}}, 206: {"description": "Partial content"}},
+    tags=["Songs"],
+)
+async def stream_song(
+    song_id: int,
+    grant: StreamGrant = Depends(deps.get_stream_grant),
+) -> Any:
+    """
+    Stream the audio of a song from its signed `stream_url`.
+
+    Supports single and multiple byte ranges, If-Range and If-None-Match.
+    No database access: the signed token carries the audio path.
+    """
+    try:
+        path = resolve_media_path(grant.audio_path)
+    except FileNotFoundError:
+        return Response("Audio file not found", status_code=404, media_type="text/plain")
+    return MediaFileResponse(path, headers={"cache-control": "private, max-age=3600"})
+
+@router.get("/{song_id}/waveform", response_model=schemas.SongWaveform, tags=["Songs"])
+def read_song_waveform(
+    song_id: int,
+    request: Request,
+    current_user: models.User = Depends(deps.get_current_active_reader),
+) -> Any:
+    """
+    Waveform peaks, measured duration and integrated loudness of a song.
+
+    Computed offline by `python -m app.jobs.audio_analysis`; 404 until the
+    song's audio has been analyzed.
+    """
+    waveform = read_peaks(waveform_path(song_id))
+    if waveform is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Waveform not available for this song")
+    header, peaks = waveform
+
+    etag = f'"{header.source_key:x}-{header.source_size:x}-{header.source_mtime_ns:x}-{header.points:x}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=86400"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = schemas.SongWaveform(
+        song_id=song_id,
+        duration=round(header.duration, 3),
+        sample_rate=header.sample_rate,
+        channels=header.channels,
+        loudness_lufs=None if math.isnan(header.loudness) else round(header.loudness, 2),
+        points=header.points,
+        peaks=peaks.tolist(),
+    )
+    return Response(body.model_dump_json(), media_type="application/json", headers=headers)
@@ -1,13 +1,14 @@
 # --- START OF FILE users.py (CORRECTED) ---
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
 from app import crud
 from app.api import deps  # Se mantiene igual
+from app.jobs import user_deletion
 import logging
 
-from app.schemas.user import UserResponse, UserCreate, UserUpdate
+from app.schemas.user import UserResponse, UserCreate, UserUpdate, UserDeletionStatus
 from app.models.User import User as UserModel
 
 logger = logging.getLogger(__name__)
@@ -39,16 +40,45 @@ def update_user_me(
     logger.info(f"User updated their profile: {current_user.user_id}")
     return updated_user
 
-@router.delete("/me", response_model=dict, tags=["Users"])
+@router.delete("/me", response_model=dict, status_code=status.HTTP_202_ACCEPTED, tags=["Users"])
 def delete_current_user_permanently(
+    request: Request,
+    background_tasks: BackgroundTasks,
     current_user: UserModel = Depends(deps.get_current_active_user),
 ):
+    """
+    Deactivates the account right away and deletes its data in the background.
+    """
     db = Session.object_session(current_user)
     
     user_id = current_user.user_id
     username = current_user.username
 
-    crud.user.delete_permanently(db=db, user_id=user_id)
+    crud.user.mark_pending_deletion(db=db, user_id=user_id)
+    # The purge runs on its own session and only deletes accounts marked as pending,
+    # so the mark has to be committed before the task starts.
+    db.commit()
+    background_tasks.add_task(user_deletion.purge_user, user_id, audit_context=request.state.audit_context)
     
-    logger.info(f"User {username} (ID: {user_id}) permanently deleted their own account.")
-    return {"message": "Your account has been permanently deleted.", "user_id": user_id}
\ No newline at end of file
+    logger.info(f"User {username} (ID: {user_id}) requested deletion of their own account.")
+    return {"message": "Your account has been deactivated and will be permanently deleted shortly.", "user_id": user_id}
+
+@router.get("/{user_id}/deletion", response_model=UserDeletionStatus, tags=["Users"])
+def get_user_deletion_status(
+    user_id: int,
+    current_user: UserModel = Depends(deps.get_current_admin_user),
+):
+    """
+    Progress of an account deletion - only for administrators.
+    """
+    db = Session.object_session(current_user)
+    progress = user_deletion.get_progress(db, user_id)
+
+    if progress is None:
+        # No purge started yet: either still queued or not requested at all.
+        user = crud.user.get(db, id=user_id)
+        if user is None or user.deletion_requested_at is None:
+            raise HTTPException(status_code=404, detail="No deletion found for this user")
+        return UserDeletionStatus(user_id=user_id, state="pending", deletion_requested_at=user.deletion_requested_at)
+
+    return UserDeletionStatus(**progress.__dict__)
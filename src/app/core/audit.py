@@ -0,0 +1,67 @@
+from typing import Any, Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Session settings read by the audit triggers, in the order they are applied.
+AUDIT_CONTEXT_KEYS = (
+    "app_user_id",
+    "app_user_email",
+    "app_user_role",
+    "user_agent",
+    "api_endpoint",
+    "request_id",
+)
+
+def build_audit_context(
+    *,
+    app_user_id: Optional[int] = None,
+    app_user_email: Optional[str] = None,
+    app_user_role: Optional[str] = None,
+    user_agent: str = "",
+    api_endpoint: str = "",
+    request_id: str = "",
+) -> Dict[str, str]:
+    return {
+        "app_user_id": str(app_user_id) if app_user_id else "",
+        "app_user_email": app_user_email or "",
+        "app_user_role": app_user_role or "",
+        "user_agent": user_agent or "",
+        "api_endpoint": api_endpoint or "",
+        "request_id": request_id or "",
+    }
+
+# set_config(..., true) is SET LOCAL; one statement sets every key in a single round trip.
+APPLY_AUDIT_CONTEXT_SQL = text(
+    "SELECT " + ", ".join(f"set_config('audit.{key}', :{key}, true)" for key in AUDIT_CONTEXT_KEYS)
+)
+
+def apply_audit_context(db: Session, context: Dict[str, str]) -> None:
+    """
+    Sets the audit.* settings for the current transaction (SET LOCAL), so they
+    must be applied again after every commit.
+    """
+    db.execute(APPLY_AUDIT_CONTEXT_SQL, {key: context.get(key, "") for key in AUDIT_CONTEXT_KEYS})
+
+# The same settings with the user's fields read on the server, by the email in the token, so the
+# statement does not have to wait for the user lookup. Driver-level SQL (pyformat parameters).
+_SERVER_SIDE_KEYS = {"app_user_id": "u.user_id::text", "app_user_email": "u.email"}
+APPLY_AUDIT_CONTEXT_FOR_EMAIL_SQL = (
+    "SELECT "
+    + ", ".join(
+        f"set_config('audit.{key}', COALESCE({_SERVER_SIDE_KEYS[key]}, ''), true)"
+        if key in _SERVER_SIDE_KEYS
+        else f"set_config('audit.{key}', %({key})s, true)"
+        for key in AUDIT_CONTEXT_KEYS
+    )
+    + " FROM (SELECT 1) AS request LEFT JOIN vibesia_schema.users u ON u.email = %(lookup_email)s"
+)
+
+def queue_audit_context_for_email(dbapi_connection: Any, email: str, context: Dict[str, str]) -> None:
+    """
+    apply_audit_context for a psycopg pipeline, before the user is loaded: the
+    result is never read, so the statement travels with the ones after it.
+    The settings end up as apply_audit_context would set them from the user
+    row.
+    """
+    params = {key: context.get(key, "") for key in AUDIT_CONTEXT_KEYS if key not in _SERVER_SIDE_KEYS}
+    dbapi_connection.execute(APPLY_AUDIT_CONTEXT_FOR_EMAIL_SQL, {**params, "lookup_email": email})
@@ -1,4 +1,4 @@
-from typing import List, Set
+from typing import List, Literal, Set
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -8,18 +8,80 @@ class Settings(BaseSettings):
     
     # --- Database Settings ---
     DATABASE_URL: str
+    DATABASE_REPLICA_URLS: List[str] = []  # empty: reads go to the primary
+    READ_YOUR_WRITES_SECONDS: int = 10  # longer than the replicas' usual lag
+    READ_YOUR_WRITES_COOKIE: str = "vibesia_primary_until"
+    DATABASE_PREPARED_STATEMENTS: bool = True  # False behind a transaction-mode pooler
     
     # --- Security & JWT Settings ---
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     PASSWORD_RESET_TOKEN_EXPIRE_MINUTES: int = 60 
+    AUDIO_URL_EXPIRE_SECONDS: int = 3600
     
     # --- CORS Settings ---
     BACKEND_CORS_ORIGINS: List[str] = [
         "http://localhost:3000",
         "http://localhost:8000", 
     ]
+    # --- Audit Log Settings ---
+    AUDIT_LOG_PAGE_MAX: int = 500
+    AUDIT_LOG_QUERY_TIMEOUT_MS: int = 5000
+    AUDIT_LOG_RETENTION_MONTHS: int = 3
+    AUDIT_LOG_PARTITIONS_AHEAD: int = 2
+    AUDIT_ARCHIVE_DIR: str = "archive/audit_log"
+    STREAM_BATCH_SIZE: int = 2000
+
+    # --- Media Settings ---
+    MEDIA_ROOT: str = "media"
+    MEDIA_FD_CACHE_SIZE: int = 256
+    MEDIA_HEADER_BYTES: int = 256 * 1024
+    MEDIA_MAX_RANGES: int = 16
+    AUDIO_UPLOAD_MAX_BYTES: int = 1024 * 1024 * 1024
+    AUDIO_UPLOAD_EXPIRE_HOURS: int = 24
+    WAVEFORM_POINTS: int = 1000
+    AUDIO_ANALYSIS_WORKERS: int = 0  # 0 = one per CPU
+    THUMBNAIL_SIZES: List[int] = [64, 128, 256, 512]
+    THUMBNAIL_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    THUMBNAIL_WORKERS: int = 2
+
+    # --- Query Log Settings ---
+    SLOW_QUERY_MS: int = 200
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.05  # 0 disables EXPLAIN capture
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = 10000
+    QUERY_STATS_MAX_STATEMENTS: int = 2000
+
+    # --- Profiling Settings ---
+    PROFILING_ENABLED: bool = True  # X-Profile header, administrators only
+    PROFILE_DIR: str = "profiles"
+    PROFILE_REPORTS_KEPT: int = 50
+    PROFILE_SAMPLE_INTERVAL_MS: float = 1.0
+    PROFILE_MAX_SECONDS: int = 60
+    PROFILE_TRACEMALLOC_FRAMES: int = 1
+
+    # --- Tracing Settings ---
+    TRACE_SAMPLE_RATE: float = 0.01  # requests with a sampled traceparent are always traced
+    TRACE_EXPORTER: Literal["memory", "file"] = "memory"
+    TRACE_FILE: str = "traces/spans.jsonl"
+    TRACE_BUFFER_SIZE: int = 1000
+
+    # --- Home Screen Settings ---
+    HOME_SECTION_TIMEOUT_MS: int = 1500
+
+    # --- Bulk Operation Settings ---
+    BULK_MAX_ITEMS: int = 1000
+    CASCADE_DELETE_BATCH_SIZE: int = 5000
+
+    # --- Catalog Import Settings ---
+    IMPORT_BATCH_SIZE: int = 5000
+    IMPORT_MAX_REPORTED_ERRORS: int = 1000
+
+    # --- User Deletion Settings ---
+    USER_DELETION_BATCH_SIZE: int = 5000
+    # A running purge that has not committed a chunk for this long is reported as interrupted and may be resumed
+    USER_DELETION_STALE_SECONDS: int = 300
+
     ADMIN_EMAILS: Set[str]
     ADMIN_USERNAMES: Set[str]
     ADMIN_USER_IDS: Set[int]
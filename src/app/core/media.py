@@ -0,0 +1,364 @@
+"""
+Serving audio files from MEDIA_ROOT with HTTP Range support.
+
+Hot tracks keep an open file descriptor (LRU, MEDIA_FD_CACHE_SIZE entries)
+and an mmap of their first MEDIA_HEADER_BYTES, which is where players seek
+first (tags, headers, the start of playback). Everything else is read with
+os.pread, which does not move the shared file offset, so one descriptor
+serves any number of concurrent responses. When the ASGI server offers the
+`http.response.zerocopy` extension the descriptor is handed to it instead
+(sendfile), and `http.response.pathsend` is used for whole-file responses.
+"""
+import mimetypes
+import mmap
+import os
+import secrets
+import stat
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+
+Range = Tuple[int, int]  # [start, end), end exclusive
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+@dataclass(eq=False)
+class MediaFile:
+    path: str
+    fd: int
+    size: int
+    inode: int
+    mtime_ns: int
+    etag: str
+    content_type: str
+    header: Optional[mmap.mmap] = None
+    checked_at: float = 0.0
+    refs: int = 0
+    evicted: bool = False
+
+    def read(self, offset: int, count: int) -> bytes:
+        if self.header is not None and offset + count <= len(self.header):
+            return self.header[offset:offset + count]
+        return os.pread(self.fd, count, offset)
+
+    def file(self):
+        # Unbuffered file object over the shared descriptor, for the zerocopy extension
+        return open(self.fd, "rb", buffering=0, closefd=False)
+
+    def close(self) -> None:
+        if self.header is not None:
+            self.header.close()
+        os.close(self.fd)
+
+
+def resolve_media_path(audio_path: str, root: Optional[str] = None) -> str:
+    """
+    Maps a song's audio_path onto MEDIA_ROOT. Paths that would escape the root
+    (`..`, symlinks pointing outside) are rejected with FileNotFoundError.
+    """
+    root = os.path.realpath(root or settings.MEDIA_ROOT)
+    path = os.path.realpath(os.path.join(root, audio_path.lstrip("/")))
+    if os.path.commonpath([root, path]) != root:
+        raise FileNotFoundError(audio_path)
+    return path
+
+
+class MediaFileCache:
+    """LRU of open media files, keyed by resolved path."""
+
+    def __init__(self, capacity: int, header_bytes: int, revalidate_after: float = 1.0):
+        self.capacity = capacity
+        self.header_bytes = header_bytes
+        # Cached entries are trusted for this many seconds before the file is stat()ed again
+        self.revalidate_after = revalidate_after
+        self._files: "OrderedDict[str, MediaFile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _open(self, path: str) -> MediaFile:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            st = os.fstat(fd)
+            if not stat.S_ISREG(st.st_mode):
+                raise FileNotFoundError(path)
+            header = None
+            if st.st_size and self.header_bytes:
+                header = mmap.mmap(fd, min(st.st_size, self.header_bytes), access=mmap.ACCESS_READ)
+        except Exception:
+            os.close(fd)
+            raise
+        return MediaFile(
+            path=path,
+            fd=fd,
+            size=st.st_size,
+            inode=st.st_ino,
+            mtime_ns=st.st_mtime_ns,
+            etag=f'"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"',
+            content_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+            header=header,
+            checked_at=time.monotonic(),
+        )
+
+    def acquire_cached(self, path: str) -> Optional[MediaFile]:
+        """
+        Returns the cached MediaFile for `path` without any I/O, or None if it
+        is not cached or is due for revalidation (then use acquire()).
+        """
+        with self._lock:
+            media = self._files.get(path)
+            if media is None or time.monotonic() - media.checked_at > self.revalidate_after:
+                return None
+            self._files.move_to_end(path)
+            media.refs += 1
+            return media
+
+    def acquire(self, path: str) -> MediaFile:
+        """
+        Returns an open MediaFile for `path`, reopening it if the file was
+        replaced since it was cached. Blocks on stat/open, so call it from a
+        worker thread. Pair every call with release().
+        """
+        st = os.stat(path)
+        with self._lock:
+            media = self._files.get(path)
+            if media is not None and (media.inode, media.mtime_ns, media.size) == (st.st_ino, st.st_mtime_ns, st.st_size):
+                self._files.move_to_end(path)
+                media.checked_at = time.monotonic()
+                media.refs += 1
+                return media
+
+        fresh = self._open(path)
+        stale = []
+        with self._lock:
+            media = self._files.get(path)
+            if media is not None and media.etag == fresh.etag:
+                # Another request opened it meanwhile
+                stale.append(fresh)
+                fresh = media
+            else:
+                if media is not None:
+                    stale.append(self._detach(path))
+                self._files[path] = fresh
+                while len(self._files) > self.capacity:
+                    stale.append(self._detach(next(iter(self._files))))
+            fresh.refs += 1
+        for old in stale:
+            self._close_if_unused(old)
+        return fresh
+
+    def release(self, media: MediaFile) -> None:
+        with self._lock:
+            media.refs -= 1
+        self._close_if_unused(media)
+
+    def _detach(self, path: str) -> MediaFile:
+        media = self._files.pop(path)
+        media.evicted = True
+        return media
+
+    def _close_if_unused(self, media: MediaFile) -> None:
+        with self._lock:
+            if not media.evicted or media.refs > 0:
+                return
+            media.refs = -1  # closed
+        media.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            files = [self._detach(path) for path in list(self._files)]
+        for media in files:
+            self._close_if_unused(media)
+
+
+media_cache = MediaFileCache(settings.MEDIA_FD_CACHE_SIZE, settings.MEDIA_HEADER_BYTES)
+
+
+def parse_range_header(value: str, size: int, max_ranges: int) -> Optional[List[Range]]:
+    """
+    Parses a `Range: bytes=...` header into sorted, merged [start, end) ranges.
+    Returns None when the header is malformed or asks for too many ranges (the
+    whole file is served, as RFC 9110 allows); raises RangeNotSatisfiable
+    when no range overlaps the file.
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+    parts = spec.split(",")
+    if len(parts) > max_ranges:
+        return None
+
+    ranges: List[Range] = []
+    for part in parts:
+        first, dash, last = part.strip().partition("-")
+        if not dash:
+            return None
+        try:
+            if first:
+                start = int(first)
+                end = int(last) + 1 if last else size
+                if start < 0 or (last and end <= start):
+                    return None
+            else:
+                suffix = int(last)
+                if suffix <= 0:
+                    continue
+                start, end = max(size - suffix, 0), size
+        except ValueError:
+            return None
+        if start < size:
+            ranges.append((start, min(end, size)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        if start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class MediaFileResponse(Response):
+    """
+    Streams a file from MEDIA_ROOT, answering conditional (If-None-Match,
+    If-Range) and Range requests. The file is opened through media_cache when
+    the response is sent, so a missing file becomes a 404 there.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, path: str, *, headers: Optional[dict] = None, cache: MediaFileCache = media_cache):
+        super().__init__(status_code=200, headers=headers)
+        self.path = path
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            media = self.cache.acquire_cached(self.path)
+            if media is None:
+                media = await anyio.to_thread.run_sync(self.cache.acquire, self.path)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            await Response("Audio file not found", status_code=404, media_type="text/plain")(scope, receive, send)
+            return
+        try:
+            await self._send(media, scope, send)
+        finally:
+            self.cache.release(media)
+
+    async def _send(self, media: MediaFile, scope: Scope, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        head_only = scope["method"].upper() == "HEAD"
+        extensions = scope.get("extensions") or {}
+
+        self.headers["accept-ranges"] = "bytes"
+        self.headers["etag"] = media.etag
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or media.etag in [t.strip() for t in if_none_match.split(",")]):
+            del self.headers["content-length"]
+            await self._start(send, 304)
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        ranges = None
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (if_range is None or if_range.strip() == media.etag):
+            try:
+                ranges = parse_range_header(range_header, media.size, settings.MEDIA_MAX_RANGES)
+            except RangeNotSatisfiable:
+                self.headers["content-range"] = f"bytes */{media.size}"
+                self.headers["content-length"] = "0"
+                await self._start(send, 416)
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+
+        if ranges is None:
+            self.headers["content-type"] = media.content_type
+            self.headers["content-length"] = str(media.size)
+            await self._start(send, 200)
+            if head_only:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            elif "http.response.pathsend" in extensions:
+                await send({"type": "http.response.pathsend", "path": media.path})
+            else:
+                await self._send_range(media, 0, media.size, send, extensions, more_body=False)
+            return
+
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            self.headers["content-type"] = media.content_type
+            self.headers["content-range"] = f"bytes {start}-{end - 1}/{media.size}"
+            self.headers["content-length"] = str(end - start)
+            await self._start(send, 206)
+            if head_only:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            else:
+                await self._send_range(media, start, end, send, extensions, more_body=False)
+            return
+
+        boundary = secrets.token_hex(12)
+        part_headers = [
+            (
+                f"--{boundary}\r\nContent-Type: {media.content_type}\r\n"
+                f"Content-Range: bytes {start}-{end - 1}/{media.size}\r\n\r\n"
+            ).encode("latin-1")
+            for start, end in ranges
+        ]
+        closing = f"\r\n--{boundary}--\r\n".encode("latin-1")
+        length = sum(len(h) for h in part_headers) + sum(end - start for start, end in ranges)
+        length += 2 * (len(ranges) - 1) + len(closing)
+
+        self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        self.headers["content-length"] = str(length)
+        await self._start(send, 206)
+        if head_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        for index, ((start, end), part_header) in enumerate(zip(ranges, part_headers)):
+            prefix = part_header if index == 0 else b"\r\n" + part_header
+            await send({"type": "http.response.body", "body": prefix, "more_body": True})
+            await self._send_range(media, start, end, send, extensions, more_body=True)
+        await send({"type": "http.response.body", "body": closing, "more_body": False})
+
+    async def _start(self, send: Send, status_code: int) -> None:
+        await send({"type": "http.response.start", "status": status_code, "headers": self.raw_headers})
+
+    async def _send_range(self, media: MediaFile, start: int, end: int, send: Send, extensions: dict, *, more_body: bool) -> None:
+        if start >= end:
+            await send({"type": "http.response.body", "body": b"", "more_body": more_body})
+            return
+        if "http.response.zerocopy" in extensions:
+            await send({
+                "type": "http.response.zerocopy",
+                "file": media.file(),
+                "offset": start,
+                "count": end - start,
+                "more_body": more_body,
+            })
+            return
+
+        offset = start
+        while offset < end:
+            count = min(self.chunk_size, end - offset)
+            if media.header is not None and offset + count <= len(media.header):
+                chunk = media.header[offset:offset + count]
+            else:
+                chunk = await anyio.to_thread.run_sync(media.read, offset, count)
+            if not chunk:
+                raise RuntimeError(f"{media.path} shrank while being served")
+            offset += len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body or offset < end})
@@ -0,0 +1,348 @@
+"""
+Request and database metrics in the Prometheus text format, without a client
+library.
+
+Recording is the hot path, so it takes no locks: every thread updates its own
+shard (a plain dict of label tuple -> cells), and shards are only summed when
+/metrics is scraped. HTTP metrics are recorded on the event loop thread by
+MetricsMiddleware, a pure ASGI middleware. Database metrics come from engine
+events in whatever thread runs the query, and are attributed to the current
+request through a context variable, which worker threads inherit.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+Labels = Tuple[Union[str, int], ...]
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: Union[str, int]) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _merge(total: Dict[Labels, list], labels: Labels, cell: Sequence[float]) -> None:
+    current = total.get(labels)
+    if current is None:
+        total[labels] = list(cell)
+    else:
+        for i, value in enumerate(cell):
+            current[i] += value
+
+
+class _Sharded:
+    """Per-thread storage of label tuple -> cell, summed on collection."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, Dict[Labels, list]]] = []
+        self._retired: Dict[Labels, list] = {}  # sum of the shards of finished threads
+        self._shards_lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _shard(self) -> Dict[Labels, list]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:  # once per thread
+                self._retire_finished()
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def _retire_finished(self) -> None:
+        """
+        Folds the shards of threads that have exited (the threadpool drops idle
+        workers) into one, so the shard list does not grow with every thread
+        ever started. A finished thread writes no more, so its shard is final.
+        Called with _shards_lock held.
+        """
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                for labels, cell in shard.items():
+                    _merge(self._retired, labels, cell)
+        self._shards = alive
+
+    def _cells(self) -> Dict[Labels, list]:
+        """Sum of all shards. list(dict.items()) is atomic under the GIL."""
+        with self._shards_lock:
+            self._retire_finished()
+            shards = [shard for _, shard in self._shards]
+            total: Dict[Labels, list] = {labels: list(cell) for labels, cell in self._retired.items()}
+        for shard in shards:
+            for labels, cell in list(shard.items()):
+                _merge(total, labels, cell)
+        return total
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            shard[labels] = [amount]
+        else:
+            cell[0] += amount
+
+    def collect(self) -> Iterator[str]:
+        yield from self.header()
+        for labels, (value,) in sorted(self._cells().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_number(value)}"
+
+
+def _histogram_lines(
+    name: str, labelnames: Sequence[str], buckets: Sequence[float], cells: Dict[Labels, list]
+) -> Iterator[str]:
+    """Cells hold one count per bucket, then +Inf, then the sum."""
+    bounds = [f'le="{_number(bound)}"' for bound in buckets] + ['le="+Inf"']
+    for labels, cell in sorted(cells.items()):
+        cumulative = 0
+        for le, count in zip(bounds, cell):
+            cumulative += count
+            yield f"{name}_bucket{_format_labels(labelnames, labels, le)} {cumulative}"
+        label_text = _format_labels(labelnames, labels)
+        yield f"{name}_sum{label_text} {_number(cell[-1])}"
+        yield f"{name}_count{label_text} {cumulative}"
+
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), *, buckets: Sequence[float]):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: Labels, value: float) -> None:
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            cell = shard[labels] = [0] * (len(self.buckets) + 2)
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def collect(self) -> Iterator[str]:
+        yield from self.header()
+        yield from _histogram_lines(self.name, self.labelnames, self.buckets, self._cells())
+
+
+class Gauge:
+    """Read from a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        REGISTRY.append(self)
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {_number(self.read())}"
+
+
+REGISTRY: list = []
+
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.collect()) + "\n"
+
+
+# --- HTTP ---
+
+class RequestMetrics(_Sharded):
+    """
+    Every per-request family in one cell per (method, route, status), so a
+    request costs a single shard lookup. A cell is the request count followed
+    by the latency, response size, statement count and database time
+    histograms; scrapes fold the status (and for the database families, the
+    method) back out.
+    """
+
+    kind = "counter"
+    FAMILIES = (
+        ("http_request_duration_seconds", "Time to the end of the response body.", ("method", "route"),
+         LATENCY_BUCKETS),
+        ("http_response_size_bytes", "Response body size.", ("method", "route"), SIZE_BUCKETS),
+        ("db_statements_per_request", "SQL statements executed while serving a request.", ("route",),
+         COUNT_BUCKETS),
+        ("db_time_per_request_seconds", "Time spent in SQL statements while serving a request.", ("route",),
+         LATENCY_BUCKETS),
+    )
+
+    def __init__(self):
+        super().__init__("http_requests_total", "Requests by route and status.", ("method", "route", "status"))
+        self.offsets = []
+        offset = 1
+        for *_, buckets in self.FAMILIES:
+            self.offsets.append(offset)
+            offset += len(buckets) + 2
+        self.width = offset
+        # slot of each histogram's first bucket and of its sum
+        (self._lat, self._size, self._stmts, self._db) = self.offsets
+        self._lat_sum, self._size_sum, self._stmts_sum = self._size - 1, self._stmts - 1, self._db - 1
+
+    def record(self, labels: Labels, seconds: float, size: int, statements: int, db_seconds: float) -> None:
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            cell = shard[labels] = [0] * self.width
+        cell[0] += 1
+        cell[self._lat + bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        cell[self._lat_sum] += seconds
+        cell[self._size + bisect_left(SIZE_BUCKETS, size)] += 1
+        cell[self._size_sum] += size
+        cell[self._stmts + bisect_left(COUNT_BUCKETS, statements)] += 1
+        cell[self._stmts_sum] += statements
+        cell[self._db + bisect_left(LATENCY_BUCKETS, db_seconds)] += 1
+        cell[-1] += db_seconds
+
+    def collect(self) -> Iterator[str]:
+        cells = self._cells()
+        yield from self.header()
+        for labels, cell in sorted(cells.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {cell[0]}"
+        for (name, documentation, labelnames, buckets), offset in zip(self.FAMILIES, self.offsets):
+            family: Dict[Labels, list] = {}
+            for (method, route, _), cell in cells.items():
+                key = (method, route) if len(labelnames) == 2 else (route,)
+                _merge(family, key, cell[offset:offset + len(buckets) + 2])
+            yield f"# HELP {name} {documentation}"
+            yield f"# TYPE {name} histogram"
+            yield from _histogram_lines(name, labelnames, buckets, family)
+
+
+http_requests = RequestMetrics()
+_in_flight = [0]
+Gauge("http_requests_in_flight", "Requests being processed.", lambda: _in_flight[0])
+
+# --- database ---
+
+db_statement_duration = Histogram(
+    "db_statement_duration_seconds", "Duration of single SQL statements.", buckets=LATENCY_BUCKETS,
+)
+db_pool_checkouts = Counter("db_pool_checkouts_total", "Connections handed out by the pool.")
+db_pool_wait = Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled connection.", buckets=LATENCY_BUCKETS,
+)
+
+_pools: List[QueuePool] = []
+Gauge("db_pool_size", "Configured pool size.", lambda: sum(pool.size() for pool in _pools))
+Gauge("db_pool_checked_out", "Connections currently checked out.", lambda: sum(pool.checkedout() for pool in _pools))
+Gauge("db_pool_overflow", "Connections open beyond the pool size.", lambda: sum(max(pool.overflow(), 0) for pool in _pools))
+
+# [statements, seconds] of the request being served; worker threads inherit it
+_request_db: ContextVar[Optional[list]] = ContextVar("request_db", default=None)
+# ASGI scope of that request; the router adds "route" to it once matched
+request_scope: ContextVar[Optional[Scope]] = ContextVar("request_scope", default=None)
+
+
+def route_label(scope: Scope) -> str:
+    # Route templates keep the label set bounded; raw paths would not
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait.observe((), time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["metrics_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("metrics_started", time.perf_counter())
+        db_statement_duration.observe((), elapsed)
+        stats = _request_db.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        db_pool_checkouts.inc()
+
+    if isinstance(engine.pool, QueuePool):
+        _pools.append(engine.pool)
+
+
+# --- middleware ---
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = [500]
+        size = [0]
+        stats = [0, 0.0]
+        token = _request_db.set(stats)
+        scope_token = request_scope.set(scope)
+        _in_flight[0] += 1
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                size[0] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _in_flight[0] -= 1
+            _request_db.reset(token)
+            request_scope.reset(scope_token)
+            path = route_label(scope)
+            http_requests.record(
+                (scope["method"], path, status[0]), time.perf_counter() - started, size[0], stats[0], stats[1]
+            )
@@ -0,0 +1,79 @@
+"""
+Server-side prepared statements for the hot raw-SQL queries.
+
+psycopg2 sends every `text()` query as a full SQL string, which PostgreSQL
+parses and plans again on each call. A PreparedQuery is PREPAREd once per
+pooled connection, the first time that connection runs it, and afterwards
+only `EXECUTE name (params)` goes over the wire; PostgreSQL keeps the parsed
+statement and, once it has seen a few executions, reuses a generic plan.
+Which connections know which statements is kept in the pool's per-connection
+info, so it survives checkins and is forgotten when the connection is
+replaced.
+
+Prepared statements belong to the server session, which transaction-mode
+poolers (PgBouncer with pool_mode=transaction) do not pin to a client
+connection. Behind such a pooler set DATABASE_PREPARED_STATEMENTS to False:
+the queries then run as plain `text()` statements, as they did before. Other
+dialects (the SQLite used in tests) always take that path, and so does
+psycopg 3, which already prepares any statement a connection runs
+`prepare_threshold` times (the flag turns that off in core.database).
+"""
+import re
+from typing import Any, Dict, List, Mapping, Optional
+
+from sqlalchemy import exc, text
+from sqlalchemy.engine import Result
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+# `:name` bind parameters, as text() reads them (`::type` casts excluded)
+_BIND = re.compile(r"(?<![:\w]):(\w+)")
+# SQLSTATE invalid_sql_statement_name: the server session lost the statement
+_UNKNOWN_STATEMENT = "26000"
+_EXECUTE = re.compile(r"\s*EXECUTE\s+(\w+)", re.I)
+
+_names: Dict[str, "PreparedQuery"] = {}
+
+
+class PreparedQuery:
+    def __init__(self, name: str, sql: str):
+        if name in _names:
+            raise ValueError(f"Prepared statement name '{name}' is already in use")
+        _names[name] = self
+        self.name = name
+        self.statement = text(sql)
+        self.params: List[str] = []
+
+        def number(match: "re.Match[str]") -> str:
+            if match.group(1) not in self.params:
+                self.params.append(match.group(1))
+            return f"${self.params.index(match.group(1)) + 1}"
+
+        self.prepare_sql = f"PREPARE {name} AS {_BIND.sub(number, sql)}"
+        arguments = ", ".join(f"%({param})s" for param in self.params)
+        self.execute_sql = f"EXECUTE {name} ({arguments})" if arguments else f"EXECUTE {name}"
+
+    def execute(self, db: Session, params: Mapping[str, Any]) -> Result:
+        connection = db.connection()
+        if not settings.DATABASE_PREPARED_STATEMENTS or connection.dialect.driver != "psycopg2":
+            return db.execute(self.statement, params)
+
+        prepared = connection.connection.info.setdefault("prepared_statements", set())
+        if self.name not in prepared:
+            connection.exec_driver_sql(self.prepare_sql)
+            prepared.add(self.name)
+        try:
+            return connection.exec_driver_sql(self.execute_sql, {param: params[param] for param in self.params})
+        except exc.DBAPIError as e:
+            code = getattr(e.orig, "pgcode", None) or getattr(e.orig, "sqlstate", None)
+            if code == _UNKNOWN_STATEMENT:
+                # Someone ran DEALLOCATE/DISCARD ALL on this connection: prepare everything again next time
+                prepared.clear()
+            raise
+
+
+def prepared_query_for(statement: str) -> Optional[PreparedQuery]:
+    """The PreparedQuery an `EXECUTE name (...)` statement runs, if it is one of ours."""
+    match = _EXECUTE.match(statement)
+    return _names.get(match.group(1)) if match else None
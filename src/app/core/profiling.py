@@ -0,0 +1,306 @@
+"""
+On-demand profiling of single requests in production.
+
+A request carrying `X-Profile: cpu`, `X-Profile: memory` or `X-Profile: all`
+from an administrator is profiled; every other request only pays for one
+header lookup. The response names the report in `X-Profile-Id`, and the
+report is written as JSON to PROFILE_DIR, so any worker process can serve it
+from GET /admin/profiles/{id}.
+
+CPU profiles are statistical: a sampler thread reads every thread's stack
+each PROFILE_SAMPLE_INTERVAL_MS. Samples are kept for the event loop thread
+(minus its idle waits) and for worker threads whose stack passes through the
+matched endpoint or one of its dependencies, which is how a sync endpoint's
+threadpool work is attributed to the request. Concurrent requests running
+through the same functions are sampled too. The report holds the samples as
+collapsed stacks, the input format of flame graph tools.
+
+Memory profiles diff tracemalloc snapshots taken around the request: the
+report lists the lines holding the most new memory when the response
+finished, and the peak traced memory. Tracing is process-wide, so only one
+request is profiled at a time per process.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import anyio
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MODES = {"cpu": {"cpu"}, "memory": {"memory"}, "all": {"cpu", "memory"}, "1": {"cpu", "memory"}}
+TOP_ALLOCATIONS = 25
+PROFILE_ID_LENGTH = 32
+
+Authorize = Callable[[Scope], Awaitable[bool]]
+
+
+def _frame_name(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+
+
+class Sampler(threading.Thread):
+    """Counts the stacks of all other threads, every `interval` seconds, for at most `max_seconds`."""
+
+    def __init__(self, interval: float, max_seconds: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.samples: Counter = Counter()  # (thread ident, stack of code objects, leaf first) -> count
+        self.ticks = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        deadline = time.monotonic() + self.max_seconds
+        # A busy thread holds the GIL for the whole switch interval (5 ms), which would space the samples out
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(switch_interval, self.interval))
+        try:
+            while not self._stop_event.wait(self.interval) and time.monotonic() < deadline:
+                self.ticks += 1
+                for ident, frame in sys._current_frames().items():
+                    if ident == own:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(frame.f_code)
+                        frame = frame.f_back
+                    self.samples[(ident, tuple(stack))] += 1
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def endpoint_codes(route: Any) -> Set[Any]:
+    """Code objects of a FastAPI route's endpoint and all of its dependencies."""
+    codes = set()
+    pending = [getattr(route, "dependant", None)]
+    while pending:
+        dependant = pending.pop()
+        if dependant is None:
+            continue
+        code = getattr(getattr(dependant, "call", None), "__code__", None)
+        if code is not None:
+            codes.add(code)
+        pending.extend(dependant.dependencies)
+    endpoint = getattr(getattr(route, "endpoint", None), "__code__", None)
+    if endpoint is not None:
+        codes.add(endpoint)
+    return codes
+
+
+def collapse(samples: Counter, loop_thread: int, codes: Set[Any]) -> Tuple[List[str], int]:
+    """Collapsed stacks (`root;...;leaf count`) of the request's samples, and their total."""
+    stacks: Counter = Counter()
+    for (ident, stack), count in samples.items():
+        if ident == loop_thread:
+            if stack and os.path.basename(stack[0].co_filename) == "selectors.py":
+                continue  # the loop waiting for I/O
+            thread = "event-loop"
+        elif codes.intersection(stack):
+            thread = "worker"
+        else:
+            continue
+        stacks[";".join([thread] + [_frame_name(code) for code in reversed(stack)])] += count
+    lines = [f"{stack} {count}" for stack, count in stacks.most_common()]
+    return lines, sum(stacks.values())
+
+
+def allocation_diff(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, __file__),
+    ]
+    stats = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_diff": stat.size_diff,
+            "count_diff": stat.count_diff,
+            "size": stat.size,
+        }
+        for stat in stats[:TOP_ALLOCATIONS]
+        if stat.size_diff
+    ]
+
+
+class ProfileStore:
+    """Reports as JSON files; the oldest are deleted beyond `keep`."""
+
+    def __init__(self, directory: str, keep: int):
+        self.directory = directory
+        self.keep = keep
+
+    def path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.json")
+
+    def save(self, report: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(report["id"])
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(report, f)
+        os.replace(f"{path}.tmp", path)
+        for old in self._files()[self.keep:]:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+
+    def load(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        if len(profile_id) != PROFILE_ID_LENGTH or not all(c in "0123456789abcdef" for c in profile_id):
+            return None
+        try:
+            with open(self.path(profile_id), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def list(self) -> List[Dict[str, Any]]:
+        reports = []
+        for path in self._files():
+            report = self.load(os.path.basename(path)[:-len(".json")])
+            if report is not None:
+                reports.append(report)
+        return reports
+
+    def _files(self) -> List[str]:
+        """Newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    entries.append((entry.stat().st_mtime_ns, entry.path))
+                except FileNotFoundError:
+                    continue
+        return [path for _, path in sorted(entries, reverse=True)]
+
+
+profile_store = ProfileStore(settings.PROFILE_DIR, settings.PROFILE_REPORTS_KEPT)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp, authorize: Authorize, store: ProfileStore = profile_store):
+        self.app = app
+        self.authorize = authorize
+        self.store = store
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode = None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                mode = MODES.get(value.decode("latin-1").strip().lower())
+                break
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        if not await self.authorize(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, self._with_header(send, b"x-profile-status", b"busy"))
+            return
+        try:
+            await self._profile(scope, receive, send, mode)
+        finally:
+            self._busy.release()
+
+    @staticmethod
+    def _with_header(send: Send, name: bytes, value: bytes) -> Send:
+        async def wrapped(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(name, value)]
+            await send(message)
+        return wrapped
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send, mode: Set[str]) -> None:
+        profile_id = uuid.uuid4().hex
+        status = [500]
+        inner_send = self._with_header(send, b"x-profile-id", profile_id.encode())
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await inner_send(message)
+
+        sampler = None
+        started_tracing = False
+        before = None
+        if "memory" in mode:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(settings.PROFILE_TRACEMALLOC_FRAMES)
+                started_tracing = True
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+        if "cpu" in mode:
+            sampler = Sampler(settings.PROFILE_SAMPLE_INTERVAL_MS / 1000, settings.PROFILE_MAX_SECONDS)
+            sampler.start()
+        loop_thread = threading.get_ident()
+        started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            cpu = time.process_time() - cpu_started
+            report: Dict[str, Any] = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", None),
+                "status": status[0],
+                "started_at": started_at.isoformat(),
+                "duration_ms": duration * 1000,
+                "process_cpu_ms": cpu * 1000,
+                "modes": sorted(mode),
+            }
+            # Stack collapsing, the snapshot diff and the file write stay off the event loop
+            await anyio.to_thread.run_sync(
+                self._finish, report, sampler, before, started_tracing, loop_thread, scope.get("route")
+            )
+
+    def _finish(
+        self,
+        report: Dict[str, Any],
+        sampler: Optional[Sampler],
+        before: Optional[tracemalloc.Snapshot],
+        started_tracing: bool,
+        loop_thread: int,
+        route: Any,
+    ) -> None:
+        if sampler is not None:
+            sampler.stop()
+            stacks, samples = collapse(sampler.samples, loop_thread, endpoint_codes(route))
+            report.update(interval_ms=sampler.interval * 1000, ticks=sampler.ticks, samples=samples, collapsed=stacks)
+        if before is not None:
+            after = tracemalloc.take_snapshot()
+            report.update(peak_traced_bytes=tracemalloc.get_traced_memory()[1], allocations=allocation_diff(before, after))
+            if started_tracing:
+                tracemalloc.stop()
+        try:
+            self.store.save(report)
+        except OSError as e:
+            logger.warning(f"Could not store profile {report['id']}: {e}")
@@ -0,0 +1,235 @@
+"""
+Per-statement timing, the slow query log and sampled EXPLAIN capture.
+
+Every statement is timed through engine cursor events and aggregated under
+its normalized text (literals and bind placeholders replaced by `?`, IN and
+VALUES lists collapsed), so the ORM's queries and the raw SQL in the CRUD
+modules show up side by side in GET /admin/queries. Statements slower than
+SLOW_QUERY_MS are logged with their parameters, route and request id.
+
+A sampled fraction of slow reads is re-run as EXPLAIN (ANALYZE, BUFFERS) to
+capture the plan they got. That happens on one background thread, on a
+separate pooled connection, inside a READ ONLY transaction that is rolled
+back, so the request never waits for it and it cannot change data.
+
+Prepared statements (core.prepared) reach the cursor events as
+`EXECUTE name (...)`; they are logged and aggregated under the SQL they were
+prepared from, and explained as EXPLAIN ... EXECUTE, PREPAREd first on the
+explain connection if that server session does not have them yet.
+"""
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import request_scope, route_label
+from app.core.prepared import PreparedQuery, prepared_query_for
+
+logger = logging.getLogger(__name__)
+
+# A statement is explained at most this often, however often it is slow
+EXPLAIN_INTERVAL = 60
+# Samples waiting for the explain thread beyond this are dropped
+EXPLAIN_BACKLOG = 4
+PARAMS_LOG_CHARS = 500
+MASKED_PARAMS = ("password", "token", "secret")
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+# `:name` too, for the text() of prepared statements (`::type` casts excluded)
+_PLACEHOLDER = re.compile(r"%\([^)]*\)s|%s|\$\d+|\?|(?<![:\w]):\w+")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROWS = re.compile(r"(\([?,\s]+\))(?:\s*,\s*\([?,\s]+\))+")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement: str) -> str:
+    sql = _COMMENT.sub(" ", statement)
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _ROWS.sub(r"\1, ...", sql)
+    sql = _LIST.sub("(?, ...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def is_explainable(statement: str) -> bool:
+    """Plain reads only: EXPLAIN ANALYZE executes the statement."""
+    head = statement.lstrip().upper()
+    if not head.startswith(("SELECT", "WITH")):
+        return False
+    return not re.search(r"\b(INSERT|UPDATE|DELETE|MERGE)\b|\bFOR\s+(NO\s+KEY\s+)?(UPDATE|SHARE)\b", head)
+
+
+def masked_params(parameters: Any) -> str:
+    if isinstance(parameters, dict):
+        parameters = {
+            key: "***" if any(word in str(key).lower() for word in MASKED_PARAMS) else value
+            for key, value in parameters.items()
+        }
+    text = repr(parameters)
+    return text if len(text) <= PARAMS_LOG_CHARS else text[:PARAMS_LOG_CHARS] + "..."
+
+
+@dataclass
+class StatementStats:
+    statement: str
+    calls: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    slow_calls: int = 0
+    last_route: Optional[str] = None
+    plan: Optional[str] = None
+    plan_captured_at: Optional[float] = None
+    explain_requested_at: float = 0.0
+
+
+class QueryLog:
+    def __init__(self, *, slow_seconds: float, sample_rate: float, max_statements: int, explain_timeout_ms: int):
+        self.slow_seconds = slow_seconds
+        self.sample_rate = sample_rate
+        self.max_statements = max_statements
+        self.explain_timeout_ms = explain_timeout_ms
+        self._stats: Dict[str, StatementStats] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._backlog = 0
+
+    def install(self, engine: Engine) -> None:
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info["query_log_started"] = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info.pop("query_log_started", None)
+            if started is not None:
+                self.record(engine, statement, parameters, time.perf_counter() - started, executemany)
+
+    # --- recording ---
+
+    def record(self, engine: Engine, statement: str, parameters: Any, seconds: float, executemany: bool = False) -> None:
+        prepared = prepared_query_for(statement)
+        sql = prepared.statement.text if prepared is not None else statement
+        key = normalize_sql(sql)
+        slow = seconds >= self.slow_seconds
+        scope = request_scope.get()
+        route = route_label(scope) if scope is not None else None
+        explain = False
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_statements:
+                    self._trim()
+                stats = self._stats[key] = StatementStats(key)
+            stats.calls += 1
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            if slow:
+                stats.slow_calls += 1
+                stats.last_route = route
+                explain = (
+                    not executemany
+                    and random.random() < self.sample_rate
+                    and time.monotonic() - stats.explain_requested_at >= EXPLAIN_INTERVAL
+                    and self._backlog < EXPLAIN_BACKLOG
+                    and is_explainable(sql)
+                )
+                if explain:
+                    stats.explain_requested_at = time.monotonic()
+                    self._backlog += 1
+        if not slow:
+            return
+
+        request_id = ""
+        if scope is not None:
+            request_id = next((v.decode("latin-1") for k, v in scope.get("headers", ()) if k == b"x-request-id"), "")
+        logger.warning(
+            f"Slow query {seconds * 1000:.1f} ms route={route or '-'} request_id={request_id or '-'}: "
+            f"{key} params={masked_params(parameters)}"
+        )
+        if explain:
+            if self._executor is None:
+                with self._lock:
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+            self._executor.submit(self._explain, engine, key, statement, parameters, prepared)
+
+    def _trim(self) -> None:
+        """Keeps the half of the statements with the most total time."""
+        ranked = sorted(self._stats.values(), key=lambda s: s.total_seconds, reverse=True)
+        self._stats = {s.statement: s for s in ranked[: self.max_statements // 2]}
+
+    # --- EXPLAIN ---
+
+    def _explain(
+        self, engine: Engine, key: str, statement: str, parameters: Any, prepared: Optional[PreparedQuery] = None
+    ) -> None:
+        try:
+            # A raw DBAPI connection, so these statements do not reach the cursor events
+            connection = engine.raw_connection()
+            try:
+                cursor = connection.cursor()
+                cursor.execute("SET TRANSACTION READ ONLY")
+                cursor.execute("SELECT set_config('statement_timeout', %s, true)", (str(self.explain_timeout_ms),))
+                if prepared is not None:
+                    # Same per-connection bookkeeping as PreparedQuery.execute, so it does not PREPARE it twice;
+                    # PREPARE is not undone by the rollback below
+                    names = connection.info.setdefault("prepared_statements", set())
+                    if prepared.name not in names:
+                        cursor.execute(prepared.prepare_sql)
+                        names.add(prepared.name)
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+            finally:
+                connection.rollback()
+                connection.close()
+        except Exception as e:
+            logger.info(f"EXPLAIN of slow query failed: {e}")
+            return
+        finally:
+            with self._lock:
+                self._backlog -= 1
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is not None:
+                stats.plan = plan
+                stats.plan_captured_at = time.time()
+        logger.warning(f"Plan of slow query {key}:\n{plan}")
+
+    # --- reporting ---
+
+    def top(self, limit: int, order_by: str = "total") -> List[StatementStats]:
+        keys = {
+            "total": lambda s: s.total_seconds,
+            "mean": lambda s: s.total_seconds / s.calls,
+            "max": lambda s: s.max_seconds,
+            "calls": lambda s: s.calls,
+        }
+        with self._lock:
+            stats = list(self._stats.values())
+        return sorted(stats, key=keys[order_by], reverse=True)[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {}
+
+
+query_log = QueryLog(
+    slow_seconds=settings.SLOW_QUERY_MS / 1000,
+    sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    max_statements=settings.QUERY_STATS_MAX_STATEMENTS,
+    explain_timeout_ms=settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS,
+)
@@ -0,0 +1,80 @@
+"""
+Read-your-writes for the read replicas.
+
+A successful write request (any method but GET, HEAD and OPTIONS) answers
+with the time until which the client's reads must go to the primary, which
+already has the changes the replicas may still lack. The time is sent twice:
+
+- in a `vibesia_primary_until` cookie, `SameSite=None; Secure`, so browsers
+  send it back on cross-origin fetch/XHR with credentials (the front ends run
+  on other origins) - but only over HTTPS, and not at all where third-party
+  cookies are blocked;
+- in an `X-Primary-Until` response header, which clients that do not keep
+  cookies (or run in such browsers) should echo back as a request header.
+
+A client that does neither reads from a replica right after its own write
+and may not see it for up to the replication lag.
+"""
+import time
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Requests that cannot write; the others pin the client's reads to the primary
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+PRIMARY_UNTIL_HEADER = "X-Primary-Until"
+
+
+def _until(value: Optional[str]) -> float:
+    try:
+        return int(value) if value else 0
+    except ValueError:
+        return 0
+
+
+def reads_pinned_to_primary(headers: Headers) -> bool:
+    """Whether the request carries an unexpired pin, as a header or a cookie."""
+    until = _until(headers.get(PRIMARY_UNTIL_HEADER))
+    if not until and "cookie" in headers:
+        # Starlette's lenient parser: SimpleCookie gives up on the first malformed cookie
+        until = _until(cookie_parser(headers["cookie"]).get(settings.READ_YOUR_WRITES_COOKIE))
+    now = time.time()
+    # The value is checked, not just the presence, for clients that keep cookies past their max-age;
+    # a pin further ahead than any this server issues is ignored, so a client cannot pin itself for good
+    return now < until <= now + settings.READ_YOUR_WRITES_SECONDS
+
+
+def pin_headers() -> list:
+    until = str(int(time.time()) + settings.READ_YOUR_WRITES_SECONDS)
+    cookie = (
+        f"{settings.READ_YOUR_WRITES_COOKIE}={until}; Max-Age={settings.READ_YOUR_WRITES_SECONDS}; "
+        "Path=/; HttpOnly; Secure; SameSite=None"
+    )
+    return [(PRIMARY_UNTIL_HEADER.lower().encode(), until.encode()), (b"set-cookie", cookie.encode())]
+
+
+class ReadYourWritesMiddleware:
+    """
+    Adds the pin to every successful write response. Working at the ASGI level
+    covers endpoints that return a Response object themselves, whose headers
+    a `response: Response` dependency parameter would never reach.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message["headers"] = list(message.get("headers", [])) + pin_headers()
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
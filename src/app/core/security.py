@@ -1,5 +1,11 @@
+import base64
+import hashlib
+import hmac
 import logging
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -74,4 +80,91 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+# --- Signed audio stream URLs ---
+# Tokens are `<song_id>.<expires>.<b64 nonce + encrypted audio_path>.<b64 signature>`,
+# signed with HMAC-SHA256 under a key derived from SECRET_KEY. Verifying one needs
+# no database access: everything the streaming endpoint needs is in the token.
+# The path is encrypted so the URL does not reveal the storage layout: XORed
+# with an HMAC-SHA256 keystream (counter mode) under its own derived key. The
+# nonce is itself an HMAC of the plaintext, so the same song, path and expiry
+# still mint the same cacheable URL, and only identical paths share a nonce.
+
+@dataclass(frozen=True)
+class StreamGrant:
+    song_id: int
+    audio_path: str
+    expires: int
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+STREAM_NONCE_BYTES = 12
+
+@lru_cache(maxsize=1)
+def _stream_signing_key() -> bytes:
+    # A separate key, so a stream signature can never be valid as anything else
+    return hmac.new(settings.SECRET_KEY.encode(), b"vibesia:audio-stream-url", hashlib.sha256).digest()
+
+@lru_cache(maxsize=2)
+def _stream_key(purpose: bytes) -> bytes:
+    return hmac.new(settings.SECRET_KEY.encode(), b"vibesia:audio-stream-url:" + purpose, hashlib.sha256).digest()
+
+def _stream_signature(payload: str) -> str:
+    return _b64encode(hmac.new(_stream_signing_key(), payload.encode(), hashlib.sha256).digest()[:16])
+
+def _stream_cipher(nonce: bytes, data: bytes) -> bytes:
+    """Encrypts and decrypts alike: XOR with HMAC(key, nonce || counter) blocks."""
+    key = _stream_key(b"encrypt")
+    keystream = b"".join(
+        hmac.new(key, nonce + counter.to_bytes(4, "big"), hashlib.sha256).digest()
+        for counter in range(-(-len(data) // 32))
+    )
+    return bytes(a ^ b for a, b in zip(data, keystream))
+
+def _encrypt_audio_path(song_id: int, expires: int, audio_path: str) -> bytes:
+    plaintext = audio_path.encode()
+    nonce = hmac.new(
+        _stream_key(b"nonce"), f"{song_id}.{expires}.".encode() + plaintext, hashlib.sha256
+    ).digest()[:STREAM_NONCE_BYTES]
+    return nonce + _stream_cipher(nonce, plaintext)
+
+def _decrypt_audio_path(sealed: bytes) -> str:
+    if len(sealed) <= STREAM_NONCE_BYTES:
+        raise ValueError("Stream token carries no audio path")
+    return _stream_cipher(sealed[:STREAM_NONCE_BYTES], sealed[STREAM_NONCE_BYTES:]).decode()
+
+def create_stream_token(song_id: int, audio_path: str, expires_in: Optional[int] = None) -> str:
+    expires_in = settings.AUDIO_URL_EXPIRE_SECONDS if expires_in is None else expires_in
+    # Rounded up to the minute so repeated fetches mint the same, cacheable URL
+    expires = -(-(int(time.time()) + expires_in) // 60) * 60
+    payload = f"{song_id}.{expires}.{_b64encode(_encrypt_audio_path(song_id, expires, audio_path))}"
+    return f"{payload}.{_stream_signature(payload)}"
+
+def create_stream_url(song_id: int, audio_path: str) -> str:
+    return f"{settings.API_V1_STR}/songs/{song_id}/stream?token={create_stream_token(song_id, audio_path)}"
+
+def verify_stream_token(token: str, song_id: int) -> Optional[StreamGrant]:
+    """
+    Returns the grant carried by `token` if its signature is valid, it has not
+    expired and it was issued for `song_id`; None otherwise.
+    """
+    try:
+        payload, signature = token.rsplit(".", 1)
+        token_song_id, expires, encoded_path = payload.split(".")
+        if not hmac.compare_digest(signature, _stream_signature(payload)):
+            return None
+        grant = StreamGrant(
+            song_id=int(token_song_id),
+            audio_path=_decrypt_audio_path(_b64decode(encoded_path)),
+            expires=int(expires),
+        )
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if grant.song_id != song_id or grant.expires < time.time():
+        return None
+    return grant
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional
+
+from sqlalchemy import text
+from sqlalchemy.sql import Executable
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+# Rows are coalesced into chunks of about this size before being handed to
+# the ASGI server, so a send is not paid per row.
+CHUNK_BYTES = 64 * 1024
+
+
+def json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def stream_rows(
+    statement: Executable, params: Optional[Dict[str, Any]] = None, *, batch_size: Optional[int] = None
+) -> Iterator[Mapping[str, Any]]:
+    """
+    Yields the rows of `statement` from a server-side cursor, `batch_size`
+    rows per fetch, so memory stays flat whatever the size of the result.
+
+    Uses its own read-only session: a StreamingResponse body is consumed after
+    the request's dependencies have been torn down.
+    """
+    db = SessionLocal()
+    try:
+        db.execute(text("SET TRANSACTION READ ONLY"))
+        result = db.execute(
+            statement,
+            params or {},
+            execution_options={"yield_per": batch_size or settings.STREAM_BATCH_SIZE},
+        )
+        for row in result.mappings():
+            yield row
+    finally:
+        db.rollback()
+        db.close()
+
+
+def ndjson_lines(rows: Iterable[Mapping[str, Any]]) -> Iterator[bytes]:
+    for row in rows:
+        yield json.dumps(dict(row), default=json_default, separators=(",", ":")).encode() + b"\n"
+
+
+def csv_lines(rows: Iterable[Mapping[str, Any]], fieldnames: Iterable[str], *, batch: int = 500) -> Iterator[bytes]:
+    """Encodes rows as CSV, header first, `batch` rows per emitted chunk."""
+    fieldnames = list(fieldnames)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(fieldnames)
+    pending = 0
+    for row in rows:
+        # csv already writes None as an empty field; only dates need care
+        writer.writerow([
+            value.isoformat() if isinstance(value, (datetime, date)) else value
+            for value in (row[name] for name in fieldnames)
+        ])
+        pending += 1
+        if pending >= batch:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode()
+
+
+def coalesce(parts: Iterable[bytes], size: int = CHUNK_BYTES) -> Iterator[bytes]:
+    buffer = bytearray()
+    for part in parts:
+        buffer += part
+        if len(buffer) >= size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip-compresses a byte stream incrementally."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,240 @@
+"""
+Square JPEG thumbnails of album covers and 2x2 playlist mosaics.
+
+Thumbnails come in the fixed THUMBNAIL_SIZES and are rendered on first
+request into MEDIA_ROOT/.thumbnails. A file is named by a hash of its sources'
+identity (path, size, mtime) and the size, so a replaced cover gets a new
+name and the name doubles as a strong ETag. The directory is kept under
+THUMBNAIL_CACHE_MAX_BYTES by deleting the least recently used files; hits
+refresh the file's mtime, so the order is shared by every worker process and
+survives restarts.
+
+Decoding, resizing and encoding run on a dedicated pool of THUMBNAIL_WORKERS
+threads (Pillow releases the GIL for all three), so they never block the
+event loop or take threads from the pool serving sync endpoints. Concurrent
+requests for the same thumbnail share a single render.
+"""
+import asyncio
+import hashlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import anyio
+from PIL import Image, ImageOps
+from starlette.datastructures import Headers
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.media import resolve_media_path
+
+# Bump when rendering changes, so old files are not served as the new output
+RENDER_VERSION = 1
+
+# Hits only refresh the LRU clock this often, to avoid a metadata write per request
+TOUCH_INTERVAL = 3600
+
+
+def cover_paths(cover_images: Sequence[Optional[str]]) -> List[str]:
+    """Local files for the given cover_image values; remote URLs and unsafe paths are skipped."""
+    paths = []
+    for cover_image in cover_images:
+        if not cover_image or "://" in cover_image:
+            continue
+        try:
+            paths.append(resolve_media_path(cover_image))
+        except FileNotFoundError:
+            continue
+    return paths
+
+
+def mosaic_tiles(sources: Sequence[str]) -> List[str]:
+    """A 2x2 mosaic needs four covers; with fewer, the first is used on its own."""
+    return list(sources[:4]) if len(sources) >= 4 else list(sources[:1])
+
+
+def render_cover(sources: Sequence[str], size: int, quality: int) -> bytes:
+    """One cover scaled and center-cropped to size x size, or a 2x2 mosaic of four."""
+    tiles = mosaic_tiles(sources)
+    tile = size if len(tiles) == 1 else size // 2
+    canvas = Image.new("RGB", (size, size))
+    for index, path in enumerate(tiles):
+        with Image.open(path) as image:
+            # Lets JPEG decode at 1/2, 1/4 or 1/8 scale directly, the largest saving
+            image.draft("RGB", (tile, tile))
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            image = ImageOps.fit(image, (tile, tile), Image.Resampling.LANCZOS)
+        canvas.paste(image, ((index % 2) * tile, (index // 2) * tile))
+    buffer = io.BytesIO()
+    canvas.save(buffer, "JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+class ThumbnailCache:
+    def __init__(self, root: str, *, max_bytes: int, workers: int, quality: int = 85):
+        self.root = os.path.join(root, ".thumbnails")
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.quality = quality
+        self._bytes: Optional[int] = None  # estimate; recounted from disk on eviction
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # --- naming ---
+
+    def key(self, sources: Sequence[str], size: int) -> str:
+        """Stats every source; raises FileNotFoundError if one is missing."""
+        parts = [f"v{RENDER_VERSION}", str(size), str(self.quality)]
+        for path in mosaic_tiles(sources):
+            st = os.stat(path)
+            parts.append(f"{path}:{st.st_size}:{st.st_mtime_ns}")
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.jpg")
+
+    # --- cache ---
+
+    def read(self, key: str) -> Optional[bytes]:
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+                mtime = os.fstat(f.fileno()).st_mtime
+        except FileNotFoundError:
+            return None
+        if time.time() - mtime > TOUCH_INTERVAL:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+        return content
+
+    def _render(self, key: str, sources: Sequence[str], size: int) -> bytes:
+        content = self.read(key)  # another process may have rendered it meanwhile
+        if content is not None:
+            return content
+        content = render_cover(sources, size, self.quality)
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        self._account(len(content))
+        return content
+
+    def submit(self, sources: Sequence[str], size: int, key: Optional[str] = None) -> "Future[bytes]":
+        """Renders on the pool unless the same thumbnail is already being rendered."""
+        key = key or self.key(sources, size)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="thumbnail")
+            future = self._executor.submit(self._render, key, list(sources), size)
+            self._inflight[key] = future
+
+        def done(_: Future) -> None:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        future.add_done_callback(done)
+        return future
+
+    async def get(self, sources: Sequence[str], size: int, key: Optional[str] = None) -> Tuple[bytes, str]:
+        """(JPEG bytes, key) of a thumbnail, rendering it on the pool if needed."""
+        if key is None:
+            key = await anyio.to_thread.run_sync(self.key, sources, size)
+        content = await anyio.to_thread.run_sync(self.read, key)
+        if content is None:
+            content = await asyncio.wrap_future(self.submit(sources, size, key))
+        return content, key
+
+    # --- eviction ---
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for bucket in os.scandir(self.root):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def _account(self, added: int) -> None:
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += added
+            over = self._bytes is None or self._bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Deletes the least recently used files until the cache is under 90% of
+        max_bytes. Sizes are recounted from disk, so files written by other
+        processes are included. Returns the number of files removed.
+        """
+        if not self._evict_lock.acquire(blocking=False):
+            return 0
+        try:
+            entries = self._scan()
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            if total > self.max_bytes:
+                target = self.max_bytes * 0.9
+                for _, size, path in sorted(entries):
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    removed += 1
+            with self._lock:
+                self._bytes = total
+            return removed
+        finally:
+            self._evict_lock.release()
+
+
+thumbnail_cache = ThumbnailCache(
+    settings.MEDIA_ROOT,
+    max_bytes=settings.THUMBNAIL_CACHE_MAX_BYTES,
+    workers=settings.THUMBNAIL_WORKERS,
+)
+
+
+async def thumbnail_response(
+    headers: Headers, sources: Sequence[str], size: int, *, cache_control: str, cache: ThumbnailCache = thumbnail_cache
+) -> Response:
+    """A JPEG response for the thumbnail, or 304 when If-None-Match names it."""
+    try:
+        key = await anyio.to_thread.run_sync(cache.key, sources, size)
+    except FileNotFoundError:
+        return Response("Cover image not found", status_code=404, media_type="text/plain")
+    response_headers = {"ETag": f'"{key}"', "Cache-Control": cache_control}
+    if_none_match = headers.get("if-none-match")
+    if if_none_match and f'"{key}"' in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=response_headers)
+    try:
+        content, _ = await cache.get(sources, size, key)
+    except FileNotFoundError:
+        return Response("Cover image not found", status_code=404, media_type="text/plain")
+    except (Image.UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        return Response("Cover image cannot be decoded", status_code=422, media_type="text/plain")
+    return Response(content, media_type="image/jpeg", headers=response_headers)
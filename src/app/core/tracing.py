@@ -0,0 +1,355 @@
+"""
+Lightweight request tracing: spans for the request, its dependencies, CRUD
+methods and SQL statements.
+
+TracingMiddleware decides per request whether to trace, with probability
+TRACE_SAMPLE_RATE. A request that carries a sampled W3C `traceparent` is
+always traced and continues that trace; its `x-request-id` is recorded on the
+root span, and the response names the trace in `X-Trace-Id`. The current
+span travels in a context variable, which threadpool workers inherit, so
+`traced` functions and statements nest under whatever span is open where
+they run. Untraced requests skip all of it after one context variable read.
+
+Finished traces are exported in the OTLP/JSON encoding (one
+ExportTraceServiceRequest per line) to TRACE_FILE, or kept in a ring buffer
+of the last TRACE_BUFFER_SIZE traces for GET /admin/traces.
+"""
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, List, Optional, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.query_log import normalize_sql
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# OTLP span kinds and status codes
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_OK, STATUS_ERROR = 1, 2
+
+SERVICE_NAME = "vibesia-api"
+STATEMENT_ATTRIBUTE_CHARS = 2000
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+class Trace:
+    """Spans of one request, collected until the root span ends."""
+
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], kind: int = KIND_INTERNAL):
+        self.trace = trace
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+        self.trace.spans.append(self)  # list.append is atomic; spans end in several threads
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": STATUS_ERROR, "message": self.error} if self.error else {"code": STATUS_OK},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, kind: int = KIND_INTERNAL) -> Optional[Span]:
+    """A child of the current span, or None when the request is not traced."""
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return Span(parent.trace, name, parent.span_id, kind)
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """
+    Runs a function (sync or async) in a child span of the current one.
+    functools.wraps keeps the signature visible, so FastAPI dependencies can be
+    decorated too.
+    """
+    def decorator(func: F) -> F:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                span = start_span(span_name)
+                if span is None:
+                    return await func(*args, **kwargs)
+                token = _current_span.set(span)
+                try:
+                    return await func(*args, **kwargs)
+                except BaseException as e:
+                    span.error = type(e).__name__
+                    raise
+                finally:
+                    _current_span.reset(token)
+                    span.end()
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            span = start_span(span_name)
+            if span is None:
+                return func(*args, **kwargs)
+            token = _current_span.set(span)
+            try:
+                return func(*args, **kwargs)
+            except BaseException as e:
+                span.error = type(e).__name__
+                raise
+            finally:
+                _current_span.reset(token)
+                span.end()
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def trace_methods(cls: type, prefix: Optional[str] = None) -> None:
+    """Wraps the public methods defined on `cls` itself with `traced`."""
+    prefix = prefix or cls.__name__
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith("_") or not inspect.isfunction(value):
+            continue
+        setattr(cls, attr, traced(f"{prefix}.{attr}")(value))
+
+
+def instrument_engine(engine: Engine) -> None:
+    """One client span per SQL statement of a traced request."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = start_span("db.query", KIND_CLIENT)
+        if span is not None:
+            conn.info["trace_span"] = span
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = conn.info.pop("trace_span", None)
+        if span is not None:
+            span.attributes["db.system"] = conn.dialect.name
+            span.attributes["db.statement"] = normalize_sql(statement)[:STATEMENT_ATTRIBUTE_CHARS]
+            if cursor.rowcount >= 0:
+                span.attributes["db.rows"] = cursor.rowcount
+            span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        conn = context.connection
+        span = conn.info.pop("trace_span", None) if conn is not None else None
+        if span is not None:
+            span.attributes["db.statement"] = normalize_sql(context.statement or "")[:STATEMENT_ATTRIBUTE_CHARS]
+            span.error = type(context.original_exception).__name__
+            span.end()
+
+
+# --- exporters ---
+
+def otlp_request(spans: List[Span]) -> Dict[str, Any]:
+    """An OTLP/JSON ExportTraceServiceRequest."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": [span.to_otlp() for span in spans]}],
+        }]
+    }
+
+
+class RingBufferExporter:
+    def __init__(self, size: int):
+        self.traces: Deque[Dict[str, Any]] = deque(maxlen=size)
+
+    def export(self, root: Span, spans: List[Span]) -> None:
+        self.traces.append({
+            "trace_id": root.trace.trace_id,
+            "request_id": root.attributes.get("http.request_id"),
+            "export": otlp_request(spans),
+        })
+
+    def find(self, *, trace_id: Optional[str] = None, request_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        found = []
+        for entry in reversed(list(self.traces)):
+            if trace_id and entry["trace_id"] != trace_id:
+                continue
+            if request_id and entry["request_id"] != request_id:
+                continue
+            found.append(entry)
+            if len(found) >= limit:
+                break
+        return found
+
+
+class FileExporter:
+    """Appends one JSON line per trace from a writer thread; drops traces when it falls behind."""
+
+    def __init__(self, path: str, backlog: int = 1000):
+        self.path = path
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=backlog)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def export(self, root: Span, spans: List[Span]) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._write, name="trace-exporter", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(json.dumps(otlp_request(spans), separators=(",", ":")))
+        except queue.Full:
+            self.dropped += 1
+
+    def _write(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        while True:
+            lines = [self._queue.get()]
+            while len(lines) < 100:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            except OSError as e:
+                logger.warning(f"Could not write traces to {self.path}: {e}")
+
+
+def _exporter():
+    if settings.TRACE_EXPORTER == "file":
+        return FileExporter(settings.TRACE_FILE)
+    return RingBufferExporter(settings.TRACE_BUFFER_SIZE)
+
+
+trace_exporter = _exporter()
+
+
+# --- middleware ---
+
+def _parse_traceparent(value: str) -> Optional[tuple]:
+    """(trace id, parent span id) of a sampled W3C traceparent, else None."""
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or not int(parts[3] or "0", 16) & 1:
+        return None
+    return parts[1], parts[2]
+
+
+class TracingMiddleware:
+    def __init__(self, app: ASGIApp, sample_rate: float = settings.TRACE_SAMPLE_RATE, exporter: Any = None):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.exporter = exporter if exporter is not None else trace_exporter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        parent = None
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                try:
+                    parent = _parse_traceparent(value.decode("latin-1"))
+                except ValueError:
+                    parent = None
+            elif name == b"x-request-id":
+                request_id = value.decode("latin-1")
+        if parent is None and random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(parent[0] if parent else _new_id(16))
+        root = Span(trace, scope["method"], parent[1] if parent else None, KIND_SERVER)
+        root.attributes["http.method"] = scope["method"]
+        root.attributes["http.target"] = scope["path"]
+        if request_id:
+            root.attributes["http.request_id"] = request_id
+        trace_header = (b"x-trace-id", trace.trace_id.encode())
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                if message["status"] >= 500:
+                    root.error = f"HTTP {message['status']}"
+                message["headers"] = list(message.get("headers", [])) + [trace_header]
+            await send(message)
+
+        token = _current_span.set(root)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            root.error = type(e).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                root.attributes["http.route"] = route
+                root.name = f"{scope['method']} {route}"
+            root.end()
+            try:
+                self.exporter.export(root, list(trace.spans))
+            except Exception as e:
+                logger.warning(f"Trace export failed: {e}")
@@ -0,0 +1,273 @@
+"""
+Resumable, content-addressed audio uploads.
+
+An upload is a `<id>.part` file plus a `<id>.json` manifest under
+MEDIA_ROOT/.uploads. Chunks are appended at the current offset straight
+from the request stream, and the SHA-256 is updated as bytes arrive. On
+completion the file is moved to MEDIA_ROOT/audio/<aa>/<bb>/<sha256><ext>;
+when that file already exists the upload is discarded instead, so identical
+audio is stored once however many songs point at it.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, BinaryIO, Dict, Optional, Tuple
+
+import anyio
+
+from app.core.config import settings
+
+AUDIO_EXTENSIONS = {".mp3", ".m4a", ".aac", ".ogg", ".opus", ".flac", ".wav"}
+
+
+class UploadError(Exception):
+    """Base class; the message is safe to show to the client."""
+
+
+class UploadNotFound(UploadError):
+    pass
+
+
+class UploadConflict(UploadError):
+    """The chunk does not start at the current offset, or another request is writing."""
+
+    def __init__(self, message: str, offset: int):
+        super().__init__(message)
+        self.offset = offset
+
+
+@dataclass
+class UploadManifest:
+    upload_id: str
+    song_id: int
+    size: int
+    extension: str
+    created_at: float
+    sha256: Optional[str] = None  # expected digest, if the client declared one
+
+
+@dataclass
+class CompletedUpload:
+    manifest: UploadManifest
+    sha256: str
+    audio_path: str  # relative to MEDIA_ROOT
+    deduplicated: bool
+
+
+class UploadStore:
+    def __init__(self, root: str, *, write_buffer: int = 1024 * 1024):
+        self.root = root
+        self.upload_dir = os.path.join(root, ".uploads")
+        self.write_buffer = write_buffer
+        # upload_id -> (offset, running sha256) for uploads written by this process
+        self._hashers: Dict[str, Tuple[int, "hashlib._Hash"]] = {}
+        self._lock = threading.Lock()
+
+    # --- paths ---
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.upload_dir, f"{upload_id}.part")
+
+    def _manifest_path(self, upload_id: str) -> str:
+        return os.path.join(self.upload_dir, f"{upload_id}.json")
+
+    @staticmethod
+    def content_path(sha256: str, extension: str) -> str:
+        """Path relative to MEDIA_ROOT, which is what Song.audio_path stores."""
+        return os.path.join("audio", sha256[:2], sha256[2:4], f"{sha256}{extension}")
+
+    # --- manifest ---
+
+    def create(self, *, song_id: int, size: int, filename: str, sha256: Optional[str] = None) -> UploadManifest:
+        extension = os.path.splitext(filename)[1].lower()
+        if extension not in AUDIO_EXTENSIONS:
+            raise UploadError(f"Unsupported audio file type '{extension or filename}'")
+        if size <= 0 or size > settings.AUDIO_UPLOAD_MAX_BYTES:
+            raise UploadError(f"Size must be between 1 and {settings.AUDIO_UPLOAD_MAX_BYTES} bytes")
+
+        os.makedirs(self.upload_dir, exist_ok=True)
+        self.purge_expired()
+        manifest = UploadManifest(
+            upload_id=secrets.token_urlsafe(18),
+            song_id=song_id,
+            size=size,
+            extension=extension,
+            created_at=time.time(),
+            sha256=sha256.lower() if sha256 else None,
+        )
+        with open(self._part_path(manifest.upload_id), "xb"):
+            pass
+        tmp_path = self._manifest_path(manifest.upload_id) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(manifest), f)
+        os.replace(tmp_path, self._manifest_path(manifest.upload_id))
+        return manifest
+
+    def get(self, upload_id: str) -> UploadManifest:
+        # Ids are generated by token_urlsafe; anything else cannot name a file here
+        if not upload_id or not all(c.isalnum() or c in "-_" for c in upload_id):
+            raise UploadNotFound("Upload not found")
+        try:
+            with open(self._manifest_path(upload_id)) as f:
+                return UploadManifest(**json.load(f))
+        except FileNotFoundError:
+            raise UploadNotFound("Upload not found")
+
+    def offset(self, upload_id: str) -> int:
+        try:
+            return os.path.getsize(self._part_path(upload_id))
+        except FileNotFoundError:
+            raise UploadNotFound("Upload not found")
+
+    def abort(self, upload_id: str) -> None:
+        self.get(upload_id)
+        self._discard(upload_id)
+
+    def _discard(self, upload_id: str) -> None:
+        with self._lock:
+            self._hashers.pop(upload_id, None)
+        for path in (self._part_path(upload_id), self._manifest_path(upload_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def purge_expired(self) -> int:
+        cutoff = time.time() - settings.AUDIO_UPLOAD_EXPIRE_HOURS * 3600
+        removed = 0
+        for name in os.listdir(self.upload_dir):
+            if not name.endswith(".json"):
+                continue
+            upload_id = name[:-len(".json")]
+            try:
+                if os.path.getmtime(self._part_path(upload_id)) < cutoff:
+                    self._discard(upload_id)
+                    removed += 1
+            except FileNotFoundError:
+                self._discard(upload_id)
+        return removed
+
+    # --- hashing ---
+
+    def _hasher_at(self, upload_id: str, offset: int) -> "hashlib._Hash":
+        """
+        The running digest of the first `offset` bytes. If this process did not
+        write them (restart, another worker) it is rebuilt from the part file once.
+        """
+        with self._lock:
+            state = self._hashers.get(upload_id)
+        if state is not None and state[0] == offset:
+            return state[1]
+        hasher = hashlib.sha256()
+        with open(self._part_path(upload_id), "rb") as f:
+            remaining = offset
+            while remaining:
+                block = f.read(min(remaining, self.write_buffer))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+        return hasher
+
+    # --- writing ---
+
+    def _lock_part(self, f, upload_id: str) -> None:
+        # flock works across worker processes; released when the file is closed
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadConflict("Another request is writing to this upload", self.offset(upload_id))
+
+    def _open_part(self, upload_id: str, offset: int) -> Tuple[UploadManifest, BinaryIO, int]:
+        """
+        The manifest and the locked part file, positioned at its end, which must
+        be `offset`. Blocking; call from a worker thread.
+        """
+        manifest = self.get(upload_id)
+        f = open(self._part_path(upload_id), "r+b", buffering=0)
+        try:
+            self._lock_part(f, upload_id)
+            current = os.fstat(f.fileno()).st_size
+            if offset != current:
+                raise UploadConflict(f"Chunk must start at offset {current}", current)
+            f.seek(current)
+        except BaseException:
+            f.close()
+            raise
+        return manifest, f, current
+
+    async def write_chunk(self, upload_id: str, offset: int, stream: AsyncIterator[bytes]) -> int:
+        """
+        Appends the bytes of `stream` at `offset`, which must equal the current
+        size of the upload. Data is written in write_buffer pieces as it
+        arrives, so memory use does not depend on chunk size. If the stream
+        breaks off, whatever was written stays and the client resumes from the
+        new offset. Returns the new offset.
+        """
+        manifest, f, current = await anyio.to_thread.run_sync(self._open_part, upload_id, offset)
+        try:
+            hasher = await anyio.to_thread.run_sync(self._hasher_at, upload_id, current)
+
+            def flush(data: bytes) -> None:
+                f.write(data)
+                hasher.update(data)
+
+            pending = bytearray()
+            written = current
+            try:
+                async for data in stream:
+                    if written + len(pending) + len(data) > manifest.size:
+                        raise UploadError(f"Upload exceeds its declared size of {manifest.size} bytes")
+                    pending += data
+                    if len(pending) >= self.write_buffer:
+                        await anyio.to_thread.run_sync(flush, bytes(pending))
+                        written += len(pending)
+                        pending.clear()
+            finally:
+                if pending:
+                    await anyio.to_thread.run_sync(flush, bytes(pending))
+                    written += len(pending)
+                with self._lock:
+                    self._hashers[upload_id] = (written, hasher)
+            return written
+        finally:
+            f.close()
+
+    # --- completion ---
+
+    def complete(self, upload_id: str) -> CompletedUpload:
+        """
+        Verifies size and digest and moves the file to its content address,
+        or drops it when that content is already stored. Blocking; call from
+        a worker thread.
+        """
+        manifest = self.get(upload_id)
+        part = self._part_path(upload_id)
+        with open(part, "rb") as f:
+            self._lock_part(f, upload_id)
+            offset = os.fstat(f.fileno()).st_size
+            if offset != manifest.size:
+                raise UploadConflict(f"Upload is incomplete: {offset} of {manifest.size} bytes received", offset)
+
+            digest = self._hasher_at(upload_id, offset).hexdigest()
+            if manifest.sha256 and digest != manifest.sha256:
+                self._discard(upload_id)
+                raise UploadError("SHA-256 of the uploaded data does not match the declared digest; upload discarded")
+
+            audio_path = self.content_path(digest, manifest.extension)
+            target = os.path.join(self.root, audio_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            deduplicated = os.path.exists(target)
+            if not deduplicated:
+                os.fsync(f.fileno())
+                os.replace(part, target)
+        self._discard(upload_id)
+        return CompletedUpload(manifest=manifest, sha256=digest, audio_path=audio_path, deduplicated=deduplicated)
+
+
+upload_store = UploadStore(settings.MEDIA_ROOT)
@@ -1,8 +1,32 @@
+import base64
+import json
 import uuid
+from typing import Any, Tuple
 from fastapi import Request
 
 def generate_request_id() -> str:
     return f"req-{uuid.uuid4().hex[:12]}"
 
 def get_endpoint_path(request: Request) -> str:
-    return f"{request.method} {request.url.path}"
\ No newline at end of file
+    return f"{request.method} {request.url.path}"
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encodes the sort key of the last row of a page into an opaque keyset cursor.
+    """
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> Tuple[Any, ...]:
+    """
+    Decodes a cursor produced by encode_cursor. Raises ValueError when the
+    cursor is malformed or does not carry `size` values.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor: unexpected number of values")
+    return tuple(values)
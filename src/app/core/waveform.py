@@ -0,0 +1,84 @@
+"""
+Binary waveform files (`.peaks`) written by app.jobs.audio_analysis.
+
+Layout, little-endian:
+
+    header  magic "VBPK", version u8, channels u8, reserved u16,
+            sample_rate u32, frames u64, loudness f32 (LUFS, NaN if silent),
+            points u32, source_size u64, source_mtime_ns u64, source_key u32
+    body    `points` (min, max) pairs of int8, peaks scaled to +/-127
+
+Reading needs only struct/array, so the API does not import NumPy.
+"""
+import os
+import struct
+import zlib
+from array import array
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import settings
+
+MAGIC = b"VBPK"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHIQfIQQI")
+
+
+@dataclass
+class WaveformHeader:
+    channels: int
+    sample_rate: int
+    frames: int
+    loudness: float
+    points: int
+    source_size: int
+    source_mtime_ns: int
+    source_key: int
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate if self.sample_rate else 0.0
+
+
+def source_key(audio_path: str) -> int:
+    return zlib.crc32(audio_path.encode())
+
+
+def waveform_path(song_id: int, root: Optional[str] = None) -> str:
+    return os.path.join(root or settings.MEDIA_ROOT, "waveforms", f"{song_id % 1000:03d}", f"{song_id}.peaks")
+
+
+def pack_header(header: WaveformHeader) -> bytes:
+    return HEADER.pack(
+        MAGIC, VERSION, header.channels, 0, header.sample_rate, header.frames, header.loudness,
+        header.points, header.source_size, header.source_mtime_ns, header.source_key,
+    )
+
+
+def read_header(path: str) -> Optional[WaveformHeader]:
+    """The header of a .peaks file, or None if it is missing or not one."""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read(HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(raw) != HEADER.size:
+        return None
+    magic, version, channels, _, rate, frames, loudness, points, size, mtime_ns, key = HEADER.unpack(raw)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return WaveformHeader(channels, rate, frames, loudness, points, size, mtime_ns, key)
+
+
+def read_peaks(path: str) -> Optional[tuple]:
+    """(header, array('b') of interleaved min/max values) or None."""
+    header = read_header(path)
+    if header is None:
+        return None
+    peaks = array("b")
+    with open(path, "rb") as f:
+        f.seek(HEADER.size)
+        peaks.frombytes(f.read(header.points * 2))
+    if len(peaks) != header.points * 2:
+        return None
+    return header, peaks
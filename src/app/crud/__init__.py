@@ -2,4 +2,7 @@ from .base import CRUDBase
 from .crud_user import user
 from .crud_playlist import playlist 
 from .crud_artist import artist
-from .crud_song import song
\ No newline at end of file
+from .crud_song import song
+from .crud_genre import genre
+from .crud_audit_log import audit_log
+from .crud_album import album
@@ -1,24 +1,65 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Sequence, Type, TypeVar, Union
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.declarative import DeclarativeMeta
-from sqlalchemy import inspect
+from sqlalchemy import delete, insert, inspect, select, tuple_, update
+
+from app.core.tracing import trace_methods
 
 ModelType = TypeVar("ModelType", bound=DeclarativeMeta)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+def delete_in_chunks(db: Session, model: Type[Any], *criteria: Any, batch_size: int) -> int:
+    """
+    Deletes the rows of `model` matching `criteria` with repeated
+    DELETE ... WHERE pk IN (SELECT pk ... LIMIT batch_size), so no statement
+    touches more than `batch_size` rows and nothing is loaded into the session.
+    Returns the number of rows deleted.
+    """
+    pk_columns = tuple(inspect(model).primary_key)
+    key = pk_columns[0] if len(pk_columns) == 1 else tuple_(*pk_columns)
+    total = 0
+    while True:
+        chunk = select(*pk_columns).where(*criteria).limit(batch_size)
+        deleted = db.execute(
+            delete(model).where(key.in_(chunk)).execution_options(synchronize_session=False)
+        ).rowcount
+        total += deleted
+        if deleted < batch_size:
+            return total
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    def __init_subclass__(cls, **kwargs: Any):
+        super().__init_subclass__(**kwargs)
+        # Every public CRUD method gets a span when the request is traced
+        trace_methods(cls)
+
     def __init__(self, model: Type[ModelType]):
         self.model = model
-
-    def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        inspector = inspect(self.model)
-        primary_key_columns = inspector.primary_key
+        # Resolved once per model instead of on every get()
+        primary_key_columns = inspect(self.model).primary_key
         if not primary_key_columns:
             raise ValueError(f"No primary key found for model {self.model.__name__}")
-        pk_column = primary_key_columns[0]
-        return db.query(self.model).filter(pk_column == id).first()
+        self.pk_column = primary_key_columns[0]
+        self._single_pk = len(primary_key_columns) == 1
+
+    def get(self, db: Session, id: Any) -> Optional[ModelType]:
+        if self._single_pk:
+            # Session.get answers from the identity map when the row is already loaded
+            return db.get(self.model, id)
+        return db.query(self.model).filter(self.pk_column == id).first()
+
+    def get_many(self, db: Session, ids: Sequence[Any]) -> List[ModelType]:
+        """
+        Fetches several rows in one `IN` query. Results follow the order of
+        `ids`; missing ids are skipped.
+        """
+        if not ids:
+            return []
+        rows = db.scalars(select(self.model).where(self.pk_column.in_(set(ids)))).all()
+        by_id = {getattr(row, self.pk_column.key): row for row in rows}
+        return [by_id[id] for id in dict.fromkeys(ids) if id in by_id]
 
     def get_multi(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[ModelType]:
         return db.query(self.model).offset(skip).limit(limit).all()
@@ -31,6 +72,17 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db.refresh(db_obj)
         return db_obj
 
+    def create_many(self, db: Session, *, objs_in: Sequence[CreateSchemaType]) -> List[ModelType]:
+        """
+        Inserts all objects with a single INSERT ... RETURNING (batched by
+        SQLAlchemy's insertmanyvalues), instead of add/flush/refresh per row.
+        Returned objects are in the order of `objs_in`.
+        """
+        if not objs_in:
+            return []
+        statement = insert(self.model).returning(self.model, sort_by_parameter_order=True)
+        return list(db.scalars(statement, [obj_in.model_dump() for obj_in in objs_in]).all())
+
     def update(
         self,
         db: Session,
@@ -54,8 +106,55 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db.refresh(db_obj)
         return db_obj
 
+    def update_many(
+        self,
+        db: Session,
+        *,
+        ids: Sequence[Any],
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> List[ModelType]:
+        """
+        Applies the same changes to every row in `ids` with one set-based
+        UPDATE ... RETURNING. ORM-level validators and events do not run.
+        """
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+        if not ids:
+            return []
+        if not update_data:
+            return self.get_many(db, ids)
+
+        statement = (
+            update(self.model)
+            .where(self.pk_column.in_(set(ids)))
+            .values(**update_data)
+            .returning(self.model)
+            .execution_options(synchronize_session="fetch")
+        )
+        return list(db.scalars(statement).all())
+
     def remove(self, db: Session, *, id: int) -> Optional[ModelType]:
         obj = self.get(db, id=id)
         if obj is not None:
             db.delete(obj)
-        return obj
\ No newline at end of file
+        return obj
+
+    def remove_many(self, db: Session, *, ids: Sequence[Any]) -> List[Any]:
+        """
+        Deletes every row in `ids` with one DELETE ... RETURNING and returns the
+        ids that existed. ORM cascades are not applied: dependent rows must be
+        handled by the database (ON DELETE) or removed beforehand.
+        """
+        if not ids:
+            return []
+        statement = (
+            delete(self.model)
+            .where(self.pk_column.in_(set(ids)))
+            .returning(self.pk_column)
+            .execution_options(synchronize_session="fetch")
+        )
+        return list(db.scalars(statement).all())
+
+trace_methods(CRUDBase)
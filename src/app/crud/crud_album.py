@@ -0,0 +1,28 @@
+from typing import Dict, Sequence
+from sqlalchemy.orm import Session
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.crud.base import CRUDBase
+from app.crud.crud_song import song as song_crud
+from app.models.Album import Album as AlbumModel
+from app.schemas.album import AlbumCreate, AlbumUpdate
+
+class CRUDAlbum(CRUDBase[AlbumModel, AlbumCreate, AlbumUpdate]):
+    def delete_cascade(
+        self, db: Session, *, ids: Sequence[int], batch_size: int = settings.CASCADE_DELETE_BATCH_SIZE
+    ) -> Dict[str, int]:
+        """
+        Deletes the albums in `ids` with their songs and everything that
+        references them, without loading any of it into the session.
+        """
+        if not ids:
+            return {}
+        ids = list(set(ids))
+        counts = song_crud.delete_by_albums(db, album_ids=ids, batch_size=batch_size)
+        counts["albums"] = db.execute(
+            delete(AlbumModel).where(AlbumModel.album_id.in_(ids)).execution_options(synchronize_session=False)
+        ).rowcount
+        return counts
+
+album = CRUDAlbum(AlbumModel)
@@ -1,7 +1,10 @@
 from sqlalchemy.orm import Session
-from typing import Optional
+from sqlalchemy import delete, select
+from typing import Dict, List, Optional, Sequence
 
+from app.core.config import settings
 from app.crud.base import CRUDBase
+from app.crud.crud_album import album as album_crud
 from app.models.Artist import Artist as ArtistModel
 from app.schemas.artist import ArtistCreate, ArtistUpdate
 
@@ -12,4 +15,37 @@ class CRUDArtist(CRUDBase[ArtistModel, ArtistCreate, ArtistUpdate]):
         """
         return db.query(self.model).filter(self.model.name == name).first()
 
-artist = CRUDArtist(ArtistModel)
\ No newline at end of file
+    def get_by_names(self, db: Session, *, names: Sequence[str]) -> List[ArtistModel]:
+        """
+        Get every artist whose name is in `names` with a single query.
+        """
+        if not names:
+            return []
+        return db.query(self.model).filter(self.model.name.in_(set(names))).all()
+
+    def delete_cascade(
+        self, db: Session, *, id: int, batch_size: int = settings.CASCADE_DELETE_BATCH_SIZE
+    ) -> Dict[str, int]:
+        """
+        Deletes an artist with all of their albums and songs using set-based
+        statements in dependency order, `batch_size` albums/rows at a time.
+        Returns the number of rows removed per table.
+        """
+        totals: Dict[str, int] = {}
+        while True:
+            album_ids = db.scalars(
+                select(album_crud.model.album_id)
+                .where(album_crud.model.artist_id == id)
+                .order_by(album_crud.model.album_id)
+                .limit(batch_size)
+            ).all()
+            if not album_ids:
+                break
+            for table, count in album_crud.delete_cascade(db, ids=album_ids, batch_size=batch_size).items():
+                totals[table] = totals.get(table, 0) + count
+        totals["artists"] = db.execute(
+            delete(self.model).where(self.model.artist_id == id).execution_options(synchronize_session=False)
+        ).rowcount
+        return totals
+
+artist = CRUDArtist(ArtistModel)
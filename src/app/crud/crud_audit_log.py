@@ -0,0 +1,64 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import select, text, tuple_
+from pydantic import BaseModel
+
+from app.crud.base import CRUDBase
+from app.models.audit_log import AuditLog
+
+
+class CRUDAuditLog(CRUDBase[AuditLog, BaseModel, BaseModel]):
+    def get_page(
+        self,
+        db: Session,
+        *,
+        table_name: Optional[str] = None,
+        record_id: Optional[int] = None,
+        app_user_id: Optional[int] = None,
+        action_type: Optional[str] = None,
+        request_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        before: Optional[Tuple[datetime, int]] = None,
+        limit: int = 100,
+        timeout_ms: Optional[int] = None,
+    ) -> Tuple[List[AuditLog], bool]:
+        """
+        Returns one page of audit entries ordered by (timestamp, audit_id)
+        descending, plus a flag telling whether more rows follow.
+
+        `before` is the keyset of the last row of the previous page. Every
+        filter has a matching (filter, timestamp, audit_id) index, so the cost
+        of a page does not grow with the size of the table.
+        """
+        query = select(AuditLog)
+        if table_name is not None:
+            query = query.where(AuditLog.table_name == table_name)
+        if record_id is not None:
+            query = query.where(AuditLog.record_id == record_id)
+        if app_user_id is not None:
+            query = query.where(AuditLog.app_user_id == app_user_id)
+        if action_type is not None:
+            query = query.where(AuditLog.action_type == action_type)
+        if request_id is not None:
+            query = query.where(AuditLog.request_id == request_id)
+        if start is not None:
+            query = query.where(AuditLog.timestamp >= start)
+        if end is not None:
+            query = query.where(AuditLog.timestamp < end)
+        if before is not None:
+            query = query.where(tuple_(AuditLog.timestamp, AuditLog.audit_id) < tuple_(*before))
+
+        query = query.order_by(AuditLog.timestamp.desc(), AuditLog.audit_id.desc()).limit(limit + 1)
+
+        if timeout_ms:
+            # Guard rail for ad-hoc filter combinations no index serves well
+            db.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+
+        logs = list(db.scalars(query).all())
+        has_more = len(logs) > limit
+        return logs[:limit], has_more
+
+
+audit_log = CRUDAuditLog(AuditLog)
@@ -0,0 +1,58 @@
+from typing import List, Any, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+
+from app.crud.base import CRUDBase
+from app.models import Genre, SongGenre, Song, Album, Artist
+from pydantic import BaseModel
+
+
+class CRUDGenre(CRUDBase[Genre, BaseModel, BaseModel]):
+    def get_multi_ordered(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[Genre]:
+        """
+        Lists genres by name. `song_count` is read straight from the row, so
+        no join against song_genres is needed.
+        """
+        return (
+            db.query(self.model)
+            .order_by(self.model.name)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def get_songs_page(
+        self, db: Session, *, genre_id: int, after_song_id: Optional[int] = None, limit: int = 50
+    ) -> Tuple[List[Any], bool]:
+        """
+        Returns one keyset page of the genre's songs ordered by song_id, plus a
+        flag telling whether more rows follow. Served by the
+        (genre_id, song_id) index on song_genres.
+        """
+        query = (
+            select(
+                Song.song_id,
+                Song.title,
+                Song.duration,
+                Song.lyrics,
+                Song.explicit_content,
+                Song.audio_path,
+                Artist.name.label("artist_name"),
+            )
+            .select_from(SongGenre)
+            .join(Song, SongGenre.song_id == Song.song_id)
+            .join(Album, Song.album_id == Album.album_id)
+            .join(Artist, Album.artist_id == Artist.artist_id)
+            .where(SongGenre.genre_id == genre_id)
+            .order_by(SongGenre.song_id)
+            .limit(limit + 1)
+        )
+        if after_song_id is not None:
+            query = query.where(SongGenre.song_id > after_song_id)
+
+        rows = [dict(row._mapping) for row in db.execute(query).all()]
+        has_more = len(rows) > limit
+        return rows[:limit], has_more
+
+
+genre = CRUDGenre(Genre)
@@ -1,13 +1,136 @@
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import text, exc, Integer, Boolean, String
 from sqlalchemy.sql import outparam
 from fastapi import HTTPException, status
 
+from app.core.prepared import PreparedQuery
+from app.core.utils import encode_cursor
 from app.crud.base import CRUDBase
 from app.models.Playlist import Playlist
 from app.schemas.playlist import PlaylistCreate, PlaylistUpdate, PlaylistSongCreate
 
+PLAYLIST_ENTRY_SQL = PreparedQuery("playlist_entry", """
+    SELECT s.song_id, s.title, s.duration, s.lyrics, s.audio_path, ar.name AS artist_name,
+           ps.position, ps.date_added
+    FROM vibesia_schema.playlist_songs ps
+    JOIN vibesia_schema.songs s ON s.song_id = ps.song_id
+    JOIN vibesia_schema.albums a ON s.album_id = a.album_id
+    JOIN vibesia_schema.artists ar ON a.artist_id = ar.artist_id
+    WHERE ps.playlist_id = :playlist_id AND ps.song_id = :song_id
+""")
+
+PLAYLIST_SUMMARIES_SQL = PreparedQuery("playlist_summaries", """
+    SELECT 
+        p.playlist_id,
+        p.user_id,
+        p.name,
+        p.description,
+        p.status,
+        p.created_at,
+        p.updated_at,
+        p.song_count,
+        p.total_duration
+    FROM vibesia_schema.playlists p
+    WHERE p.user_id = :user_id
+    ORDER BY p.created_at DESC
+    OFFSET :skip LIMIT :limit
+""")
+
+PLAYLIST_SONGS_SQL = PreparedQuery("playlist_songs", """
+    SELECT 
+        s.song_id,
+        s.title,
+        s.duration,
+        s.track_number,
+        s.composer,
+        s.audio_path,
+        s.explicit_content,
+        a.title AS album_title,
+        ar.name AS artist_name,
+        ps.position,
+        ps.date_added
+    FROM vibesia_schema.playlist_songs ps
+    JOIN vibesia_schema.songs s ON ps.song_id = s.song_id
+    JOIN vibesia_schema.albums a ON s.album_id = a.album_id
+    JOIN vibesia_schema.artists ar ON a.artist_id = ar.artist_id
+    WHERE ps.playlist_id = :playlist_id
+    ORDER BY ps.position ASC, ps.song_id ASC
+""")
+
+PLAYLIST_SONGS_PAGE_SQL = PreparedQuery("playlist_songs_page", """
+    SELECT 
+        s.song_id,
+        s.title,
+        s.duration,
+        s.track_number,
+        s.composer,
+        s.audio_path,
+        s.explicit_content,
+        s.lyrics,
+        a.title AS album_title,
+        ar.name AS artist_name,
+        ps.position,
+        ps.date_added
+    FROM vibesia_schema.playlist_songs ps
+    JOIN vibesia_schema.songs s ON ps.song_id = s.song_id
+    JOIN vibesia_schema.albums a ON s.album_id = a.album_id
+    JOIN vibesia_schema.artists ar ON a.artist_id = ar.artist_id
+    WHERE ps.playlist_id = :playlist_id
+    ORDER BY ps.position ASC, ps.song_id ASC
+    LIMIT :limit
+""")
+
+PLAYLIST_SONGS_PAGE_AFTER_SQL = PreparedQuery("playlist_songs_page_after", """
+    SELECT 
+        s.song_id,
+        s.title,
+        s.duration,
+        s.track_number,
+        s.composer,
+        s.audio_path,
+        s.explicit_content,
+        s.lyrics,
+        a.title AS album_title,
+        ar.name AS artist_name,
+        ps.position,
+        ps.date_added
+    FROM vibesia_schema.playlist_songs ps
+    JOIN vibesia_schema.songs s ON ps.song_id = s.song_id
+    JOIN vibesia_schema.albums a ON s.album_id = a.album_id
+    JOIN vibesia_schema.artists ar ON a.artist_id = ar.artist_id
+    WHERE ps.playlist_id = :playlist_id
+    AND (ps.position, ps.song_id) > (:after_position, :after_song_id)
+    ORDER BY ps.position ASC, ps.song_id ASC
+    LIMIT :limit
+""")
+
+PLAYLIST_COVER_IMAGES_SQL = PreparedQuery("playlist_cover_images", """
+    SELECT cover_image
+    FROM (
+        SELECT DISTINCT ON (a.album_id) a.cover_image, head.position, head.song_id
+        FROM (
+            SELECT ps.song_id, ps.position
+            FROM vibesia_schema.playlist_songs ps
+            WHERE ps.playlist_id = :playlist_id
+            ORDER BY ps.position, ps.song_id
+            LIMIT :scan
+        ) head
+        JOIN vibesia_schema.songs s ON s.song_id = head.song_id
+        JOIN vibesia_schema.albums a ON a.album_id = s.album_id
+        WHERE a.cover_image IS NOT NULL
+        ORDER BY a.album_id, head.position, head.song_id
+    ) covers
+    ORDER BY position, song_id
+    LIMIT :limit
+""")
+
+PLAYLIST_STATS_SQL = PreparedQuery("playlist_stats", """
+    SELECT song_count, total_duration
+    FROM vibesia_schema.playlists
+    WHERE playlist_id = :playlist_id
+""")
+
 class CRUDPlaylist(CRUDBase[Playlist, PlaylistCreate, PlaylistUpdate]):
 
     def get_by_user(self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100) -> List[Playlist]:
@@ -23,27 +146,8 @@ class CRUDPlaylist(CRUDBase[Playlist, PlaylistCreate, PlaylistUpdate]):
         """
         Obtiene resúmenes de playlists del usuario (sin las canciones completas)
         """
-        result = db.execute(
-            text("""
-                SELECT 
-                    p.playlist_id,
-                    p.user_id,
-                    p.name,
-                    p.description,
-                    p.status,
-                    p.created_at,
-                    p.updated_at,
-                    COALESCE(COUNT(ps.song_id), 0) as song_count,
-                    COALESCE(SUM(s.duration), 0) as total_duration
-                FROM vibesia_schema.playlists p
-                LEFT JOIN vibesia_schema.playlist_songs ps ON p.playlist_id = ps.playlist_id
-                LEFT JOIN vibesia_schema.songs s ON ps.song_id = s.song_id
-                WHERE p.user_id = :user_id
-                GROUP BY p.playlist_id, p.user_id, p.name, p.description, p.status, p.created_at, p.updated_at
-                ORDER BY p.created_at DESC
-                OFFSET :skip LIMIT :limit
-            """),
-            {"user_id": user_id, "skip": skip, "limit": limit}
+        result = PLAYLIST_SUMMARIES_SQL.execute(
+            db, {"user_id": user_id, "skip": skip, "limit": limit}
         ).fetchall()
     
         summaries = []
@@ -73,29 +177,7 @@ class CRUDPlaylist(CRUDBase[Playlist, PlaylistCreate, PlaylistUpdate]):
             return []
 
         try:
-            result = db.execute(
-                text("""
-                    SELECT 
-                        s.song_id,
-                        s.title,
-                        s.duration,
-                        s.track_number,
-                        s.composer,
-                        s.audio_path,
-                        s.explicit_content,
-                        a.title AS album_title,
-                        ar.name AS artist_name,
-                        ps.position,
-                        ps.date_added
-                    FROM vibesia_schema.playlist_songs ps
-                    JOIN vibesia_schema.songs s ON ps.song_id = s.song_id
-                    JOIN vibesia_schema.albums a ON s.album_id = a.album_id
-                    JOIN vibesia_schema.artists ar ON a.artist_id = ar.artist_id
-                    WHERE ps.playlist_id = :playlist_id
-                    ORDER BY ps.position ASC, ps.date_added ASC
-                """),
-                {"playlist_id": playlist_id}
-            ).fetchall()
+            result = PLAYLIST_SONGS_SQL.execute(db, {"playlist_id": playlist_id}).fetchall()
 
             return [dict(row._mapping) for row in result]
 
@@ -105,6 +187,41 @@ class CRUDPlaylist(CRUDBase[Playlist, PlaylistCreate, PlaylistUpdate]):
             return []
 
 
+    def get_songs_page(
+        self, db: Session, *, playlist_id: int, after: Optional[Tuple[int, int]] = None, limit: int = 50
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Returns one keyset page of the playlist's songs ordered by
+        (position, song_id), plus a flag telling whether more rows follow.
+        `after` is the (position, song_id) of the last row of the previous
+        page. Served by the (playlist_id, position, song_id) index, so the cost
+        does not grow with how deep the page is. Ownership is not checked here.
+        """
+        query = PLAYLIST_SONGS_PAGE_AFTER_SQL if after else PLAYLIST_SONGS_PAGE_SQL
+        result = query.execute(
+            db,
+            {
+                "playlist_id": playlist_id,
+                "after_position": after[0] if after else None,
+                "after_song_id": after[1] if after else None,
+                "limit": limit + 1,
+            }
+        ).fetchall()
+
+        rows = [dict(row._mapping) for row in result]
+        has_more = len(rows) > limit
+        return rows[:limit], has_more
+
+    def get_cover_images(self, db: Session, *, playlist_id: int, limit: int = 4, scan: int = 200) -> List[str]:
+        """
+        cover_image of the first `limit` distinct albums in playlist order,
+        looking at no more than the first `scan` entries (index range scan).
+        """
+        result = PLAYLIST_COVER_IMAGES_SQL.execute(
+            db, {"playlist_id": playlist_id, "limit": limit, "scan": scan}
+        ).scalars().all()
+        return list(result)
+
     def get_user_playlist(self, db: Session, *, playlist_id: int, user_id: int) -> Optional[Playlist]:
         return (
             db.query(self.model)
@@ -115,7 +232,9 @@ class CRUDPlaylist(CRUDBase[Playlist, PlaylistCreate, PlaylistUpdate]):
             .first()
         )
     
-    def create_for_user(self, db: Session, *, obj_in: PlaylistCreate, user_id: int) -> Optional[Dict[str, Any]]:
+    def create_for_user(
+        self, db: Session, *, obj_in: PlaylistCreate, user_id: int, delta: bool = False
+    ) -> Optional[Dict[str, Any]]:
         try:
             stmt = text("""
                 SELECT * FROM vibesia_schema.sp_create_playlist(
@@ -147,6 +266,8 @@ class CRUDPlaylist(CRUDBase[Playlist, PlaylistCreate, PlaylistUpdate]):
             new_playlist_id = result.p_playlist_id
             db.commit()
             
+            if delta:
+                return self.get_playlist_delta(db=db, playlist_id=new_playlist_id, user_id=user_id)
             return self.get_playlist_with_songs(db=db, playlist_id=new_playlist_id, user_id=user_id)
 
         except exc.SQLAlchemyError as e:
@@ -157,7 +278,7 @@ class CRUDPlaylist(CRUDBase[Playlist, PlaylistCreate, PlaylistUpdate]):
             raise e
 
     def update_user_playlist(
-        self, db: Session, *, playlist_id: int, user_id: int, obj_in: PlaylistUpdate
+        self, db: Session, *, playlist_id: int, user_id: int, obj_in: PlaylistUpdate, delta: bool = False
     ) -> Optional[Dict[str, Any]]:
         try:
             if not self.get_user_playlist(db=db, playlist_id=playlist_id, user_id=user_id):
@@ -188,6 +309,8 @@ class CRUDPlaylist(CRUDBase[Playlist, PlaylistCreate, PlaylistUpdate]):
             )
 
             db.commit()
+            if delta:
+                return self.get_playlist_delta(db=db, playlist_id=playlist_id, user_id=user_id)
             return self.get_playlist_with_songs(db=db, playlist_id=playlist_id, user_id=user_id)
 
         except exc.SQLAlchemyError as e:
@@ -282,28 +405,29 @@ class CRUDPlaylist(CRUDBase[Playlist, PlaylistCreate, PlaylistUpdate]):
         if not self.get_user_playlist(db=db, playlist_id=playlist_id, user_id=user_id):
             return None
         
-        result = db.execute(
-            text("""
-                SELECT 
-                    COUNT(ps.song_id) as song_count,
-                    COALESCE(SUM(s.duration), 0) as total_duration
-                FROM vibesia_schema.playlist_songs ps
-                LEFT JOIN vibesia_schema.songs s ON ps.song_id = s.song_id
-                WHERE ps.playlist_id = :playlist_id
-            """),
-            {"playlist_id": playlist_id}
-        ).fetchone()
+        result = PLAYLIST_STATS_SQL.execute(db, {"playlist_id": playlist_id}).fetchone()
         
         return dict(result._mapping) if result else None
 
     def get_playlist_with_songs(
-        self, db: Session, *, playlist_id: int, user_id: int
+        self, db: Session, *, playlist_id: int, user_id: int, songs_limit: Optional[int] = None
     ) -> Optional[Dict[str, Any]]:
+        """
+        Playlist with its songs. With `songs_limit`, only the first keyset page
+        is included and `next_songs_cursor` points at the rest
+        (GET /playlists/{id}/songs).
+        """
         playlist_orm = self.get_user_playlist(db=db, playlist_id=playlist_id, user_id=user_id)
         if not playlist_orm:
             return None
         
-        songs = self.get_playlist_songs(db=db, playlist_id=playlist_id, user_id=user_id)
+        next_songs_cursor = None
+        if songs_limit is None:
+            songs = self.get_playlist_songs(db=db, playlist_id=playlist_id, user_id=user_id)
+        else:
+            songs, has_more = self.get_songs_page(db=db, playlist_id=playlist_id, limit=songs_limit)
+            if has_more:
+                next_songs_cursor = encode_cursor(songs[-1]["position"], songs[-1]["song_id"])
         stats = self.get_playlist_stats(db=db, playlist_id=playlist_id, user_id=user_id)
         
         playlist_data = {
@@ -315,12 +439,63 @@ class CRUDPlaylist(CRUDBase[Playlist, PlaylistCreate, PlaylistUpdate]):
             "created_at": playlist_orm.created_at,
             "updated_at": playlist_orm.updated_at,
             "songs": songs,
+            "next_songs_cursor": next_songs_cursor,
             "song_count": stats.get("song_count", 0) if stats else 0,
             "total_duration": stats.get("total_duration", 0) if stats else 0
         }
         
         return playlist_data
 
+    def get_playlist_delta(
+        self, db: Session, *, playlist_id: int, user_id: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Playlist metadata and stats without its songs: one primary-key read,
+        whatever the size of the playlist. The row is re-read even if the
+        session already holds it, since procedures and triggers change the
+        stats behind the ORM's back.
+        """
+        playlist_orm = (
+            db.query(self.model)
+            .filter(self.model.playlist_id == playlist_id, self.model.user_id == user_id)
+            .populate_existing()
+            .first()
+        )
+        if not playlist_orm:
+            return None
+        return {
+            "playlist_id": playlist_orm.playlist_id,
+            "user_id": playlist_orm.user_id,
+            "name": playlist_orm.name,
+            "description": playlist_orm.description,
+            "status": playlist_orm.status,
+            "updated_at": playlist_orm.updated_at,
+            "entry": None,
+            "song_count": playlist_orm.song_count,
+            "total_duration": playlist_orm.total_duration,
+        }
+
+    def add_song_delta(
+        self, db: Session, *, playlist_id: int, song_id: int, user_id: int
+    ) -> Dict[str, Any]:
+        """
+        Appends a song through sp_add_song_to_playlist, like the full
+        representation does, and returns only the new entry and the resulting
+        stats: primary-key reads, whatever the size of the playlist. The
+        triggers have updated the stats by the time the procedure returns.
+        """
+        self.add_song_to_playlist(db=db, playlist_id=playlist_id, song_id=song_id, user_id=user_id)
+
+        delta = self.get_playlist_delta(db=db, playlist_id=playlist_id, user_id=user_id)
+        if delta is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Playlist not found or does not belong to user."
+            )
+        entry = PLAYLIST_ENTRY_SQL.execute(db, {"playlist_id": playlist_id, "song_id": song_id}).first()
+        delta["entry"] = dict(entry._mapping) if entry else None
+        return delta
+
     def count_by_user(self, db: Session, *, user_id: int) -> int:
         return db.query(self.model).filter(self.model.user_id == user_id).count()
 
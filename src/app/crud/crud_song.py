@@ -1,27 +1,35 @@
-from typing import List, Any
+from typing import Dict, List, Any, Sequence
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.sql import Select
 
-from app.crud.base import CRUDBase
-from app.models import Song, Album, Artist
+from app.core.config import settings
+from app.crud.base import CRUDBase, delete_in_chunks
+from app.models import Song, Album, Artist, PlaybackHistory, Playlist, PlaylistSong, SongGenre
 from app.schemas.song import SongCreate, SongUpdate
 
 
 class CRUDSong(CRUDBase[Song, SongCreate, SongUpdate]):
-    def get_multi_with_details(
-        self, db: Session, *, skip: int = 0, limit: int = 100
-    ) -> List[Any]:
-        query = (
+    def _details_query(self) -> Select:
+        return (
             select(
                 Song.song_id,
                 Song.title,
                 Song.duration,
                 Song.lyrics,
                 Song.explicit_content,
+                Song.audio_path,
                 Artist.name.label("artist_name"),
             )
             .join(Album, Song.album_id == Album.album_id)
             .join(Artist, Album.artist_id == Artist.artist_id)
+        )
+
+    def get_multi_with_details(
+        self, db: Session, *, skip: int = 0, limit: int = 100
+    ) -> List[Any]:
+        query = (
+            self._details_query()
             .order_by(Artist.name, Album.title, Song.track_number)
             .offset(skip)
             .limit(limit)
@@ -29,5 +37,89 @@ class CRUDSong(CRUDBase[Song, SongCreate, SongUpdate]):
         result = db.execute(query).all()
         return [dict(row._mapping) for row in result]
 
+    def get_many_with_details(self, db: Session, *, ids: Sequence[int]) -> List[Dict[str, Any]]:
+        """Songs with artist name for `ids` in one query, in the order of `ids`; unknown ids are skipped."""
+        if not ids:
+            return []
+        result = db.execute(self._details_query().where(Song.song_id.in_(set(ids)))).all()
+        by_id = {row.song_id: dict(row._mapping) for row in result}
+        return [by_id[song_id] for song_id in dict.fromkeys(ids) if song_id in by_id]
+
+    def export_statement(self) -> Select:
+        """
+        Full catalog (song + album + artist) in song_id order, for streaming
+        through a server-side cursor.
+        """
+        return (
+            select(
+                Song.song_id,
+                Song.title,
+                Song.duration,
+                Song.track_number,
+                Song.composer,
+                Song.explicit_content,
+                Song.audio_path,
+                Album.album_id,
+                Album.title.label("album_title"),
+                Album.release_year,
+                Album.record_label,
+                Album.album_type,
+                Artist.artist_id,
+                Artist.name.label("artist_name"),
+                Artist.country.label("artist_country"),
+                Artist.artist_type,
+            )
+            .join(Album, Song.album_id == Album.album_id)
+            .join(Artist, Album.artist_id == Artist.artist_id)
+            .order_by(Song.song_id)
+        )
+
+    def delete_cascade(
+        self, db: Session, *, ids: Sequence[int], batch_size: int = settings.CASCADE_DELETE_BATCH_SIZE
+    ) -> Dict[str, int]:
+        """
+        Deletes the songs in `ids` and every row that references them with
+        set-based statements, children first, at most `batch_size` rows each.
+        Playlists that lose songs get their updated_at bumped; genre song
+        counts are kept by the song_genres triggers.
+        """
+        if not ids:
+            return {}
+        ids = list(set(ids))
+        touched = db.execute(
+            update(Playlist)
+            .where(Playlist.playlist_id.in_(
+                select(PlaylistSong.playlist_id).where(PlaylistSong.song_id.in_(ids)).distinct()
+            ))
+            .values(updated_at=func.current_timestamp())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        counts = {
+            "playlists_updated": touched,
+            "playlist_songs": delete_in_chunks(db, PlaylistSong, PlaylistSong.song_id.in_(ids), batch_size=batch_size),
+            "playback_history": delete_in_chunks(db, PlaybackHistory, PlaybackHistory.song_id.in_(ids), batch_size=batch_size),
+            "song_genres": delete_in_chunks(db, SongGenre, SongGenre.song_id.in_(ids), batch_size=batch_size),
+        }
+        counts["songs"] = db.execute(
+            delete(Song).where(Song.song_id.in_(ids)).execution_options(synchronize_session=False)
+        ).rowcount
+        return counts
+
+    def delete_by_albums(
+        self, db: Session, *, album_ids: Sequence[int], batch_size: int = settings.CASCADE_DELETE_BATCH_SIZE
+    ) -> Dict[str, int]:
+        """
+        Deletes every song of `album_ids`, `batch_size` songs at a time.
+        """
+        totals: Dict[str, int] = {}
+        while True:
+            song_ids = db.scalars(
+                select(Song.song_id).where(Song.album_id.in_(album_ids)).order_by(Song.song_id).limit(batch_size)
+            ).all()
+            if not song_ids:
+                return totals
+            for table, count in self.delete_cascade(db, ids=song_ids, batch_size=batch_size).items():
+                totals[table] = totals.get(table, 0) + count
+
 
 song = CRUDSong(Song)
\ No newline at end of file
@@ -1,6 +1,6 @@
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, select, update, func
 from fastapi import HTTPException
 from datetime import datetime
 
@@ -69,6 +69,8 @@ class CRUDUser(CRUDBase[UserModel, UserCreate, UserUpdate]):
         user = db.query(self.model).filter(self.model.user_id == user_id).first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
+        if user.deletion_requested_at is not None:
+            raise HTTPException(status_code=409, detail="User is pending deletion")
             
         user.is_active = True
         db.add(user)
@@ -81,9 +83,35 @@ class CRUDUser(CRUDBase[UserModel, UserCreate, UserUpdate]):
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        self.remove(db=db, id=user_id)
+        db.delete(user)
+        db.flush()
         return True
 
+    def mark_pending_deletion(self, db: Session, *, user_id: int) -> Optional[datetime]:
+        """
+        Deactivates the account and stamps deletion_requested_at in a single UPDATE.
+        The rows themselves are removed later by app.jobs.user_deletion.
+        Returns the stamp, or None if the user does not exist.
+        """
+        stmt = (
+            update(UserModel)
+            .where(UserModel.user_id == user_id)
+            .values(
+                is_active=False,
+                deletion_requested_at=func.coalesce(UserModel.deletion_requested_at, func.now()),
+            )
+            .returning(UserModel.deletion_requested_at)
+            .execution_options(synchronize_session="fetch")
+        )
+        return db.execute(stmt).scalar_one_or_none()
+
+    def get_pending_deletion_ids(self, db: Session) -> List[int]:
+        return list(db.scalars(
+            select(UserModel.user_id)
+            .where(UserModel.deletion_requested_at.is_not(None))
+            .order_by(UserModel.deletion_requested_at)
+        ))
+
     def get_multi_paginated(self, db: Session, *, page: int = 1, per_page: int = 10, search: Optional[str] = None) -> Dict[str, Any]:
         skip = (page - 1) * per_page
         query = db.query(self.model)
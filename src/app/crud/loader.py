@@ -0,0 +1,102 @@
+"""
+Request-scoped batching of primary-key lookups (the DataLoader pattern).
+
+`load(id)` only queues the id and returns a handle. The first handle whose
+result() is read fetches every id queued on that loader with one `IN` query,
+and results are memoized for the rest of the request. Serializing N rows that
+reference an artist therefore costs one query instead of N, as long as the
+references are queued before the first one is read; `Loaders.attach` does
+exactly that for a relationship, so nested response models never lazy-load.
+"""
+from typing import Any, Callable, Dict, Generic, Hashable, Iterable, List, Optional, Sequence, TypeVar
+
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.crud.base import CRUDBase
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class Pending(Generic[K, V]):
+    __slots__ = ("_loader", "key")
+
+    def __init__(self, loader: "BatchLoader[K, V]", key: K):
+        self._loader = loader
+        self.key = key
+
+    def result(self) -> Optional[V]:
+        return self._loader._resolve(self.key)
+
+
+class BatchLoader(Generic[K, V]):
+    def __init__(self, fetch: Callable[[List[K]], Dict[K, V]]):
+        self._fetch = fetch
+        self._cache: Dict[K, Optional[V]] = {}
+        self._queue: Dict[K, None] = {}  # insertion-ordered set
+        self.queries = 0
+
+    def load(self, key: K) -> Pending[K, V]:
+        if key not in self._cache:
+            self._queue[key] = None
+        return Pending(self, key)
+
+    def load_many(self, keys: Iterable[K]) -> List[Pending[K, V]]:
+        return [self.load(key) for key in keys]
+
+    def get(self, key: K) -> Optional[V]:
+        return self.load(key).result()
+
+    def get_many(self, keys: Sequence[K]) -> List[Optional[V]]:
+        return [pending.result() for pending in self.load_many(keys)]
+
+    def prime(self, key: K, value: V) -> None:
+        """Records a row the request already has, so it is never fetched."""
+        self._cache[key] = value
+        self._queue.pop(key, None)
+
+    def dispatch(self) -> None:
+        if not self._queue:
+            return
+        keys = list(self._queue)
+        self._queue.clear()
+        found = self._fetch(keys)
+        self.queries += 1
+        for key in keys:
+            self._cache[key] = found.get(key)
+
+    def _resolve(self, key: K) -> Optional[V]:
+        if key not in self._cache:
+            self._queue.setdefault(key, None)
+            self.dispatch()
+        return self._cache[key]
+
+
+class Loaders:
+    """One BatchLoader per CRUD object, sharing the request's session."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._loaders: Dict[int, BatchLoader] = {}
+
+    def __getitem__(self, crud: CRUDBase) -> BatchLoader:
+        loader = self._loaders.get(id(crud))
+        if loader is None:
+            pk = crud.pk_column.key
+
+            def fetch(ids: List[Any]) -> Dict[Any, Any]:
+                return {getattr(row, pk): row for row in crud.get_many(self.db, ids)}
+
+            loader = self._loaders[id(crud)] = BatchLoader(fetch)
+        return loader
+
+    def attach(self, objects: Sequence[Any], relationship: str, crud: CRUDBase, foreign_key: str) -> None:
+        """
+        Fills `relationship` on every object from one batched lookup of
+        `foreign_key`, without marking the objects as changed.
+        """
+        loader = self[crud]
+        pending = [loader.load(getattr(obj, foreign_key)) for obj in objects]
+        for obj, handle in zip(objects, pending):
+            set_committed_value(obj, relationship, handle.result())
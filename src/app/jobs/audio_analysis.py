@@ -0,0 +1,410 @@
+"""
+Offline analysis of stored song audio: duration, waveform peaks and
+integrated loudness.
+
+Every song whose audio_path is a WAV file (PCM 8/16/24/32-bit or IEEE
+float) is decoded from a memory map in blocks of a few seconds and reduced
+with NumPy, one file per worker process. The result is written to
+MEDIA_ROOT/waveforms as a `.peaks` file (see app.core.waveform), which also
+records the size, mtime and path of its source; files whose source has not
+changed are skipped, so runs are incremental. Measured durations are written
+back to `songs.duration`.
+
+    python -m app.jobs.audio_analysis [--song-id ID] [--workers N] [--points N] [--force] [--no-durations]
+
+Loudness follows ITU-R BS.1770 (K-weighting, 400 ms blocks with 75% overlap,
+absolute and relative gating). The K-weighting filter is applied through its
+magnitude response on each 100 ms block (Parseval) rather than as an IIR
+filter, which keeps the computation vectorized; results agree with the
+time-domain filter to within 0.1 LU.
+"""
+import argparse
+import logging
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.audit import apply_audit_context, build_audit_context
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.media import resolve_media_path
+from app.core.waveform import WaveformHeader, pack_header, read_header, source_key, waveform_path
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = "vibesia_schema"
+
+SONGS_SQL = f"""
+    SELECT song_id, audio_path, duration FROM {SCHEMA}.songs
+    WHERE (CAST(:song_id AS integer) IS NULL OR song_id = :song_id)
+    ORDER BY song_id
+"""
+
+UPDATE_DURATION_SQL = f"""
+    UPDATE {SCHEMA}.songs SET duration = :duration
+    WHERE song_id = :song_id AND duration IS DISTINCT FROM :duration
+"""
+
+WAV_EXTENSIONS = {".wav", ".wave"}
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Seconds of audio decoded at a time; bounds worker memory for any file length
+BLOCK_SECONDS = 10
+
+# BS.1770 channel weights for L, R, C, LFE (excluded), Ls, Rs
+CHANNEL_WEIGHTS = (1.0, 1.0, 1.0, 0.0, 1.41, 1.41)
+
+
+class UnsupportedAudio(Exception):
+    pass
+
+
+@dataclass
+class AnalysisTask:
+    song_id: int
+    audio_path: str
+    source: str
+    target: str
+    size: int
+    mtime_ns: int
+    points: int
+
+
+@dataclass
+class AnalysisResult:
+    song_id: int
+    duration: float = 0.0
+    loudness: Optional[float] = None
+    error: Optional[str] = None
+
+
+# --- decoding ---
+
+@dataclass
+class WavInfo:
+    format_tag: int
+    channels: int
+    sample_rate: int
+    bits: int
+    block_align: int
+    data_offset: int
+    data_size: int
+
+    @property
+    def frames(self) -> int:
+        return self.data_size // self.block_align
+
+
+def read_wav_info(path: str) -> WavInfo:
+    """Walks the RIFF chunks up to `data`; only the fmt and data chunks are used."""
+    file_size = os.path.getsize(path)
+    fmt = None
+    with open(path, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise UnsupportedAudio("not a RIFF/WAVE file")
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise UnsupportedAudio("no data chunk")
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                body = f.read(chunk_size)
+                format_tag, channels, rate, _, block_align, bits = struct.unpack("<HHIIHH", body[:16])
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    format_tag = struct.unpack("<H", body[24:26])[0]  # first bytes of the SubFormat GUID
+                fmt = (format_tag, channels, rate, bits, block_align)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise UnsupportedAudio("data chunk before fmt chunk")
+                offset = f.tell()
+                # Streamed writers leave the size at 0 or 0xFFFFFFFF; trust the file
+                size = min(chunk_size, file_size - offset) if chunk_size else file_size - offset
+                format_tag, channels, rate, bits, block_align = fmt
+                break
+            else:
+                f.seek(chunk_size, os.SEEK_CUR)
+            if chunk_size % 2:
+                f.seek(1, os.SEEK_CUR)  # chunks are word aligned
+
+    if format_tag == WAVE_FORMAT_PCM and bits not in (8, 16, 24, 32):
+        raise UnsupportedAudio(f"{bits}-bit PCM")
+    if format_tag == WAVE_FORMAT_IEEE_FLOAT and bits not in (32, 64):
+        raise UnsupportedAudio(f"{bits}-bit float")
+    if format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+        raise UnsupportedAudio(f"WAVE format 0x{format_tag:04x}")
+    if not channels or not rate or block_align != channels * bits // 8:
+        raise UnsupportedAudio("inconsistent fmt chunk")
+    return WavInfo(format_tag, channels, rate, bits, block_align, offset, size)
+
+
+def decode(raw: np.ndarray, info: WavInfo) -> np.ndarray:
+    """Little-endian sample bytes -> float32 array of shape (frames, channels) in [-1, 1]."""
+    if info.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        samples = raw.view("<f4" if info.bits == 32 else "<f8").astype(np.float32)
+    elif info.bits == 8:
+        samples = (raw.astype(np.float32) - 128.0) / 128.0
+    elif info.bits == 16:
+        samples = raw.view("<i2").astype(np.float32) / 32768.0
+    elif info.bits == 24:
+        triplets = raw.reshape(-1, 3).astype(np.int32)
+        values = triplets[:, 0] | (triplets[:, 1] << 8) | (triplets[:, 2] << 16)
+        samples = ((values << 8) >> 8).astype(np.float32) / 8388608.0  # sign-extend
+    else:
+        samples = raw.view("<i4").astype(np.float32) / 2147483648.0
+    return samples.reshape(-1, info.channels)
+
+
+# --- loudness ---
+
+def _biquad_power(b: Tuple[float, float, float], a: Tuple[float, float, float], w: np.ndarray) -> np.ndarray:
+    z = np.exp(-1j * w)
+    return np.abs((b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)) ** 2
+
+
+def k_weighting_power(sample_rate: int, n: int) -> np.ndarray:
+    """
+    |H(f)|^2 of the BS.1770 K-weighting filter at the rfft bins of an n-point
+    block. The two biquads are designed for `sample_rate` so that at 48 kHz
+    they reproduce the coefficients tabulated in the standard.
+    """
+    w = 2 * np.pi * np.fft.rfftfreq(n, 1.0 / sample_rate) / sample_rate
+
+    # Stage 1: high shelf, about +4 dB above 1.7 kHz (head diffraction)
+    k = np.tan(np.pi * 1681.974450955533 / sample_rate)
+    q = 0.7071752369554196
+    vh = 10 ** (3.999843853973347 / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf_b = ((vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0)
+    shelf_a = (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+
+    # Stage 2: high pass at 38 Hz (RLB weighting)
+    k = np.tan(np.pi * 38.13547087602444 / sample_rate)
+    q = 0.5003270373238773
+    a0 = 1 + k / q + k * k
+    pass_b = (1.0, -2.0, 1.0)
+    pass_a = (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+
+    return _biquad_power(shelf_b, shelf_a, w) * _biquad_power(pass_b, pass_a, w)
+
+
+def integrated_loudness(mean_squares: np.ndarray, channels: int) -> Optional[float]:
+    """
+    BS.1770 gated loudness from K-weighted mean squares of consecutive 100 ms
+    sub-blocks, shape (n, channels). None when every block is gated out.
+    """
+    if len(mean_squares) < 4:
+        return None
+    weights = np.array([CHANNEL_WEIGHTS[c] if c < len(CHANNEL_WEIGHTS) else 1.0 for c in range(channels)])
+    # 400 ms blocks overlapping by 75% are four consecutive sub-blocks
+    blocks = (mean_squares[:-3] + mean_squares[1:-2] + mean_squares[2:-1] + mean_squares[3:]) / 4
+    power = blocks @ weights
+    with np.errstate(divide="ignore"):
+        block_loudness = -0.691 + 10 * np.log10(power)
+
+    gated = blocks[block_loudness > -70.0]
+    if not len(gated):
+        return None
+    relative_gate = -0.691 + 10 * np.log10(gated.mean(axis=0) @ weights) - 10.0
+    gated = blocks[(block_loudness > -70.0) & (block_loudness > relative_gate)]
+    if not len(gated):
+        return None
+    return float(-0.691 + 10 * np.log10(gated.mean(axis=0) @ weights))
+
+
+# --- analysis (runs in worker processes) ---
+
+def analyze_wav(path: str, points: int) -> Tuple[WavInfo, np.ndarray, Optional[float]]:
+    """Returns the WAV info, int8 (min, max) peak pairs and integrated loudness."""
+    info = read_wav_info(path)
+    frames = info.frames
+    if frames == 0:
+        raise UnsupportedAudio("no audio frames")
+    points = min(points, frames)
+
+    # Bucket b covers frames [edges[b], edges[b + 1])
+    edges = np.arange(points + 1, dtype=np.int64) * frames // points
+    lows = np.full(points, np.inf, dtype=np.float32)
+    highs = np.full(points, -np.inf, dtype=np.float32)
+
+    sub_block = int(round(info.sample_rate * 0.1))
+    power_weights = k_weighting_power(info.sample_rate, sub_block)
+    # Parseval for a real FFT: interior bins stand for two conjugate bins
+    power_weights[1:(sub_block + 1) // 2] *= 2
+    power_weights /= sub_block * sub_block
+    mean_squares: List[np.ndarray] = []
+
+    data = np.memmap(path, dtype=np.uint8, mode="r", offset=info.data_offset, shape=(frames * info.block_align,))
+    step = BLOCK_SECONDS * 10 * sub_block
+    for start in range(0, frames, step):
+        end = min(start + step, frames)
+        samples = decode(data[start * info.block_align:end * info.block_align], info)
+
+        # Peaks of the mixdown envelope: lowest and highest sample over all channels
+        first = int(np.searchsorted(edges, start, side="right")) - 1
+        last = int(np.searchsorted(edges, end, side="left"))
+        offsets = np.maximum(edges[first:last], start) - start
+        # (reducing along time first; a per-frame min over channels is far slower)
+        lows[first:last] = np.minimum(lows[first:last], np.minimum.reduceat(samples, offsets, axis=0).min(axis=1))
+        highs[first:last] = np.maximum(highs[first:last], np.maximum.reduceat(samples, offsets, axis=0).max(axis=1))
+
+        # K-weighted mean square of each complete 100 ms sub-block, per channel
+        whole = (end - start) // sub_block
+        if whole:
+            spectra = np.fft.rfft(samples[:whole * sub_block].reshape(whole, sub_block, info.channels), axis=1)
+            power = spectra.real ** 2 + spectra.imag ** 2
+            mean_squares.append(np.einsum("bkc,k->bc", power, power_weights))
+    del data
+
+    peaks = np.empty(points * 2, dtype=np.int8)
+    peaks[0::2] = np.round(np.clip(lows, -1.0, 1.0) * 127)
+    peaks[1::2] = np.round(np.clip(highs, -1.0, 1.0) * 127)
+    loudness = integrated_loudness(np.concatenate(mean_squares), info.channels) if mean_squares else None
+    return info, peaks, loudness
+
+
+def analyze(task: AnalysisTask) -> AnalysisResult:
+    try:
+        info, peaks, loudness = analyze_wav(task.source, task.points)
+    except (UnsupportedAudio, struct.error, ValueError, OSError) as e:
+        return AnalysisResult(song_id=task.song_id, error=f"{type(e).__name__}: {e}")
+
+    header = WaveformHeader(
+        channels=info.channels,
+        sample_rate=info.sample_rate,
+        frames=info.frames,
+        loudness=float("nan") if loudness is None else loudness,
+        points=len(peaks) // 2,
+        source_size=task.size,
+        source_mtime_ns=task.mtime_ns,
+        source_key=source_key(task.audio_path),
+    )
+    os.makedirs(os.path.dirname(task.target), exist_ok=True)
+    tmp_path = f"{task.target}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(pack_header(header))
+        f.write(peaks.tobytes())
+    os.replace(tmp_path, task.target)
+    return AnalysisResult(song_id=task.song_id, duration=header.duration, loudness=loudness)
+
+
+# --- driver ---
+
+def plan(*, song_id: Optional[int], points: int, force: bool) -> Tuple[List[AnalysisTask], dict]:
+    """Tasks for every song whose waveform is missing or out of date."""
+    counts = {"songs": 0, "unchanged": 0, "missing": 0, "unsupported": 0}
+    tasks = []
+    db = SessionLocal()
+    try:
+        rows = db.execute(text(SONGS_SQL), {"song_id": song_id}).all()
+    finally:
+        db.close()
+
+    for row in rows:
+        counts["songs"] += 1
+        if os.path.splitext(row.audio_path)[1].lower() not in WAV_EXTENSIONS:
+            counts["unsupported"] += 1
+            continue
+        try:
+            source = resolve_media_path(row.audio_path)
+            st = os.stat(source)
+        except (FileNotFoundError, NotADirectoryError):
+            counts["missing"] += 1
+            continue
+        target = waveform_path(row.song_id)
+        if not force:
+            header = read_header(target)
+            if header is not None and header.points == min(points, header.frames) and (
+                header.source_size, header.source_mtime_ns, header.source_key
+            ) == (st.st_size, st.st_mtime_ns, source_key(row.audio_path)):
+                counts["unchanged"] += 1
+                continue
+        tasks.append(AnalysisTask(row.song_id, row.audio_path, source, target, st.st_size, st.st_mtime_ns, points))
+    return tasks, counts
+
+
+def save_durations(results: List[AnalysisResult]) -> int:
+    params = [{"song_id": r.song_id, "duration": max(1, round(r.duration))} for r in results]
+    if not params:
+        return 0
+    db = SessionLocal()
+    try:
+        apply_audit_context(db, build_audit_context(api_endpoint=__name__))
+        updated = db.execute(text(UPDATE_DURATION_SQL), params).rowcount
+        db.commit()
+        return updated
+    finally:
+        db.close()
+
+
+def run(
+    *,
+    song_id: Optional[int] = None,
+    workers: int = settings.AUDIO_ANALYSIS_WORKERS,
+    points: int = settings.WAVEFORM_POINTS,
+    force: bool = False,
+    update_durations: bool = True,
+) -> dict:
+    started = time.monotonic()
+    tasks, counts = plan(song_id=song_id, points=points, force=force)
+    logger.info(
+        f"{counts['songs']} song(s): {len(tasks)} to analyze, {counts['unchanged']} unchanged, "
+        f"{counts['unsupported']} not WAV, {counts['missing']} without a file."
+    )
+
+    analyzed, failed = [], 0
+    if tasks:
+        # Largest files first, so one long track does not finish last on its own
+        tasks.sort(key=lambda t: t.size, reverse=True)
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            futures = [pool.submit(analyze, task) for task in tasks]
+            for future in as_completed(futures):
+                result = future.result()
+                if result.error:
+                    failed += 1
+                    logger.warning(f"Song {result.song_id}: {result.error}")
+                else:
+                    analyzed.append(result)
+
+    counts.update(analyzed=len(analyzed), failed=failed)
+    if update_durations:
+        counts["durations_updated"] = save_durations(analyzed)
+    logger.info(f"Audio analysis finished in {time.monotonic() - started:.1f} s: {counts}")
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compute song durations, waveform peaks and loudness.")
+    parser.add_argument("--song-id", type=int, help="Only analyze this song.")
+    parser.add_argument("--workers", type=int, default=settings.AUDIO_ANALYSIS_WORKERS,
+                        help="Worker processes (default: one per CPU).")
+    parser.add_argument("--points", type=int, default=settings.WAVEFORM_POINTS,
+                        help="Waveform points per song.")
+    parser.add_argument("--force", action="store_true", help="Re-analyze files that have not changed.")
+    parser.add_argument("--no-durations", action="store_true", help="Do not write durations back to songs.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    counts = run(
+        song_id=args.song_id,
+        workers=args.workers,
+        points=args.points,
+        force=args.force,
+        update_durations=not args.no_durations,
+    )
+    if counts["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
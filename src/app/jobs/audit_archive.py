@@ -0,0 +1,167 @@
+"""
+Audit log partition maintenance.
+
+Creates the upcoming monthly partitions of `audit_log`, archives every closed
+partition older than AUDIT_LOG_RETENTION_MONTHS to a gzip-compressed NDJSON
+file and detaches it from the table.
+
+    python -m app.jobs.audit_archive [--dry-run] [--drop]
+"""
+import argparse
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.streaming import coalesce, gzip_chunks, ndjson_lines, stream_rows
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = "vibesia_schema"
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+@dataclass
+class Partition:
+    name: str
+    upper: Optional[datetime]  # None for the DEFAULT partition
+
+
+def _qualified(name: str) -> str:
+    return f'{SCHEMA}."{name.replace(chr(34), chr(34) * 2)}"'
+
+
+def _months_before(moment: datetime, months: int) -> datetime:
+    index = moment.year * 12 + (moment.month - 1) - months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def ensure_partitions(months_ahead: int = settings.AUDIT_LOG_PARTITIONS_AHEAD) -> int:
+    db = SessionLocal()
+    try:
+        created = db.execute(
+            text(f"SELECT {SCHEMA}.fn_audit_log_ensure_partitions(:n)"), {"n": months_ahead}
+        ).scalar()
+        db.commit()
+        return created or 0
+    finally:
+        db.close()
+
+
+def list_partitions() -> List[Partition]:
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            text(f"""
+                SELECT c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bound
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = '{SCHEMA}.audit_log'::regclass
+            """)
+        ).fetchall()
+    finally:
+        db.close()
+
+    partitions = []
+    for row in rows:
+        match = _UPPER_BOUND.search(row.bound)
+        upper = datetime.fromisoformat(match.group(1)) if match else None
+        partitions.append(Partition(name=row.name, upper=upper))
+    return sorted(partitions, key=lambda p: p.upper or datetime.max)
+
+
+def database_now() -> datetime:
+    """now() in the session time zone, the clock the partition bounds were computed with."""
+    db = SessionLocal()
+    try:
+        return db.execute(text("SELECT now()::timestamp")).scalar()
+    finally:
+        db.close()
+
+
+def closed_partitions(now: Optional[datetime] = None) -> List[Partition]:
+    """Partitions whose whole range ends before the retention window."""
+    cutoff = _months_before(now or database_now(), settings.AUDIT_LOG_RETENTION_MONTHS)
+    return [p for p in list_partitions() if p.upper is not None and p.upper <= cutoff]
+
+
+def archive_partition(partition: Partition, archive_dir: str = settings.AUDIT_ARCHIVE_DIR) -> str:
+    """
+    Streams one partition to `<archive_dir>/<partition>.ndjson.gz` through a
+    server-side cursor. The file is written under a temporary name and only
+    renamed once complete, so an existing archive is always whole.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{partition.name}.ndjson.gz")
+    if os.path.exists(path):
+        logger.info(f"{path} already exists; skipping export of {partition.name}.")
+        return path
+
+    rows = stream_rows(text(f'SELECT * FROM {_qualified(partition.name)} ORDER BY "timestamp", audit_id'))
+    tmp_path = path + ".part"
+    count = 0
+
+    def counted(source):
+        nonlocal count
+        for row in source:
+            count += 1
+            yield row
+
+    with open(tmp_path, "wb") as f:
+        for chunk in gzip_chunks(coalesce(ndjson_lines(counted(rows)))):
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    logger.info(f"Archived {count} rows of {partition.name} to {path}.")
+    return path
+
+
+def detach_partition(partition: Partition, *, drop: bool = False) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(text(f"ALTER TABLE {SCHEMA}.audit_log DETACH PARTITION {_qualified(partition.name)}"))
+        if drop:
+            db.execute(text(f"DROP TABLE {_qualified(partition.name)}"))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    logger.info(f"{'Dropped' if drop else 'Detached'} partition {partition.name}.")
+
+
+def run(*, dry_run: bool = False, drop: bool = False) -> List[str]:
+    if not dry_run:
+        created = ensure_partitions()
+        logger.info(f"Created {created} upcoming audit_log partition(s).")
+
+    archived = []
+    for partition in closed_partitions():
+        if dry_run:
+            logger.info(f"[dry-run] Would archive and detach {partition.name} (< {partition.upper}).")
+            continue
+        archived.append(archive_partition(partition))
+        detach_partition(partition, drop=drop)
+    return archived
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive and detach closed audit_log partitions.")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the partitions that would be archived.")
+    parser.add_argument("--drop", action="store_true", help="Drop partitions after detaching them.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    run(dry_run=args.dry_run, drop=args.drop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Bulk catalog import (artists, albums and songs) from CSV or NDJSON.
+
+Rows are validated in batches with the API schemas, COPY'd into a temporary
+staging table and merged into the catalog with three set-based INSERTs, each
+batch inside its own savepoint. A batch the database rejects is split in
+halves and retried down to single rows, so only the offending rows are
+reported and the rest of the batch is still imported.
+
+    python -m app.jobs.catalog_import catalog.csv [--format csv|ndjson] [--batch-size 5000]
+
+Expected columns: artist_name, artist_type, artist_country,
+artist_formation_year, album_title, album_type, release_year, record_label,
+cover_image, song_title, duration, track_number, composer, lyrics,
+audio_path, explicit_content.
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import logging
+import time
+from typing import Any, IO, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.schemas.catalog_import import CatalogImportRow, ImportReport, ImportRowError
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "ndjson")
+
+STAGE_COLUMNS = [
+    "row_number", "artist_name", "artist_type", "artist_country", "artist_formation_year",
+    "album_title", "album_type", "release_year", "record_label", "cover_image",
+    "song_title", "duration", "track_number", "composer", "lyrics", "audio_path",
+    "explicit_content",
+]
+
+CREATE_STAGE_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS catalog_import_stage (
+        row_number integer NOT NULL,
+        artist_name varchar(100) NOT NULL,
+        artist_type varchar(30) NOT NULL,
+        artist_country varchar(50),
+        artist_formation_year integer,
+        album_title varchar(150) NOT NULL,
+        album_type varchar(30) NOT NULL,
+        release_year integer,
+        record_label varchar(100),
+        cover_image varchar(255),
+        song_title varchar(150) NOT NULL,
+        duration integer NOT NULL,
+        track_number integer,
+        composer varchar(100),
+        lyrics text,
+        audio_path varchar(255) NOT NULL,
+        explicit_content boolean NOT NULL
+    ) ON COMMIT DROP
+"""
+
+# The three merge steps only ever look rows up by set: one join per batch
+# instead of one get_by_name() per artist. Artist and album names are not
+# unique, so an existing match resolves to its lowest id.
+MERGE_ARTISTS_SQL = """
+    INSERT INTO vibesia_schema.artists (name, artist_type, country, formation_year)
+    SELECT DISTINCT ON (s.artist_name)
+        s.artist_name, s.artist_type, s.artist_country, s.artist_formation_year
+    FROM catalog_import_stage s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM vibesia_schema.artists a WHERE a.name = s.artist_name
+    )
+    ORDER BY s.artist_name, s.row_number
+"""
+
+MERGE_ALBUMS_SQL = """
+    WITH artist_ids AS (
+        SELECT a.name, MIN(a.artist_id) AS artist_id
+        FROM vibesia_schema.artists a
+        WHERE a.name IN (SELECT DISTINCT artist_name FROM catalog_import_stage)
+        GROUP BY a.name
+    )
+    INSERT INTO vibesia_schema.albums (artist_id, title, release_year, record_label, album_type, cover_image)
+    SELECT DISTINCT ON (ai.artist_id, s.album_title)
+        ai.artist_id, s.album_title, s.release_year, s.record_label, s.album_type, s.cover_image
+    FROM catalog_import_stage s
+    JOIN artist_ids ai ON ai.name = s.artist_name
+    WHERE NOT EXISTS (
+        SELECT 1 FROM vibesia_schema.albums al
+        WHERE al.artist_id = ai.artist_id AND al.title = s.album_title
+    )
+    ORDER BY ai.artist_id, s.album_title, s.row_number
+"""
+
+MERGE_SONGS_SQL = """
+    WITH artist_ids AS (
+        SELECT a.name, MIN(a.artist_id) AS artist_id
+        FROM vibesia_schema.artists a
+        WHERE a.name IN (SELECT DISTINCT artist_name FROM catalog_import_stage)
+        GROUP BY a.name
+    ),
+    album_ids AS (
+        SELECT al.artist_id, al.title, MIN(al.album_id) AS album_id
+        FROM vibesia_schema.albums al
+        WHERE al.artist_id IN (SELECT artist_id FROM artist_ids)
+        GROUP BY al.artist_id, al.title
+    )
+    INSERT INTO vibesia_schema.songs (
+        album_id, title, duration, track_number, composer, lyrics, audio_path, explicit_content
+    )
+    SELECT DISTINCT ON (bi.album_id, s.song_title)
+        bi.album_id, s.song_title, s.duration, s.track_number, s.composer, s.lyrics,
+        s.audio_path, s.explicit_content
+    FROM catalog_import_stage s
+    JOIN artist_ids ai ON ai.name = s.artist_name
+    JOIN album_ids bi ON bi.artist_id = ai.artist_id AND bi.title = s.album_title
+    WHERE NOT EXISTS (
+        SELECT 1 FROM vibesia_schema.songs x
+        WHERE x.album_id = bi.album_id AND x.title = s.song_title
+    )
+    ORDER BY bi.album_id, s.song_title, s.row_number
+"""
+
+
+def read_rows(stream: IO[str], fmt: str) -> Iterator[Any]:
+    """
+    Yields input rows as dicts; CSV empty cells become None. A line that
+    cannot be parsed is yielded as its exception so it is reported as a row
+    error instead of ending the import.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield e
+                continue
+            yield {key: (value if value != "" else None) for key, value in row.items()}
+    elif fmt == "ndjson":
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield e
+    else:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+
+
+def _validate_batch(
+    batch: List[Tuple[int, Any]]
+) -> Tuple[List[Tuple[int, CatalogImportRow]], List[ImportRowError]]:
+    valid, errors = [], []
+    for row_number, raw in batch:
+        if isinstance(raw, Exception):
+            errors.append(ImportRowError(row=row_number, errors=[f"Unreadable row: {raw}"]))
+            continue
+        if not isinstance(raw, dict):
+            errors.append(ImportRowError(row=row_number, errors=["Row must be an object"]))
+            continue
+        try:
+            valid.append((row_number, CatalogImportRow.from_flat(raw)))
+        except ValidationError as e:
+            errors.append(ImportRowError(
+                row=row_number,
+                errors=[f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()],
+            ))
+    return valid, errors
+
+
+def _stage_csv(rows: List[Tuple[int, CatalogImportRow]]) -> io.StringIO:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row_number, row in rows:
+        writer.writerow([
+            row_number, row.artist.name, row.artist.artist_type.value, row.artist.country,
+            row.artist.formation_year, row.album.title, row.album.album_type, row.album.release_year,
+            row.album.record_label, row.album.cover_image, row.song.title, row.song.duration,
+            row.song.track_number, row.song.composer, row.song.lyrics, row.song.audio_path,
+            "t" if row.song.explicit_content else "f",
+        ])
+    buffer.seek(0)
+    return buffer
+
+
+def copy_into_stage(db: Session, rows: List[Tuple[int, CatalogImportRow]]) -> None:
+    """Loads validated rows into the staging table with a single COPY."""
+    connection = db.connection()
+    dbapi_connection = connection.connection.dbapi_connection
+    copy_sql = f"COPY catalog_import_stage ({', '.join(STAGE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    with dbapi_connection.cursor() as cursor:
+        if connection.dialect.driver == "psycopg":
+            # psycopg 3 has no copy_expert; its COPY object takes the data in writes
+            with cursor.copy(copy_sql) as copy:
+                copy.write(_stage_csv(rows).getvalue())
+        else:
+            cursor.copy_expert(copy_sql, _stage_csv(rows))
+
+
+def _batches(rows: Iterable[Any], size: int) -> Iterator[List[Tuple[int, Any]]]:
+    numbered = enumerate(rows, start=1)
+    while True:
+        batch = list(itertools.islice(numbered, size))
+        if not batch:
+            return
+        yield batch
+
+
+def import_catalog(
+    db: Session,
+    stream: IO[str],
+    *,
+    fmt: str = "csv",
+    batch_size: Optional[int] = None,
+) -> ImportReport:
+    """
+    Imports a catalog file into the database using `db`. The caller owns the
+    transaction and commits it; each batch runs in a savepoint so rows the
+    database rejects are rolled back and reported without losing the others.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    report = ImportReport()
+    started = time.perf_counter()
+
+    db.execute(text(CREATE_STAGE_SQL))
+
+    for batch in _batches(read_rows(stream, fmt), batch_size):
+        report.rows_total += len(batch)
+        valid, errors = _validate_batch(batch)
+        _record_errors(report, errors)
+        if not valid:
+            continue
+
+        _merge_rows(db, report, valid)
+
+    report.elapsed_seconds = round(time.perf_counter() - started, 3)
+    if report.elapsed_seconds:
+        report.rows_per_second = round(report.rows_total / report.elapsed_seconds, 1)
+    return report
+
+
+def _merge_batch(db: Session, rows: List[Tuple[int, CatalogImportRow]]) -> Tuple[int, int, int]:
+    """
+    Stages `rows` and merges them in one savepoint. Returns the artists,
+    albums and songs created; raises, with the savepoint rolled back, when
+    the database rejects any row.
+    """
+    savepoint = db.begin_nested()
+    try:
+        db.execute(text("TRUNCATE catalog_import_stage"))
+        copy_into_stage(db, rows)
+        artists = db.execute(text(MERGE_ARTISTS_SQL)).rowcount
+        albums = db.execute(text(MERGE_ALBUMS_SQL)).rowcount
+        songs = db.execute(text(MERGE_SONGS_SQL)).rowcount
+        savepoint.commit()
+    except Exception:
+        savepoint.rollback()
+        raise
+    return artists, albums, songs
+
+
+def _merge_rows(db: Session, report: ImportReport, rows: List[Tuple[int, CatalogImportRow]]) -> None:
+    """
+    Merges `rows`, bisecting on failure: each half is retried in its own
+    savepoint until the rejected rows are isolated, so a batch with k bad
+    rows costs about k * log2(batch size) extra merges and the good rows
+    around them are still imported.
+    """
+    try:
+        artists, albums, songs = _merge_batch(db, rows)
+    except Exception as e:
+        if len(rows) == 1:
+            message = f"Rejected by the database: {str(getattr(e, 'orig', e)).strip()}"
+            _record_errors(report, [ImportRowError(row=rows[0][0], errors=[message])])
+            return
+        logger.info(f"Import of rows {rows[0][0]}-{rows[-1][0]} failed, splitting it: {e}")
+        middle = len(rows) // 2
+        _merge_rows(db, report, rows[:middle])
+        _merge_rows(db, report, rows[middle:])
+        return
+
+    report.rows_valid += len(rows)
+    report.artists_created += artists
+    report.albums_created += albums
+    report.songs_created += songs
+    report.songs_skipped += len(rows) - songs
+
+
+def _record_errors(report: ImportReport, errors: List[ImportRowError]) -> None:
+    report.rows_failed += len(errors)
+    room = settings.IMPORT_MAX_REPORTED_ERRORS - len(report.errors)
+    if len(errors) > room:
+        report.errors_truncated = True
+    report.errors.extend(errors[:max(room, 0)])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import artists, albums and songs.")
+    parser.add_argument("path", help="CSV or NDJSON file")
+    parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        with open(args.path, newline="", encoding="utf-8") as stream:
+            report = import_catalog(db, stream, fmt=fmt, batch_size=args.batch_size)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    print(report.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    main()
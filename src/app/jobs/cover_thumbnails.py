@@ -0,0 +1,141 @@
+"""
+Pre-generates cover thumbnails so the first request for them is a cache hit.
+
+Playlist mosaics (first four album covers) are rendered in every size for
+every playlist, or only for --playlist-id; --albums also renders album cover
+thumbnails. Work runs on the thumbnail cache's worker pool, and thumbnails
+already on disk for the current covers are skipped, so re-runs are cheap:
+
+    python -m app.jobs.cover_thumbnails [--playlist-id ID] [--albums] [--sizes 128 256]
+"""
+import argparse
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Dict, Iterator, List, Optional, Sequence, Set
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.thumbnails import ThumbnailCache, cover_paths, thumbnail_cache
+from app.crud.crud_playlist import playlist as playlist_crud
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = "vibesia_schema"
+BATCH_SIZE = 1000
+
+
+def _ids(table: str, column: str) -> Iterator[int]:
+    """Keyset walk over a table's ids, one short transaction per batch."""
+    after = 0
+    while True:
+        db = SessionLocal()
+        try:
+            ids = db.execute(
+                text(f"SELECT {column} FROM {SCHEMA}.{table} WHERE {column} > :after ORDER BY {column} LIMIT :batch"),
+                {"after": after, "batch": BATCH_SIZE},
+            ).scalars().all()
+        finally:
+            db.close()
+        yield from ids
+        if len(ids) < BATCH_SIZE:
+            return
+        after = ids[-1]
+
+
+def playlist_sources(playlist_id: Optional[int] = None) -> Iterator[List[str]]:
+    playlist_ids = [playlist_id] if playlist_id is not None else _ids("playlists", "playlist_id")
+    for pid in playlist_ids:
+        db = SessionLocal()
+        try:
+            covers = playlist_crud.get_cover_images(db=db, playlist_id=pid)
+        finally:
+            db.close()
+        yield cover_paths(covers)
+
+
+def album_sources() -> Iterator[List[str]]:
+    after = 0
+    while True:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                text(f"""
+                    SELECT album_id, cover_image FROM {SCHEMA}.albums
+                    WHERE album_id > :after AND cover_image IS NOT NULL
+                    ORDER BY album_id LIMIT :batch
+                """),
+                {"after": after, "batch": BATCH_SIZE},
+            ).all()
+        finally:
+            db.close()
+        for row in rows:
+            yield cover_paths([row.cover_image])
+        if len(rows) < BATCH_SIZE:
+            return
+        after = rows[-1].album_id
+
+
+def generate(sources: Iterator[List[str]], sizes: Sequence[int], cache: ThumbnailCache = thumbnail_cache) -> Dict[str, int]:
+    counts = {"rendered": 0, "cached": 0, "no_cover": 0, "failed": 0}
+    pending: Set[Future] = set()
+    window = max(1, cache.workers) * 4
+
+    def collect(done: Set[Future]) -> None:
+        for future in done:
+            try:
+                future.result()
+                counts["rendered"] += 1
+            except Exception as e:
+                counts["failed"] += 1
+                logger.warning(f"Thumbnail failed: {e}")
+
+    for paths in sources:
+        if not paths:
+            counts["no_cover"] += 1
+            continue
+        for size in sizes:
+            try:
+                key = cache.key(paths, size)
+            except FileNotFoundError:
+                counts["no_cover"] += 1
+                break
+            if os.path.exists(cache.path(key)):
+                counts["cached"] += 1
+                continue
+            pending.add(cache.submit(paths, size, key))
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+    collect(wait(pending).done)
+    return counts
+
+
+def run(*, playlist_id: Optional[int] = None, albums: bool = False, sizes: Sequence[int] = ()) -> Dict[str, Dict[str, int]]:
+    sizes = list(sizes) or settings.THUMBNAIL_SIZES
+    results = {"playlists": generate(playlist_sources(playlist_id), sizes)}
+    logger.info(f"Playlist covers: {results['playlists']}")
+    if albums:
+        results["albums"] = generate(album_sources(), sizes)
+        logger.info(f"Album covers: {results['albums']}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pre-generate playlist mosaic and album cover thumbnails.")
+    parser.add_argument("--playlist-id", type=int, help="Only this playlist.")
+    parser.add_argument("--albums", action="store_true", help="Also render album cover thumbnails.")
+    parser.add_argument("--sizes", type=int, nargs="+", choices=settings.THUMBNAIL_SIZES,
+                        help="Sizes to render (default: all).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    results = run(playlist_id=args.playlist_id, albums=args.albums, sizes=args.sizes or ())
+    if any(counts["failed"] for counts in results.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Background purge of user accounts pending deletion.
+
+DELETE /users/me only deactivates the account and stamps
+`users.deletion_requested_at`; the rows are removed here, child tables first,
+in chunks of USER_DELETION_BATCH_SIZE rows. Every chunk is its own
+transaction, so locks stay short and an interrupted purge simply resumes from
+whatever is left. Progress is committed with each chunk to `user_deletions`,
+which GET /users/{id}/deletion reads. Run without arguments to resume every
+pending deletion:
+
+    python -m app.jobs.user_deletion [--user-id ID] [--batch-size N]
+"""
+import argparse
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.audit import apply_audit_context, build_audit_context
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.crud_user import user as user_crud
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = "vibesia_schema"
+
+# (step, statement) in dependency order. Each statement removes at most
+# :batch rows belonging to :user_id and is repeated until it affects fewer.
+PURGE_STEPS = [
+    ("playback_history", f"""
+        DELETE FROM {SCHEMA}.playback_history
+        WHERE playback_id IN (
+            SELECT playback_id FROM {SCHEMA}.playback_history
+            WHERE user_id = :user_id
+            LIMIT :batch
+        )
+    """),
+    ("user_device", f"""
+        DELETE FROM {SCHEMA}.user_device
+        WHERE user_id = :user_id AND device_id IN (
+            SELECT device_id FROM {SCHEMA}.user_device
+            WHERE user_id = :user_id
+            LIMIT :batch
+        )
+    """),
+    ("playlist_songs", f"""
+        DELETE FROM {SCHEMA}.playlist_songs
+        WHERE (playlist_id, song_id) IN (
+            SELECT ps.playlist_id, ps.song_id
+            FROM {SCHEMA}.playlist_songs ps
+            JOIN {SCHEMA}.playlists p ON p.playlist_id = ps.playlist_id
+            WHERE p.user_id = :user_id
+            LIMIT :batch
+        )
+    """),
+    ("playlists", f"""
+        DELETE FROM {SCHEMA}.playlists
+        WHERE playlist_id IN (
+            SELECT playlist_id FROM {SCHEMA}.playlists
+            WHERE user_id = :user_id
+            LIMIT :batch
+        )
+    """),
+    # The FK would do this on the final DELETE, but in a single statement over
+    # every audit row the user ever produced.
+    ("audit_log", f"""
+        UPDATE {SCHEMA}.audit_log SET app_user_id = NULL
+        WHERE (audit_id, "timestamp") IN (
+            SELECT audit_id, "timestamp" FROM {SCHEMA}.audit_log
+            WHERE app_user_id = :user_id
+            LIMIT :batch
+        )
+    """),
+]
+
+IS_PENDING_SQL = f"""
+    SELECT 1 FROM {SCHEMA}.users
+    WHERE user_id = :user_id AND deletion_requested_at IS NOT NULL
+"""
+
+DELETE_USER_SQL = f"""
+    DELETE FROM {SCHEMA}.users
+    WHERE user_id = :user_id AND deletion_requested_at IS NOT NULL
+"""
+
+# Progress lives in user_deletions, so every worker reports the same status and
+# it survives restarts. Claiming the row is also the lock: a purge only starts
+# when no other one is running, or the one that was stopped committing chunks.
+CLAIM_SQL = f"""
+    INSERT INTO {SCHEMA}.user_deletions (user_id, state, deletion_requested_at, started_at, updated_at)
+    SELECT u.user_id, 'running', u.deletion_requested_at, now(), now()
+    FROM {SCHEMA}.users u
+    WHERE u.user_id = :user_id AND u.deletion_requested_at IS NOT NULL
+    ON CONFLICT (user_id) DO UPDATE SET
+        state = 'running',
+        deletion_requested_at = EXCLUDED.deletion_requested_at,
+        started_at = now(),
+        finished_at = NULL,
+        updated_at = now(),
+        error = NULL
+    WHERE {SCHEMA}.user_deletions.state <> 'running'
+    OR {SCHEMA}.user_deletions.updated_at < now() - make_interval(secs => :stale_seconds)
+    RETURNING user_id
+"""
+
+# Runs in the chunk's transaction, so the counts match what was committed
+RECORD_CHUNK_SQL = f"""
+    UPDATE {SCHEMA}.user_deletions SET
+        step = :step,
+        deleted = deleted || jsonb_build_object(
+            CAST(:step AS text), COALESCE((deleted ->> CAST(:step AS text))::integer, 0) + :affected
+        ),
+        updated_at = now()
+    WHERE user_id = :user_id
+"""
+
+FINISH_SQL = f"""
+    UPDATE {SCHEMA}.user_deletions SET
+        state = :state, step = :step, error = :error, finished_at = now(), updated_at = now()
+    WHERE user_id = :user_id
+"""
+
+PROGRESS_SQL = f"""
+    SELECT
+        user_id,
+        CASE
+            WHEN state = 'running' AND updated_at < now() - make_interval(secs => :stale_seconds)
+            THEN 'interrupted' ELSE state
+        END AS state,
+        step, deleted, deletion_requested_at, started_at, finished_at, updated_at, error
+    FROM {SCHEMA}.user_deletions
+    WHERE user_id = :user_id
+"""
+
+
+@dataclass
+class DeletionProgress:
+    user_id: int
+    state: str = "pending"  # pending | running | interrupted | completed | failed
+    step: Optional[str] = None
+    deleted: Dict[str, int] = field(default_factory=dict)
+    deletion_requested_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+def get_progress(db: Session, user_id: int) -> Optional[DeletionProgress]:
+    """Progress of the last purge of `user_id`, whichever process ran it; None if none was started."""
+    row = db.execute(
+        text(PROGRESS_SQL), {"user_id": user_id, "stale_seconds": settings.USER_DELETION_STALE_SECONDS}
+    ).first()
+    return DeletionProgress(**row._mapping) if row else None
+
+
+def _run_chunk(db: Session, statement: str, params: dict, audit_context: Dict[str, str], step: str) -> int:
+    # SET LOCAL only lasts until commit, so the context is applied per chunk.
+    apply_audit_context(db, audit_context)
+    affected = db.execute(text(statement), params).rowcount
+    db.execute(text(RECORD_CHUNK_SQL), {"user_id": params["user_id"], "step": step, "affected": affected})
+    db.commit()
+    return affected
+
+
+def purge_user(
+    user_id: int,
+    *,
+    batch_size: int = settings.USER_DELETION_BATCH_SIZE,
+    audit_context: Optional[Dict[str, str]] = None,
+) -> DeletionProgress:
+    """
+    Deletes a user marked for deletion and everything they own. Safe to call
+    again after a failure, or from another worker after an interruption; it
+    continues with the rows that are left.
+    """
+    audit_context = audit_context or build_audit_context(api_endpoint=__name__)
+    params = {"user_id": user_id, "batch": batch_size}
+    db = SessionLocal()
+    try:
+        claimed = db.execute(
+            text(CLAIM_SQL), {"user_id": user_id, "stale_seconds": settings.USER_DELETION_STALE_SECONDS}
+        ).first()
+        db.commit()
+        if claimed is None:
+            # Never touch the rows of an account that was not marked for deletion.
+            if db.execute(text(IS_PENDING_SQL), params).first() is None:
+                db.rollback()
+                logger.warning(f"User {user_id} is not pending deletion; skipped.")
+                return get_progress(db, user_id) or DeletionProgress(
+                    user_id=user_id, state="failed", error="User is not pending deletion."
+                )
+            logger.info(f"Deletion of user {user_id} is already running.")
+            return get_progress(db, user_id)
+
+        step = None
+        try:
+            for step, statement in PURGE_STEPS:
+                while True:
+                    if _run_chunk(db, statement, params, audit_context, step) < batch_size:
+                        break
+            step = "users"
+            _run_chunk(db, DELETE_USER_SQL, params, audit_context, step)
+            db.execute(text(FINISH_SQL), {"user_id": user_id, "state": "completed", "step": None, "error": None})
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.exception(f"Deletion of user {user_id} failed during {step}.")
+            try:
+                db.execute(text(FINISH_SQL), {"user_id": user_id, "state": "failed", "step": step, "error": str(e)})
+                db.commit()
+            except Exception:
+                # Left as running, so it shows up as interrupted once stale
+                db.rollback()
+                return DeletionProgress(user_id=user_id, state="failed", step=step, error=str(e))
+
+        progress = get_progress(db, user_id)
+        db.rollback()
+        if progress.state == "completed":
+            logger.info(f"User {user_id} deleted: {progress.deleted}")
+        return progress
+    finally:
+        db.close()
+
+
+def pending_user_ids() -> List[int]:
+    db = SessionLocal()
+    try:
+        return user_crud.get_pending_deletion_ids(db)
+    finally:
+        db.close()
+
+
+def run(*, user_id: Optional[int] = None, batch_size: int = settings.USER_DELETION_BATCH_SIZE) -> List[DeletionProgress]:
+    user_ids = [user_id] if user_id is not None else pending_user_ids()
+    logger.info(f"{len(user_ids)} account(s) pending deletion.")
+    return [purge_user(uid, batch_size=batch_size) for uid in user_ids]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Purge user accounts pending deletion.")
+    parser.add_argument("--user-id", type=int, help="Only purge this user (must already be marked for deletion).")
+    parser.add_argument("--batch-size", type=int, default=settings.USER_DELETION_BATCH_SIZE,
+                        help="Rows deleted per transaction.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    results = run(user_id=args.user_id, batch_size=args.batch_size)
+    if any(p.state == "failed" for p in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.api.v1.api import api_router  
 from app.core.config import settings   
+from app.core import metrics
+from app.core.database import replica_engines
+from app.core.read_your_writes import PRIMARY_UNTIL_HEADER, ReadYourWritesMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.core.tracing import TracingMiddleware
+from app.api.deps import is_admin_request
 from mangum import Mangum
 
 app = FastAPI(
@@ -9,13 +16,21 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
 )
 
+if replica_engines:
+    app.add_middleware(ReadYourWritesMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.BACKEND_CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[PRIMARY_UNTIL_HEADER],
 )
+app.add_middleware(TracingMiddleware)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, authorize=is_admin_request)
+# Added last so it is outermost and times everything, CORS included
+app.add_middleware(metrics.MetricsMiddleware)
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -27,4 +42,8 @@ def root():
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def read_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 handler=Mangum(app)
\ No newline at end of file
@@ -1,6 +1,6 @@
 # ====== Album.py ======
 from app.core.database import Base
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, CheckConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -9,6 +9,7 @@ class Album(Base):
     __table_args__ = (
         CheckConstraint("release_year BETWEEN 1900 AND EXTRACT(YEAR FROM CURRENT_DATE)",
                        name='chk_release_year_valid'),
+        Index('ix_albums_artist_id_title', 'artist_id', 'title'),
         {'schema': 'vibesia_schema'}
     )
     
@@ -1,5 +1,5 @@
 from app.core.database import Base
-from sqlalchemy import Column, Integer, String, Text, DateTime, CheckConstraint # <--- Import CheckConstraint
+from sqlalchemy import Column, Integer, String, Text, DateTime, CheckConstraint, Index # <--- Import CheckConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -10,6 +10,7 @@ class Artist(Base):
             "artist_type IN ('soloist', 'band', 'collective', 'duo', 'orchestra')",
             name='artists_artist_type_check'
         ),
+        Index('ix_artists_name', 'name'),
         {'schema': 'vibesia_schema'}
     )
 
@@ -13,6 +13,8 @@ class Genre(Base):
     genre_id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(50), nullable=False, unique=True)
     description = Column(Text)
+    # Maintained by the song_genres statement triggers, never written by the app
+    song_count = Column(Integer, nullable=False, default=0, server_default='0')
 
     # Relationships
     song_associations = relationship("SongGenre", back_populates="genre")
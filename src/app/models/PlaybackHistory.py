@@ -1,6 +1,6 @@
 # ====== PlaybackHistory.py ======
 from app.core.database import Base
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Boolean, CheckConstraint, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Boolean, CheckConstraint, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -9,6 +9,7 @@ class PlaybackHistory(Base):
     __table_args__ = (
         UniqueConstraint('user_id', 'song_id', 'playback_date',
                         name='playback_unique_user_song_time'),
+        Index('ix_playback_history_song_id', 'song_id'),
         {'schema': 'vibesia_schema'}
     )
 
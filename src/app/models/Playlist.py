@@ -1,6 +1,6 @@
 # ====== Playlist.py ======
 from app.core.database import Base
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, CheckConstraint, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, CheckConstraint, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -8,6 +8,7 @@ class Playlist(Base):
     __tablename__ = 'playlists'
     __table_args__ = (
         UniqueConstraint('name', 'user_id', name='uk_playlist_user_name'),
+        Index('ix_playlists_user_id', 'user_id'),
         {'schema': 'vibesia_schema'}
     )
 
@@ -19,6 +20,9 @@ class Playlist(Base):
     status = Column(String(20), nullable=False, default='private')
     created_at = Column(DateTime, default=func.current_timestamp())
     updated_at = Column(DateTime, default=func.current_timestamp(), onupdate=func.current_timestamp())
+    # Maintained by triggers on playlist_songs and songs; never written by the application
+    song_count = Column(Integer, nullable=False, default=0, server_default='0')
+    total_duration = Column(Integer, nullable=False, default=0, server_default='0')
 
     # Relationships
     creator = relationship("User", back_populates="created_playlists")
@@ -1,12 +1,16 @@
 # ====== PlaylistSong.py ======
 from app.core.database import Base
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 class PlaylistSong(Base):
     __tablename__ = 'playlist_songs'
-    __table_args__ = {'schema': 'vibesia_schema'}
+    __table_args__ = (
+        Index('ix_playlist_songs_song_id', 'song_id'),
+        Index('ix_playlist_songs_playlist_id_position', 'playlist_id', 'position', 'song_id'),
+        {'schema': 'vibesia_schema'}
+    )
     
     playlist_id = Column(Integer, ForeignKey('vibesia_schema.playlists.playlist_id'), primary_key=True)
     song_id = Column(Integer, ForeignKey('vibesia_schema.songs.song_id'), primary_key=True)
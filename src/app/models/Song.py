@@ -1,12 +1,15 @@
 # ====== Song.py ======
 from app.core.database import Base
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 class Song(Base):
     __tablename__ = 'songs'
-    __table_args__ = {'schema': 'vibesia_schema'}
+    __table_args__ = (
+        Index('ix_songs_album_id_title', 'album_id', 'title'),
+        {'schema': 'vibesia_schema'}
+    )
 
     song_id = Column(Integer, primary_key=True, autoincrement=True)
     album_id = Column(Integer, ForeignKey('vibesia_schema.albums.album_id'), nullable=False)
@@ -1,12 +1,16 @@
 # ====== User.py (Corrected Version) ======
 from app.core.database import Base
-from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Boolean, Index, text
 from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 
 class User(Base):
     __tablename__ = 'users'
-    __table_args__ = {'schema': 'vibesia_schema'}
+    __table_args__ = (
+        Index('ix_users_deletion_requested_at', 'deletion_requested_at',
+              postgresql_where=text('deletion_requested_at IS NOT NULL')),
+        {'schema': 'vibesia_schema'}
+    )
 
     user_id = Column(Integer, primary_key=True, autoincrement=True)
     username = Column(String(50), nullable=False, unique=True)
@@ -18,6 +22,8 @@ class User(Base):
     created_at = Column(DateTime, default=func.current_timestamp())
     updated_at = Column(DateTime, default=func.current_timestamp(), onupdate=func.current_timestamp())
     password_changed_at = Column(DateTime(timezone=True), nullable=True)
+    # Set when the account is scheduled for deletion; the rows are purged in the background
+    deletion_requested_at = Column(DateTime(timezone=True), nullable=True)
 
     @validates('email')
     def validate_email_spaces(self, key, address):
@@ -0,0 +1,25 @@
+# ====== UserDeletion.py ======
+from app.core.database import Base
+from sqlalchemy import Column, Integer, String, DateTime, Text, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+class UserDeletion(Base):
+    """
+    Progress of an account purge (app.jobs.user_deletion), kept in the
+    database so every worker reports the same status and it survives
+    restarts. No foreign key: the row outlives the user it describes.
+    """
+    __tablename__ = 'user_deletions'
+    __table_args__ = {'schema': 'vibesia_schema'}
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    state = Column(String(20), nullable=False)  # running | completed | failed
+    step = Column(String(50))
+    deleted = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    deletion_requested_at = Column(DateTime(timezone=True))
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    # Bumped by every chunk; a running purge that stopped bumping it was interrupted
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    error = Column(Text)
@@ -10,6 +10,7 @@ from .PlaylistSong import PlaylistSong
 from .Song import Song
 from .SongGenre import SongGenre
 from .UserDevice import UserDevice
+from .UserDeletion import UserDeletion
 
 __all__ = [
     "User",
@@ -23,5 +24,6 @@ __all__ = [
     "PlaylistSong",
     "Song",
     "SongGenre",
-    "UserDevice"
+    "UserDevice",
+    "UserDeletion"
 ]
\ No newline at end of file
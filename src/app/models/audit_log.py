@@ -1,14 +1,26 @@
 # File: app/models/audit_log.py (CORRECTED VERSION)
 
 from app.core.database import Base
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import JSONB, INET
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
 class AuditLog(Base):
     __tablename__ = 'audit_log'
-    __table_args__ = {'schema': 'vibesia_schema'}
+    __table_args__ = (
+        # Every filter of GET /audit-logs is paired with the (timestamp, audit_id)
+        # keyset so a page is a bounded index range scan.
+        Index('ix_audit_log_timestamp_audit_id', 'timestamp', 'audit_id'),
+        Index('ix_audit_log_table_name_timestamp', 'table_name', 'timestamp', 'audit_id'),
+        Index('ix_audit_log_table_record_timestamp', 'table_name', 'record_id', 'timestamp', 'audit_id'),
+        Index('ix_audit_log_app_user_timestamp', 'app_user_id', 'timestamp', 'audit_id'),
+        Index('ix_audit_log_action_type_timestamp', 'action_type', 'timestamp', 'audit_id'),
+        Index('ix_audit_log_request_id_timestamp', 'request_id', 'timestamp', 'audit_id'),
+        Index('ix_audit_log_timestamp_brin', 'timestamp', postgresql_using='brin'),
+        # Monthly range partitions, see app.jobs.audit_archive
+        {'schema': 'vibesia_schema', 'postgresql_partition_by': 'RANGE (timestamp)'}
+    )
     
     audit_id = Column(Integer, primary_key=True, autoincrement=True)
     app_user_id = Column(Integer, ForeignKey('vibesia_schema.users.user_id', ondelete='SET NULL'), nullable=True)
@@ -23,7 +35,8 @@ class AuditLog(Base):
     record_id = Column(Integer, nullable=True)
     old_values = Column(JSONB, nullable=True)
     new_values = Column(JSONB, nullable=True)
-    timestamp = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+    # Part of the primary key because it is the partition key
+    timestamp = Column(DateTime, primary_key=True, nullable=False, server_default=func.current_timestamp())
     connection_ip = Column(INET, nullable=True)
     user_agent = Column(Text, nullable=True)
     api_endpoint = Column(String(255), nullable=True)
@@ -31,4 +44,4 @@ class AuditLog(Base):
     application_name = Column(String(50), server_default='vibesia_app')
     environment = Column(String(20), server_default='production')
     
-    app_user = relationship("User", foreign_keys=[app_user_id])
\ No newline at end of file
+    app_user = relationship("User", foreign_keys=[app_user_id])
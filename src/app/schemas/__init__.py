@@ -1,2 +1,2 @@
-from .song import SongDetail
-from .playlist import Playlist, PlaylistCreate, PlaylistUpdate, PlaylistSummary
+from .song import SongDetail, SongWaveform
+from .playlist import Playlist, PlaylistCreate, PlaylistUpdate, PlaylistSummary, PlaylistDelta, PlaylistSongPage
@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class StatementStats(BaseModel):
+    """Timings of one normalized SQL statement in this process."""
+    statement: str
+    calls: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
+    slow_calls: int
+    last_route: Optional[str] = None
+    plan: Optional[str] = None
+    plan_captured_at: Optional[datetime] = None
+
+
+class Allocation(BaseModel):
+    location: str
+    size_diff: int
+    count_diff: int
+    size: int
+
+
+class ProfileSummary(BaseModel):
+    id: str
+    method: str
+    path: str
+    route: Optional[str] = None
+    status: int
+    started_at: datetime
+    duration_ms: float
+    process_cpu_ms: float
+    modes: List[str]
+
+
+class ProfileReport(ProfileSummary):
+    """One profiled request. `collapsed` holds `frame;frame;... count` lines, root first."""
+    interval_ms: Optional[float] = None
+    ticks: Optional[int] = None
+    samples: Optional[int] = None
+    collapsed: Optional[List[str]] = None
+    peak_traced_bytes: Optional[int] = None
+    allocations: Optional[List[Allocation]] = None
+
+
+class TraceEntry(BaseModel):
+    """A finished trace; `export` is an OTLP/JSON ExportTraceServiceRequest."""
+    trace_id: str
+    request_id: Optional[str] = None
+    export: Dict[str, Any]
@@ -0,0 +1,38 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional
+from datetime import datetime
+
+from app.schemas.artist import Artist
+
+# Shared properties for an album
+class AlbumBase(BaseModel):
+    title: str = Field(..., min_length=1, max_length=150)
+    release_year: Optional[int] = Field(None, ge=1900, le=datetime.now().year)
+    record_label: Optional[str] = Field(None, max_length=100)
+    album_type: str = Field(..., min_length=1, max_length=30)
+    cover_image: Optional[str] = Field(None, max_length=255)
+
+# Properties to receive on item creation
+class AlbumCreate(AlbumBase):
+    artist_id: int
+
+# Properties to receive on item update
+class AlbumUpdate(BaseModel):
+    title: Optional[str] = Field(None, min_length=1, max_length=150)
+    release_year: Optional[int] = Field(None, ge=1900, le=datetime.now().year)
+    record_label: Optional[str] = Field(None, max_length=100)
+    album_type: Optional[str] = Field(None, min_length=1, max_length=30)
+    cover_image: Optional[str] = Field(None, max_length=255)
+
+# Properties to return to the client
+class Album(AlbumBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    album_id: int
+    artist_id: int
+    created_at: datetime
+    updated_at: datetime
+
+# An album with its artist, as returned by the album endpoints
+class AlbumWithArtist(Album):
+    artist: Optional[Artist] = None
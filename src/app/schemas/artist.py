@@ -1,6 +1,6 @@
 import enum
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class ArtistTypeEnum(str, enum.Enum):
@@ -47,4 +47,9 @@ class Artist(ArtistInDBBase):
 
 # Properties stored in DB
 class ArtistInDB(ArtistInDBBase):
-    pass
\ No newline at end of file
+    pass
+
+# Bulk update: the same changes applied to every artist in `ids`
+class ArtistBulkUpdate(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+    changes: ArtistUpdate
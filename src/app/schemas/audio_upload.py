@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class AudioUploadCreate(BaseModel):
+    song_id: int
+    filename: str = Field(..., min_length=1, max_length=255, description="Original file name; its extension is kept")
+    size: int = Field(..., gt=0, description="Total size of the file in bytes")
+    sha256: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{64}$", description="Expected digest, checked on completion")
+
+class AudioUploadStatus(BaseModel):
+    upload_id: str
+    song_id: int
+    size: int
+    offset: int = Field(..., description="Bytes received so far; the next chunk must start here")
+
+class AudioUploadResult(BaseModel):
+    song_id: int
+    audio_path: str
+    sha256: str
+    size: int
+    deduplicated: bool = Field(..., description="True when identical audio was already stored")
+    stream_url: str
@@ -27,4 +27,9 @@ class AuditLogListResponse(BaseModel):
     logs: list[AuditLogResponse]
     total: int
     page: int
-    per_page: int
\ No newline at end of file
+    per_page: int
+
+class AuditLogPage(BaseModel):
+    """Keyset page of audit entries, newest first."""
+    logs: list[AuditLogResponse]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,67 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+from app.schemas.artist import ArtistCreate
+from app.schemas.album import AlbumBase
+
+class SongImport(BaseModel):
+    title: str = Field(..., min_length=1, max_length=150)
+    duration: int = Field(..., gt=0, description="Duration in seconds")
+    track_number: Optional[int] = Field(None, ge=1)
+    composer: Optional[str] = Field(None, max_length=100)
+    lyrics: Optional[str] = None
+    audio_path: str = Field(..., min_length=1, max_length=255)
+    explicit_content: bool = False
+
+class CatalogImportRow(BaseModel):
+    """
+    One flat import row (one song), validated through the artist and album
+    schemas used by the regular endpoints.
+    """
+    artist: ArtistCreate
+    album: AlbumBase
+    song: SongImport
+
+    @classmethod
+    def from_flat(cls, row: Dict[str, Any]) -> "CatalogImportRow":
+        return cls.model_validate({
+            "artist": {
+                "name": row.get("artist_name"),
+                "artist_type": row.get("artist_type"),
+                "country": row.get("artist_country"),
+                "formation_year": row.get("artist_formation_year"),
+            },
+            "album": {
+                "title": row.get("album_title"),
+                "album_type": row.get("album_type"),
+                "release_year": row.get("release_year"),
+                "record_label": row.get("record_label"),
+                "cover_image": row.get("cover_image"),
+            },
+            "song": {
+                "title": row.get("song_title"),
+                "duration": row.get("duration"),
+                "track_number": row.get("track_number"),
+                "composer": row.get("composer"),
+                "lyrics": row.get("lyrics"),
+                "audio_path": row.get("audio_path"),
+                "explicit_content": row.get("explicit_content") or False,
+            },
+        })
+
+class ImportRowError(BaseModel):
+    row: int = Field(..., description="1-based data row number in the input")
+    errors: List[str]
+
+class ImportReport(BaseModel):
+    rows_total: int = 0
+    rows_valid: int = 0
+    rows_failed: int = 0
+    artists_created: int = 0
+    albums_created: int = 0
+    songs_created: int = 0
+    songs_skipped: int = Field(0, description="Valid rows whose song already existed")
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
+
+from app.schemas.song import SongDetail
+
+class Genre(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    genre_id: int
+    name: str
+    description: Optional[str] = None
+    song_count: int = Field(0, description="Number of songs tagged with this genre")
+
+class GenreSongPage(BaseModel):
+    items: List[SongDetail]
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to fetch the next page; null on the last page")
@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from app.schemas.playlist import PlaylistSummary
+from app.schemas.song import SongDetail
+from app.schemas.user import UserResponse
+
+class HomeScreen(BaseModel):
+    """Everything the launch screen needs in one response."""
+    user: UserResponse
+    playlists: Optional[List[PlaylistSummary]] = None
+    playlist_count: Optional[int] = None
+    songs: Optional[List[SongDetail]] = None
+    # Sections that timed out or failed; their fields are null
+    incomplete: List[str] = Field(default_factory=list)
@@ -2,12 +2,14 @@ from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 
+from app.schemas.song import StreamableSong
+
 class SongBase(BaseModel):
     title: str = Field(..., min_length=1, description="Title of the song")
     artist_name: str = Field(..., min_length=1, description="Name of the artist")
     duration: int = Field(..., gt=0, description="Duration in seconds")
 
-class Song(SongBase):
+class Song(SongBase, StreamableSong):
     song_id: int
     lyrics: Optional[str] = Field(None, description="A snippet of the song's lyrics")
 
@@ -64,6 +66,22 @@ class PlaylistInDB(PlaylistBase):
 
 class Playlist(PlaylistInDB):
     songs: List[SongInPlaylist] = []
+    next_songs_cursor: Optional[str] = Field(None, description="Cursor for GET /playlists/{id}/songs when `songs_limit` truncated the songs")
+    song_count: int = Field(0, description="Total number of songs in the playlist")
+    total_duration: int = Field(0, description="Total duration of the playlist in seconds")
+
+class PlaylistSongPage(BaseModel):
+    items: List[SongInPlaylist]
+    next_cursor: Optional[str] = None
+
+class PlaylistDelta(PlaylistInDB):
+    """
+    Returned by playlist mutations when the client sends `Prefer: return=minimal`
+    (or `representation=delta`): the playlist without its songs, the affected
+    entry if any, and the stats after the change.
+    """
+    updated_at: Optional[datetime] = None
+    entry: Optional[SongInPlaylist] = Field(None, description="The song added by this request")
     song_count: int = Field(0, description="Total number of songs in the playlist")
     total_duration: int = Field(0, description="Total duration of the playlist in seconds")
 
@@ -1,5 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, computed_field
+from typing import List, Optional
+
+from app.core.security import create_stream_url
 
 class SongBase(BaseModel):
     title: str
@@ -12,7 +14,22 @@ class SongCreate(SongBase):
 class SongUpdate(SongBase):
     pass
 
-class SongDetail(BaseModel):
+class StreamableSong(BaseModel):
+    """
+    Adds a signed, expiring `stream_url` minted from the song's audio_path;
+    the path itself is never serialized, and the URL only carries it encrypted.
+    """
+    song_id: int
+    audio_path: Optional[str] = Field(None, exclude=True)
+
+    @computed_field
+    @property
+    def stream_url(self) -> Optional[str]:
+        if not self.audio_path:
+            return None
+        return create_stream_url(self.song_id, self.audio_path)
+
+class SongDetail(StreamableSong):
     song_id: int
     title: str
     artist_name: str
@@ -21,4 +38,13 @@ class SongDetail(BaseModel):
     explicit_content: bool = False
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class SongWaveform(BaseModel):
+    song_id: int
+    duration: float
+    sample_rate: int
+    channels: int
+    loudness_lufs: Optional[float] = None
+    points: int
+    peaks: List[int]  # interleaved (min, max) per point, scaled to -127..127
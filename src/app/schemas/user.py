@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict, validator
 from datetime import datetime, date
-from typing import Optional 
+from typing import Dict, Optional
 
 class UserBase(BaseModel):
     username: str
@@ -42,4 +42,16 @@ class UserListResponse(BaseModel):
 class UserStatusResponse(BaseModel):
     user_id: int
     username: str
-    is_active: bool
\ No newline at end of file
+    is_active: bool
+
+
+class UserDeletionStatus(BaseModel):
+    user_id: int
+    state: str  # pending | running | interrupted | completed | failed
+    step: Optional[str] = None
+    deleted: Dict[str, int] = {}
+    deletion_requested_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    error: Optional[str] = None
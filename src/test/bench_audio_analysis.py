@@ -0,0 +1,97 @@
+# file: bench_audio_analysis.py - Throughput of the offline audio analysis pipeline
+#
+# Generates WAV files and analyzes them (duration, waveform peaks, loudness)
+# the way app.jobs.audio_analysis does:
+#   python test/bench_audio_analysis.py [--workers N]
+#                                                    # once in this process, then with N worker processes
+#                                                    #   (default: one per CPU), then an incremental re-check
+# Run from src/ so the `app` package is importable.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# --- 1. Centralized Configuration ---
+FILES = int(os.getenv("BENCH_FILES", "16"))
+SECONDS = int(os.getenv("BENCH_SECONDS", "180"))
+SAMPLE_RATE = 44100
+
+
+def make_files(directory: str):
+    rng = np.random.default_rng(0)
+    t = np.arange(SECONDS * SAMPLE_RATE) / SAMPLE_RATE
+    paths = []
+    for i in range(FILES):
+        tone = 0.3 * np.sin(2 * np.pi * (220 + 20 * i) * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 0.1 * t))
+        stereo = np.stack([tone, tone], axis=1) + 0.05 * rng.standard_normal((len(t), 2))
+        path = os.path.join(directory, "audio", f"track_{i}.wav")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with wave.open(path, "wb") as f:
+            f.setnchannels(2)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes((np.clip(stereo, -1, 1) * 32767).astype("<i2").tobytes())
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    from concurrent.futures import ProcessPoolExecutor
+    from app.core.waveform import read_header, source_key
+    from app.jobs.audio_analysis import AnalysisTask, analyze
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Creating {FILES} stereo WAV files of {SECONDS} s ...")
+        paths = make_files(directory)
+        audio_seconds = FILES * SECONDS
+        megabytes = sum(os.path.getsize(p) for p in paths) / 1e6
+
+        def tasks():
+            result = []
+            for i, path in enumerate(paths):
+                st = os.stat(path)
+                audio_path = os.path.relpath(path, directory)
+                target = os.path.join(directory, "waveforms", f"{i}.peaks")
+                result.append(AnalysisTask(i, audio_path, path, target, st.st_size, st.st_mtime_ns, 1000))
+            return result
+
+        started = time.perf_counter()
+        results = [analyze(task) for task in tasks()]
+        elapsed = time.perf_counter() - started
+        assert not any(r.error for r in results)
+        print(f"{'in-process':<16} {elapsed:6.2f} s   {audio_seconds / elapsed:7.0f}x realtime   {megabytes / elapsed:6.0f} MB/s")
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(analyze, tasks()))
+        elapsed = time.perf_counter() - started
+        assert not any(r.error for r in results)
+        print(f"{f'{args.workers} worker(s)':<16} {elapsed:6.2f} s   {audio_seconds / elapsed:7.0f}x realtime   {megabytes / elapsed:6.0f} MB/s")
+        print(f"Loudness of the first file: {results[0].loudness:.2f} LUFS, duration {results[0].duration:.2f} s")
+
+        # Incremental run: only headers are read
+        started = time.perf_counter()
+        unchanged = 0
+        for task in tasks():
+            header = read_header(task.target)
+            if header and (header.source_size, header.source_mtime_ns, header.source_key) == (
+                task.size, task.mtime_ns, source_key(task.audio_path)
+            ):
+                unchanged += 1
+        elapsed = time.perf_counter() - started
+        print(f"Re-check of {FILES} unchanged files: {unchanged} skipped in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
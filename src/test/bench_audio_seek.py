@@ -0,0 +1,154 @@
+# file: bench_audio_seek.py - Concurrent seek benchmark for audio streaming
+#
+# Two modes:
+#   python test/bench_audio_seek.py                  # in-process: random Range requests against local files,
+#                                                    #   MediaFileResponse (fd/mmap cache + pread) vs. Starlette FileResponse
+#   python test/bench_audio_seek.py --api --song-id N --audio-path PATH
+#                                                    # live: same seeks against GET /songs/{id}/stream on a running
+#                                                    #   server (URL signed with this environment's SECRET_KEY)
+# Run from src/ so the `app` package is importable.
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# --- 1. Centralized Configuration ---
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+FILES = int(os.getenv("BENCH_FILES", "8"))
+FILE_MB = int(os.getenv("BENCH_FILE_MB", "16"))
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "4000"))
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "64"))
+RANGE_BYTES = int(os.getenv("BENCH_RANGE_BYTES", "65536"))
+
+
+# --- 2. Workload ---
+def make_files(directory: str):
+    paths = []
+    for i in range(FILES):
+        path = os.path.join(directory, f"track_{i}.mp3")
+        with open(path, "wb") as f:
+            for _ in range(FILE_MB):
+                f.write(os.urandom(1024 * 1024))
+        paths.append(path)
+    return paths
+
+
+def random_range(size: int) -> str:
+    # One in four requests re-reads the start of the file, like a player probing headers
+    start = 0 if random.random() < 0.25 else random.randrange(0, size - RANGE_BYTES)
+    return f"bytes={start}-{start + RANGE_BYTES - 1}"
+
+
+async def call_asgi(response, range_header: str) -> int:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"range", range_header.encode())],
+        "extensions": {},
+    }
+    received = 0
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+
+    await response(scope, receive, send)
+    return received
+
+
+async def run_requests(label: str, make_request):
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(REQUESTS):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            received = await make_request()
+            latencies.append(time.perf_counter() - started)
+            assert received == RANGE_BYTES, f"short read: {received}"
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{label:<28} {REQUESTS / elapsed:>9.0f} req/s   p50 {p50:6.2f} ms   p99 {p99:6.2f} ms")
+
+
+# --- 3. Modes ---
+async def bench_in_process():
+    from starlette.responses import FileResponse
+    from app.core.media import MediaFileCache, MediaFileResponse
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Creating {FILES} files of {FILE_MB} MiB in {directory} ...")
+        paths = make_files(directory)
+        size = FILE_MB * 1024 * 1024
+        cache = MediaFileCache(capacity=len(paths), header_bytes=256 * 1024)
+        print(f"{REQUESTS} requests of {RANGE_BYTES} bytes, concurrency {CONCURRENCY}\n")
+
+        await run_requests(
+            "starlette FileResponse",
+            lambda: call_asgi(FileResponse(random.choice(paths)), random_range(size)),
+        )
+        await run_requests(
+            "MediaFileResponse (cached)",
+            lambda: call_asgi(MediaFileResponse(random.choice(paths), cache=cache), random_range(size)),
+        )
+        cache.clear()
+
+
+async def bench_api(song_id: int, audio_path: str, size: int):
+    import httpx
+    from app.core.security import create_stream_url
+
+    url = API_BASE_URL + create_stream_url(song_id, audio_path)
+    limits = httpx.Limits(max_connections=CONCURRENCY, max_keepalive_connections=CONCURRENCY)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        async def request():
+            response = await client.get(url, headers={"Range": random_range(size)})
+            response.raise_for_status()
+            return len(response.content)
+
+        await run_requests(f"GET /songs/{song_id}/stream", request)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--api", action="store_true", help="Benchmark a running server instead of in-process.")
+    parser.add_argument("--song-id", type=int)
+    parser.add_argument("--audio-path", help="audio_path of the song, relative to the server's MEDIA_ROOT")
+    parser.add_argument("--size", type=int, help="File size in bytes (default: stat MEDIA_ROOT/audio_path)")
+    args = parser.parse_args()
+
+    if args.api:
+        if args.song_id is None or not args.audio_path:
+            parser.error("--api requires --song-id and --audio-path")
+        size = args.size
+        if size is None:
+            from app.core.media import resolve_media_path
+            size = os.path.getsize(resolve_media_path(args.audio_path))
+        asyncio.run(bench_api(args.song_id, args.audio_path, size))
+    else:
+        asyncio.run(bench_in_process())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# file: bench_audio_upload.py - Throughput and peak memory of resumable audio uploads
+#
+# Two modes:
+#   python test/bench_audio_upload.py                # in-process: a 200 MB upload through UploadStore in
+#                                                    #   8 MiB chunks fed as 64 KiB request-body pieces
+#   python test/bench_audio_upload.py --api --song-id N [--pid P]
+#                                                    # live: create / PUT chunks / complete against a running
+#                                                    #   server; with --pid, read its peak RSS (VmHWM) from /proc
+# Run from src/ so the `app` package is importable.
+
+import argparse
+import asyncio
+import hashlib
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# --- 1. Centralized Configuration ---
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+UPLOAD_MB = int(os.getenv("BENCH_UPLOAD_MB", "200"))
+CHUNK_MB = int(os.getenv("BENCH_CHUNK_MB", "8"))
+PIECE_BYTES = 64 * 1024  # typical size of one ASGI http.request body message
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def server_peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def make_source(directory: str) -> str:
+    path = os.path.join(directory, "source.mp3")
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as f:
+        for i in range(UPLOAD_MB):
+            # Vary each MiB so the content is not trivially repetitive
+            f.write(i.to_bytes(4, "big") + block[4:])
+    return path
+
+
+def file_sha256(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+async def pieces(f, length: int):
+    remaining = length
+    while remaining:
+        data = f.read(min(PIECE_BYTES, remaining))
+        remaining -= len(data)
+        yield data
+
+
+# --- 2. Modes ---
+async def bench_in_process():
+    from app.core.uploads import UploadStore
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Creating a {UPLOAD_MB} MB source file ...")
+        source = make_source(directory)
+        size = os.path.getsize(source)
+        digest = file_sha256(source)
+        store = UploadStore(os.path.join(directory, "media"))
+        chunk = CHUNK_MB * 1024 * 1024
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        manifest = store.create(song_id=1, size=size, filename="source.mp3", sha256=digest)
+        offset = 0
+        with open(source, "rb") as f:
+            while offset < size:
+                offset = await store.write_chunk(manifest.upload_id, offset, pieces(f, min(chunk, size - offset)))
+        completed = store.complete(manifest.upload_id)
+        elapsed = time.perf_counter() - started
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert completed.sha256 == digest
+        print(f"Uploaded {size / 1e6:.0f} MB in {CHUNK_MB} MiB chunks: {elapsed:.2f} s, {size / 1e6 / elapsed:.0f} MB/s")
+        print(f"Peak Python allocations: {traced_peak / 1e6:.1f} MB   peak RSS: {peak_rss_mb():.0f} MB")
+
+        # The same content again is stored once
+        manifest = store.create(song_id=2, size=size, filename="copy.mp3")
+        with open(source, "rb") as f:
+            await store.write_chunk(manifest.upload_id, 0, pieces(f, size))
+        again = store.complete(manifest.upload_id)
+        print(f"Second upload of the same audio deduplicated: {again.deduplicated} ({again.audio_path})")
+
+
+def bench_api(song_id: int, pid: int):
+    import requests
+
+    headers = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
+    with tempfile.TemporaryDirectory() as directory:
+        source = make_source(directory)
+        size = os.path.getsize(source)
+        chunk = CHUNK_MB * 1024 * 1024
+        base = f"{API_BASE_URL}/api/v1/audio-uploads"
+
+        started = time.perf_counter()
+        r = requests.post(f"{base}/", json={"song_id": song_id, "filename": "bench.mp3", "size": size}, headers=headers)
+        r.raise_for_status()
+        upload_id = r.json()["upload_id"]
+        offset = 0
+        with open(source, "rb") as f:
+            while offset < size:
+                f.seek(offset)
+                r = requests.put(
+                    f"{base}/{upload_id}", params={"offset": offset},
+                    data=f.read(min(chunk, size - offset)),
+                    headers={**headers, "Content-Type": "application/octet-stream"},
+                )
+                r.raise_for_status()
+                offset = r.json()["offset"]
+        r = requests.post(f"{base}/{upload_id}/complete", headers=headers)
+        r.raise_for_status()
+        elapsed = time.perf_counter() - started
+
+        print(f"Uploaded {size / 1e6:.0f} MB: {elapsed:.2f} s, {size / 1e6 / elapsed:.0f} MB/s -> {r.json()['audio_path']}")
+        if pid:
+            print(f"Server peak RSS: {server_peak_rss_mb(pid):.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--api", action="store_true", help="Upload to a running server instead of in-process.")
+    parser.add_argument("--song-id", type=int)
+    parser.add_argument("--pid", type=int, default=0, help="Server process id, to report its peak RSS.")
+    args = parser.parse_args()
+
+    if args.api:
+        if args.song_id is None:
+            parser.error("--api requires --song-id")
+        bench_api(args.song_id, args.pid)
+    else:
+        asyncio.run(bench_in_process())
+
+
+if __name__ == "__main__":
+    main()
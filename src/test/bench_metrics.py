@@ -0,0 +1,90 @@
+# file: bench_metrics.py - Per-request cost of the /metrics instrumentation
+#
+# Drives a minimal ASGI app in-process, with and without MetricsMiddleware, so
+# the difference is the middleware alone (no network, no framework routing):
+#   python test/bench_metrics.py [--requests N]
+#                                                    # per-request overhead, then the cost of single
+#                                                    #   recording calls and of a scrape
+# Run from src/ so the `app` package is importable.
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# --- 1. Centralized Configuration ---
+ROUTES = int(os.getenv("BENCH_ROUTES", "40"))
+
+
+class Route:
+    def __init__(self, path: str):
+        self.path = path
+
+
+ROUTE_OBJECTS = [Route(f"/api/v1/resource_{i}/{{item_id}}") for i in range(ROUTES)]
+BODY = b'{"ok": true}'
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = ROUTE_OBJECTS[scope["index"] % ROUTES]
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": BODY})
+
+
+async def drive(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for i in range(requests):
+        await app({"type": "http", "method": "GET", "index": i}, receive, send)
+    return time.perf_counter() - started
+
+
+def timed(fn, n: int) -> float:
+    started = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - started) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    from app.core import metrics
+
+    wrapped = metrics.MetricsMiddleware(endpoint)
+    asyncio.run(drive(wrapped, 1000))  # warm up: creates the per-thread cells
+
+    bare = min(asyncio.run(drive(endpoint, args.requests)) for _ in range(3))
+    instrumented = min(asyncio.run(drive(wrapped, args.requests)) for _ in range(3))
+    overhead = (instrumented - bare) / args.requests * 1e6
+    print(f"{'bare app':<22} {bare / args.requests * 1e6:6.2f} us/request")
+    print(f"{'with middleware':<22} {instrumented / args.requests * 1e6:6.2f} us/request")
+    print(f"{'overhead':<22} {overhead:6.2f} us/request")
+
+    labels = [("GET", route.path, 200) for route in ROUTE_OBJECTS]
+    calls = {
+        "RequestMetrics.record": lambda i: metrics.http_requests.record(labels[i % ROUTES], 0.004, 512, 3, 0.001),
+        "Counter.inc": lambda i: metrics.db_pool_checkouts.inc(),
+        "Histogram.observe": lambda i: metrics.db_statement_duration.observe((), 0.0004),
+    }
+    for name, call in calls.items():
+        print(f"{name:<22} {timed(call, args.requests) * 1e9:6.0f} ns")
+
+    started = time.perf_counter()
+    text = metrics.render()
+    elapsed = time.perf_counter() - started
+    print(f"Scrape of {ROUTES} routes: {len(text.splitlines())} lines in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# file: bench_prepared.py - Latency of the hot playlist queries, plain text() vs prepared statements
+#
+# Needs a PostgreSQL database with the vibesia schema and some data (DATABASE_URL from .env):
+#   python test/bench_prepared.py [--calls N]
+#                                                    # p50/p95 of get_summaries_by_user and get_playlist_songs
+#                                                    #   for the busiest user and the longest playlist, once
+#                                                    #   with DATABASE_PREPARED_STATEMENTS off and once on
+# Each mode gets its own single-connection engine, so every call after the warm-up reuses the same
+# server session (and, when enabled, its prepared statements).
+# Run from src/ so the `app` package is importable.
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+# --- 1. Centralized Configuration ---
+WARMUP_CALLS = int(os.getenv("BENCH_WARMUP_CALLS", "20"))
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def pick_targets(db: Session):
+    user_id = db.execute(text("""
+        SELECT user_id FROM vibesia_schema.playlists
+        GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1
+    """)).scalar()
+    playlist = db.execute(text("""
+        SELECT playlist_id, user_id FROM vibesia_schema.playlists
+        ORDER BY song_count DESC LIMIT 1
+    """)).first()
+    if user_id is None or playlist is None:
+        sys.exit("The database has no playlists to benchmark with.")
+    return user_id, playlist.playlist_id, playlist.user_id
+
+
+def run(url: str, prepared: bool, calls: int):
+    from app.core.config import settings
+    from app.crud.crud_playlist import playlist as crud_playlist
+
+    settings.DATABASE_PREPARED_STATEMENTS = prepared
+    engine = create_engine(url, connect_args={"options": "-csearch_path=vibesia_schema"}, pool_size=1, max_overflow=0)
+    timings = {"get_summaries_by_user": [], "get_playlist_songs": []}
+    try:
+        with Session(engine) as db:
+            user_id, playlist_id, owner_id = pick_targets(db)
+            db.rollback()
+            queries = {
+                "get_summaries_by_user": lambda: crud_playlist.get_summaries_by_user(db=db, user_id=user_id),
+                "get_playlist_songs": lambda: crud_playlist.get_playlist_songs(db=db, playlist_id=playlist_id, user_id=owner_id),
+            }
+            for name, query in queries.items():
+                for i in range(WARMUP_CALLS + calls):
+                    started = time.perf_counter()
+                    query()
+                    elapsed = time.perf_counter() - started
+                    db.rollback()
+                    if i >= WARMUP_CALLS:
+                        timings[name].append(elapsed)
+    finally:
+        engine.dispose()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--url", default=None, help="defaults to DATABASE_URL")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    url = args.url or settings.DATABASE_URL
+
+    results = {mode: run(url, mode == "prepared", args.calls) for mode in ("text", "prepared")}
+    print(f"{'query':<24} {'mode':<9} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+    for name in results["text"]:
+        for mode, timings in results.items():
+            samples = timings[name]
+            print(
+                f"{name:<24} {mode:<9} {percentile(samples, 0.5) * 1000:8.3f} "
+                f"{percentile(samples, 0.95) * 1000:8.3f} {statistics.fmean(samples) * 1000:8.3f}"
+            )
+        before = statistics.median(results["text"][name])
+        after = statistics.median(results["prepared"][name])
+        print(f"{name:<24} p50 change {100 * (after - before) / before:+.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# file: bench_prologue.py - Cost of the authenticated request prologue under network latency
+#
+# Needs a PostgreSQL database with the vibesia schema and at least one user (DATABASE_URL from .env),
+# and both drivers installed (psycopg2-binary, psycopg[binary]):
+#   python test/bench_prologue.py [--latency-ms 5] [--calls N]
+#                                                    # runs deps.load_user_and_audit_context (BEGIN, user
+#                                                    #   lookup, audit settings) through a local TCP proxy that
+#                                                    #   delays every packet by half the latency each way, with
+#                                                    #   psycopg2, psycopg 3 one statement at a time, and
+#                                                    #   psycopg 3 in pipeline mode
+# With pipelining the prologue should take about one round trip instead of three.
+# Run from src/ so the `app` package is importable.
+
+import argparse
+import contextlib
+import os
+import queue
+import socket
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+# --- 1. Centralized Configuration ---
+PROXY_HOST = "127.0.0.1"
+WARMUP_CALLS = int(os.getenv("BENCH_WARMUP_CALLS", "10"))
+
+
+class LatencyProxy:
+    """
+    Forwards TCP connections to `target`, holding every chunk for `delay`
+    seconds. Chunks are timestamped on arrival and released by a separate
+    thread, so back-to-back packets are delayed together, like on a real link,
+    instead of one after another.
+    """
+
+    def __init__(self, target, delay: float):
+        self.target = target
+        self.delay = delay
+        self.listener = socket.create_server((PROXY_HOST, 0))
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self) -> None:
+        while True:
+            client, _ = self.listener.accept()
+            upstream = socket.create_connection(self.target)
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._relay(client, upstream)
+            self._relay(upstream, client)
+
+    def _relay(self, source: socket.socket, destination: socket.socket) -> None:
+        pending: "queue.Queue" = queue.Queue()
+
+        def read():
+            while True:
+                try:
+                    data = source.recv(65536)
+                except OSError:
+                    data = b""
+                pending.put((time.monotonic() + self.delay, data))
+                if not data:
+                    return
+
+        def write():
+            while True:
+                due, data = pending.get()
+                time.sleep(max(0.0, due - time.monotonic()))
+                if not data:
+                    with contextlib.suppress(OSError):
+                        destination.shutdown(socket.SHUT_WR)
+                    return
+                try:
+                    destination.sendall(data)
+                except OSError:
+                    return
+
+        threading.Thread(target=read, daemon=True).start()
+        threading.Thread(target=write, daemon=True).start()
+
+
+@contextlib.contextmanager
+def no_pipeline(db):
+    yield None
+
+
+def run(url, use_pipeline: bool, calls: int):
+    from app.api import deps
+
+    engine = create_engine(url, connect_args={"options": "-csearch_path=vibesia_schema"}, pool_size=1, max_overflow=0)
+    original = deps.pipeline
+    if not use_pipeline:
+        deps.pipeline = no_pipeline
+    timings = []
+    try:
+        with Session(engine) as db:
+            email = db.execute(text("SELECT email FROM vibesia_schema.users LIMIT 1")).scalar()
+            db.rollback()
+            if email is None:
+                sys.exit("The database has no users to benchmark with.")
+            for i in range(WARMUP_CALLS + calls):
+                started = time.perf_counter()
+                user, _ = deps.load_user_and_audit_context(
+                    db, email, user_agent="bench_prologue", api_endpoint="/bench", request_id=str(i)
+                )
+                elapsed = time.perf_counter() - started
+                db.rollback()
+                db.expunge_all()
+                if user is None:
+                    sys.exit(f"User {email} was not found through the prologue.")
+                if i >= WARMUP_CALLS:
+                    timings.append(elapsed)
+    finally:
+        deps.pipeline = original
+        engine.dispose()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="round trip added by the proxy")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--url", default=None, help="defaults to DATABASE_URL")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+
+    url = make_url(args.url or settings.DATABASE_URL)
+    proxy = LatencyProxy((url.host or "localhost", url.port or 5432), args.latency_ms / 2000)
+    proxied = url.set(host=PROXY_HOST, port=proxy.port)
+    modes = {
+        "psycopg2": (proxied.set(drivername="postgresql+psycopg2"), False),
+        "psycopg 3": (proxied.set(drivername="postgresql+psycopg"), False),
+        "psycopg 3 pipeline": (proxied.set(drivername="postgresql+psycopg"), True),
+    }
+
+    print(f"Added round trip: {args.latency_ms:.1f} ms")
+    print(f"{'driver':<20} {'p50 ms':>8} {'p95 ms':>8} {'round trips':>12}")
+    for name, (mode_url, use_pipeline) in modes.items():
+        timings = sorted(run(mode_url, use_pipeline, args.calls))
+        p50 = statistics.median(timings)
+        p95 = timings[min(len(timings) - 1, int(0.95 * len(timings)))]
+        print(f"{name:<20} {p50 * 1000:8.2f} {p95 * 1000:8.2f} {p50 * 1000 / args.latency_ms:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
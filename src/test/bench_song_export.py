@@ -0,0 +1,121 @@
+# file: bench_song_export.py - Peak memory benchmark for the streaming catalog export
+#
+# Two modes:
+#   python test/bench_song_export.py                 # in-process: 1M synthetic rows through the export encoders
+#   python test/bench_song_export.py --api --pid N   # live: stream GET /songs/export from a running server
+#                                                    #       and read the server's peak RSS (VmHWM) from /proc
+# Run from src/ so the `app` package is importable.
+
+import argparse
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# --- 1. Centralized Configuration ---
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+ROWS = int(os.getenv("BENCH_ROWS", "1000000"))
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def server_peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def synthetic_rows(n: int):
+    created = datetime(2024, 1, 1)
+    for i in range(1, n + 1):
+        yield {
+            "song_id": i,
+            "title": f"Song {i}",
+            "duration": 180 + i % 240,
+            "track_number": i % 14 + 1,
+            "composer": "Composer",
+            "explicit_content": i % 7 == 0,
+            "audio_path": f"audio/{i:08d}.wav",
+            "album_id": i // 12,
+            "album_title": f"Album {i // 12}",
+            "release_year": 1990 + i % 30,
+            "record_label": "Label",
+            "album_type": "studio",
+            "artist_id": i // 120,
+            "artist_name": f"Artist {i // 120}",
+            "artist_country": "CO",
+            "artist_type": "band",
+            "created_at": created,
+        }
+
+
+def bench_in_process(fmt: str, gzip: bool) -> None:
+    from app.core.streaming import ndjson_lines, csv_lines, coalesce, gzip_chunks
+
+    fieldnames = list(next(synthetic_rows(1)).keys())
+    rss_before = peak_rss_mb()
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    rows = synthetic_rows(ROWS)
+    body = coalesce(csv_lines(rows, fieldnames) if fmt == "csv" else ndjson_lines(rows))
+    if gzip:
+        body = gzip_chunks(body)
+    total = 0
+    for chunk in body:
+        total += len(chunk)
+
+    elapsed = time.perf_counter() - start
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"[in-process] format={fmt} gzip={gzip} rows={ROWS:,}")
+    print(f"  bytes out        : {total / 1e6:,.1f} MB")
+    print(f"  elapsed          : {elapsed:.2f} s ({ROWS / elapsed:,.0f} rows/s)")
+    print(f"  python heap peak : {traced_peak / 1e6:.2f} MB")
+    print(f"  peak RSS         : {rss_before:.1f} MB -> {peak_rss_mb():.1f} MB")
+
+
+def bench_api(fmt: str, gzip: bool, pid: int) -> None:
+    import requests
+
+    before = server_peak_rss_mb(pid) if pid else float("nan")
+    start = time.perf_counter()
+    total = 0
+    with requests.get(
+        f"{API_BASE_URL}/api/v1/songs/export",
+        params={"format": fmt, "gzip": str(gzip).lower()},
+        headers={"Authorization": f"Bearer {ADMIN_TOKEN}", "Accept-Encoding": "identity"},
+        stream=True,
+    ) as response:
+        response.raise_for_status()
+        for chunk in response.raw.stream(64 * 1024, decode_content=False):
+            total += len(chunk)
+    elapsed = time.perf_counter() - start
+    print(f"[api] format={fmt} gzip={gzip}")
+    print(f"  bytes received   : {total / 1e6:,.1f} MB in {elapsed:.2f} s")
+    if pid:
+        print(f"  server peak RSS  : {before:.1f} MB -> {server_peak_rss_mb(pid):.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--api", action="store_true", help="Benchmark a running server instead of the encoders")
+    parser.add_argument("--pid", type=int, default=0, help="Server PID, to report its peak RSS")
+    args = parser.parse_args()
+
+    if args.api:
+        bench_api(args.format, args.gzip, args.pid)
+    else:
+        bench_in_process(args.format, args.gzip)
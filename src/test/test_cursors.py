@@ -0,0 +1,148 @@
+# file: test_cursors.py - Keyset cursors of app.core.utils and the keyset pages built on them
+#
+# Unit tests: no server and no PostgreSQL, only the settings from .env (loaded on import). The paging
+# queries run against an in-memory SQLite database with `vibesia_schema` attached, so the raw SQL
+# (prepared statements fall back to text() on SQLite) and the ORM queries both find their tables.
+#   python -m pytest test/test_cursors.py
+# Run from src/ so the `app` package is importable.
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import CheckConstraint, MetaData, create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.core.database import Base
+from app.core.utils import decode_cursor, encode_cursor
+from app.crud.crud_genre import genre as crud_genre
+from app.crud.crud_playlist import playlist as crud_playlist
+
+# --- 1. Centralized Configuration ---
+SONGS = 23
+PAGE_SIZE = 5
+ADDED = datetime(2024, 5, 1, 12, 0)
+TABLES = ["artists", "albums", "songs", "genres", "song_genres", "users", "playlists", "playlist_songs"]
+
+
+# --- 2. encode_cursor / decode_cursor ---
+
+@pytest.mark.parametrize("values", [(7,), (3, 120), ("2024-05-01T10:00:00", 99), (None, "x")])
+def test_cursor_round_trip(values):
+    cursor = encode_cursor(*values)
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor  # URL-safe, unpadded
+    assert decode_cursor(cursor, len(values)) == values
+
+
+@pytest.mark.parametrize("cursor, size", [
+    ("not a cursor", 1),
+    (encode_cursor(1, 2), 1),                  # wrong number of values
+    (encode_cursor(1), 2),
+    ("eyJhIjoxfQ", 1),                         # {"a":1}: JSON, but not a list
+    ("", 1),
+])
+def test_invalid_cursor_raises_value_error(cursor, size):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, size)
+
+
+# --- 3. Keyset pages ---
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def attach_schema(dbapi_connection, connection_record):
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS vibesia_schema")
+
+    # Copies without the CHECK constraints, which use PostgreSQL-only functions
+    metadata = MetaData()
+    for name in TABLES:
+        table = Base.metadata.tables[f"vibesia_schema.{name}"].to_metadata(metadata)
+        table.constraints = {c for c in table.constraints if not isinstance(c, CheckConstraint)}
+    metadata.create_all(engine)
+    with Session(engine) as session:
+        artist = models.Artist(name="Band", artist_type="band")
+        album = models.Album(title="Album", album_type="studio", artist=artist)
+        genre = models.Genre(name="Rock")
+        owner = models.User(username="owner", email="owner@example.com", hashed_password="x")
+        session.add_all([artist, album, genre, owner])
+        session.flush()
+        playlist = models.Playlist(name="Mix", user_id=owner.user_id)
+        session.add(playlist)
+        session.flush()
+        for i in range(SONGS):
+            song = models.Song(title=f"Song {i}", duration=180, audio_path=f"{i}.mp3", album_id=album.album_id)
+            session.add(song)
+            session.flush()
+            session.add(models.SongGenre(song_id=song.song_id, genre_id=genre.genre_id))
+            # Duplicate positions on purpose: the song_id tie-breaker must still give a total order,
+            # whatever order the songs were added in
+            session.add(models.PlaylistSong(
+                playlist_id=playlist.playlist_id, song_id=song.song_id, position=i // 2,
+                date_added=ADDED - timedelta(minutes=i),
+            ))
+        session.commit()
+        session.info["genre_id"] = genre.genre_id
+        session.info["playlist"] = (playlist.playlist_id, owner.user_id)
+        yield session
+    engine.dispose()
+
+
+def _walk(fetch, key):
+    """Follows the cursors from the first page to the last, as a client would."""
+    seen, cursor, pages = [], None, 0
+    while True:
+        rows, has_more = fetch(decode_cursor(cursor, len(key(None))) if cursor else None)
+        pages += 1
+        assert len(rows) <= PAGE_SIZE
+        seen.extend(rows)
+        if not has_more:
+            return seen, pages
+        cursor = encode_cursor(*key(rows[-1]))
+
+
+def test_genre_songs_pages_cover_every_song_once(db):
+    genre_id = db.info["genre_id"]
+    seen, pages = _walk(
+        lambda after: crud_genre.get_songs_page(
+            db, genre_id=genre_id, after_song_id=after[0] if after else None, limit=PAGE_SIZE
+        ),
+        lambda row: (row["song_id"],) if row else (None,),
+    )
+    ids = [row["song_id"] for row in seen]
+    assert ids == sorted(ids) and len(set(ids)) == SONGS
+    assert pages == -(-SONGS // PAGE_SIZE)
+
+
+def test_playlist_songs_pages_follow_position_then_song_id(db):
+    playlist_id, _ = db.info["playlist"]
+    seen, _ = _walk(
+        lambda after: crud_playlist.get_songs_page(db, playlist_id=playlist_id, after=after, limit=PAGE_SIZE),
+        lambda row: (row["position"], row["song_id"]) if row else (None, None),
+    )
+    keys = [(row["position"], row["song_id"]) for row in seen]
+    assert keys == sorted(keys) and len(set(keys)) == SONGS
+
+
+def test_full_playlist_listing_matches_the_pages(db):
+    playlist_id, user_id = db.info["playlist"]
+    seen, _ = _walk(
+        lambda after: crud_playlist.get_songs_page(db, playlist_id=playlist_id, after=after, limit=PAGE_SIZE),
+        lambda row: (row["position"], row["song_id"]) if row else (None, None),
+    )
+    listing = crud_playlist.get_playlist_songs(db, playlist_id=playlist_id, user_id=user_id)
+    assert [row["song_id"] for row in listing] == [row["song_id"] for row in seen]
+
+
+def test_exact_multiple_of_the_page_size_has_no_empty_last_page(db):
+    genre_id = db.info["genre_id"]
+    rows, has_more = crud_genre.get_songs_page(db, genre_id=genre_id, limit=SONGS)
+    assert len(rows) == SONGS and not has_more
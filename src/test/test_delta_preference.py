@@ -0,0 +1,32 @@
+# file: test_delta_preference.py - Parsing of the Prefer header by deps.get_delta_preference
+#
+# Unit tests: no server and no database, only the settings from .env (loaded on import).
+#   python -m pytest test/test_delta_preference.py
+# Run from src/ so the `app` package is importable.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.api.deps import get_delta_preference
+
+
+@pytest.mark.parametrize("prefer, expected", [
+    ("return=minimal", "return=minimal"),
+    ("representation=delta", "representation=delta"),
+    ("Return = Minimal", "return=minimal"),                       # case and spaces
+    ('return="minimal"', "return=minimal"),                      # quoted value
+    ("return=minimal; handling=lenient", "return=minimal"),      # parameters ignored
+    ("respond-async, wait=5, return=minimal", "return=minimal"),  # among other preferences
+    ("representation=delta, return=minimal", "representation=delta"),  # first one wins
+])
+def test_delta_preferences(prefer, expected):
+    assert get_delta_preference(prefer) == expected
+
+
+@pytest.mark.parametrize("prefer", [None, "", "return=representation", "respond-async", "minimal", "return", ",;="])
+def test_full_representation_preferences(prefer):
+    assert get_delta_preference(prefer) is None
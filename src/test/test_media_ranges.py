@@ -0,0 +1,119 @@
+# file: test_media_ranges.py - Range header parsing and multipart/byteranges framing of app.core.media
+#
+# Unit tests: no server and no database, only the settings from .env (loaded on import).
+#   python -m pytest test/test_media_ranges.py
+# Run from src/ so the `app` package is importable.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.media import MediaFileCache, MediaFileResponse, RangeNotSatisfiable, parse_range_header
+
+# --- 1. Centralized Configuration ---
+SIZE = 1000
+MAX_RANGES = 4
+
+
+# --- 2. parse_range_header ---
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", [(0, 100)]),
+    ("bytes=900-", [(900, 1000)]),
+    ("bytes=-100", [(900, 1000)]),
+    ("bytes=-5000", [(0, 1000)]),                    # suffix longer than the file: the whole file
+    ("bytes=990-5000", [(990, 1000)]),               # end clamped to the file
+    ("BYTES = 0-0", [(0, 1)]),                       # unit is case-insensitive
+    ("bytes=500-599, 0-99", [(0, 100), (500, 600)]),  # sorted
+    ("bytes=0-99,50-149,150-199", [(0, 200)]),       # overlapping and adjacent ranges merged
+    ("bytes=0-99,2000-2100", [(0, 100)]),            # ranges past the end dropped
+])
+def test_valid_ranges(header, expected):
+    assert parse_range_header(header, SIZE, MAX_RANGES) == expected
+
+
+@pytest.mark.parametrize("header", [
+    "items=0-99",
+    "bytes=",
+    "bytes=abc-def",
+    "bytes=100",
+    "bytes=200-100",
+    "bytes=0-1,2-3,4-5,6-7,8-9",  # more than MAX_RANGES
+])
+def test_malformed_ranges_serve_the_whole_file(header):
+    assert parse_range_header(header, SIZE, MAX_RANGES) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=5000-6000", "bytes=-0"])
+def test_unsatisfiable_ranges(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header(header, SIZE, MAX_RANGES)
+
+
+# --- 3. MediaFileResponse ---
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "song.mp3"
+    data = bytes(i % 251 for i in range(SIZE))
+    path.write_bytes(data)
+    cache = MediaFileCache(capacity=2, header_bytes=64)
+
+    app = FastAPI()
+
+    @app.api_route("/audio", methods=["GET", "HEAD"])
+    def audio():
+        return MediaFileResponse(str(path), cache=cache)
+
+    with TestClient(app) as c:
+        yield c, data
+    cache.clear()
+
+
+def test_single_range(client):
+    c, data = client
+    response = c.get("/audio", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 10-19/{SIZE}"
+    assert response.headers["content-length"] == "10"
+    assert response.content == data[10:20]
+
+
+@pytest.mark.parametrize("header", ["bytes=0-9,100-199", "bytes=0-0,500-549,-10"])
+def test_multipart_content_length_matches_body(client, header):
+    c, data = client
+    response = c.get("/audio", headers={"Range": header})
+    assert response.status_code == 206
+    assert response.headers["content-type"].startswith("multipart/byteranges; boundary=")
+    assert int(response.headers["content-length"]) == len(response.content)
+
+    head = c.head("/audio", headers={"Range": header})
+    assert head.headers["content-length"] == response.headers["content-length"]
+
+    boundary = response.headers["content-type"].split("boundary=")[1]
+    parts = response.content.split(f"--{boundary}".encode())
+    assert parts[0] == b"" and parts[-1] == b"--\r\n"
+    for part in parts[1:-1]:
+        headers, _, body = part.partition(b"\r\n\r\n")
+        first, last = map(int, headers.split(b"bytes ")[1].split(b"/")[0].split(b"-"))
+        assert body.removesuffix(b"\r\n") == data[first:last + 1]
+
+
+def test_unsatisfiable_range_answers_416(client):
+    c, _ = client
+    response = c.get("/audio", headers={"Range": f"bytes={SIZE}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{SIZE}"
+
+
+def test_stale_if_range_serves_the_whole_file(client):
+    c, data = client
+    response = c.get("/audio", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == data
@@ -0,0 +1,91 @@
+# file: test_query_normalization.py - Statement keys of app.core.query_log and the SQL of app.core.prepared
+#
+# Unit tests: no server and no database, only the settings from .env (loaded on import).
+#   python -m pytest test/test_query_normalization.py
+# Run from src/ so the `app` package is importable.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.prepared import PreparedQuery, prepared_query_for
+from app.core.query_log import QueryLog, is_explainable, normalize_sql
+
+# --- 1. Centralized Configuration ---
+BINDS_SQL = "SELECT * FROM t WHERE a = :a AND b::text = :b AND c > :a"
+
+
+# --- 2. normalize_sql ---
+
+@pytest.mark.parametrize("statement, expected", [
+    ("SELECT * FROM t WHERE id = 42", "SELECT * FROM t WHERE id = ?"),
+    ("SELECT * FROM t WHERE name = 'it''s' AND x = -1.5", "SELECT * FROM t WHERE name = ? AND x = ?"),
+    ("SELECT * FROM t WHERE a = %(a)s AND b = %s AND c = $1 AND d = ?", "SELECT * FROM t WHERE a = ? AND b = ? AND c = ? AND d = ?"),
+    ("SELECT * FROM t WHERE a = :a", "SELECT * FROM t WHERE a = ?"),
+    ("SELECT a::int FROM t1 -- comment\n /* block */ WHERE x = 1", "SELECT a::int FROM t1 WHERE x = ?"),
+    ("SELECT * FROM t WHERE id IN (1, 2, 3)", "SELECT * FROM t WHERE id IN (?, ...)"),
+    ("INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y'), (3, 'z')", "INSERT INTO t (a, b) VALUES (?, ...), ..."),
+    ("SELECT   *\n\tFROM  t", "SELECT * FROM t"),
+])
+def test_normalize_sql(statement, expected):
+    assert normalize_sql(statement) == expected
+
+
+def test_in_lists_of_any_length_share_a_key():
+    assert normalize_sql("SELECT 1 FROM t WHERE id IN (%(p1)s, %(p2)s)") == normalize_sql("SELECT 1 FROM t WHERE id IN (%(p1)s, %(p2)s, %(p3)s)")
+    assert normalize_sql("SELECT 1 FROM t WHERE id IN (1, 2)") == normalize_sql("SELECT 1 FROM t WHERE id IN (1, 2, 3, 4)")
+
+
+@pytest.mark.parametrize("statement, explainable", [
+    ("SELECT 1", True),
+    ("  with x AS (SELECT 1) SELECT * FROM x", True),
+    ("SELECT * FROM t FOR UPDATE", False),
+    ("SELECT * FROM t FOR NO KEY UPDATE", False),
+    ("WITH d AS (DELETE FROM t RETURNING *) SELECT * FROM d", False),
+    ("UPDATE t SET a = 1", False),
+    ("CALL sp_add_song_to_playlist(1, 2, 3)", False),
+])
+def test_is_explainable(statement, explainable):
+    assert is_explainable(statement) is explainable
+
+
+# --- 3. PreparedQuery ---
+
+def test_binds_are_numbered_in_order_of_first_use():
+    query = PreparedQuery("test_binds", BINDS_SQL)
+    assert query.params == ["a", "b"]
+    assert query.prepare_sql == "PREPARE test_binds AS SELECT * FROM t WHERE a = $1 AND b::text = $2 AND c > $1"
+    assert query.execute_sql == "EXECUTE test_binds (%(a)s, %(b)s)"
+
+
+def test_query_without_binds():
+    query = PreparedQuery("test_no_binds", "SELECT now()")
+    assert query.params == []
+    assert query.execute_sql == "EXECUTE test_no_binds"
+
+
+def test_names_are_unique():
+    PreparedQuery("test_unique", "SELECT 1")
+    with pytest.raises(ValueError):
+        PreparedQuery("test_unique", "SELECT 2")
+
+
+def test_execute_statements_resolve_to_their_query():
+    query = PreparedQuery("test_lookup", BINDS_SQL)
+    assert prepared_query_for(query.execute_sql) is query
+    assert prepared_query_for("  execute test_lookup (1, 2)") is query
+    assert prepared_query_for("EXECUTE not_registered (1)") is None
+    assert prepared_query_for(BINDS_SQL) is None
+
+
+def test_prepared_and_plain_calls_share_a_query_log_key():
+    query = PreparedQuery("test_log_key", BINDS_SQL)
+    log = QueryLog(slow_seconds=60, sample_rate=0, max_statements=10, explain_timeout_ms=100)
+    log.record(None, query.execute_sql, {"a": 1, "b": "x"}, 0.01)
+    log.record(None, "SELECT * FROM t WHERE a = %(a)s AND b::text = %(b)s AND c > %(a)s", {"a": 1, "b": "x"}, 0.01)
+    [stats] = log.top(10)
+    assert stats.statement == normalize_sql(BINDS_SQL)
+    assert stats.calls == 2
@@ -0,0 +1,92 @@
+# file: test_stream_tokens.py - Signed audio stream URLs of app.core.security
+#
+# Unit tests: no server and no database, only the settings from .env (loaded on import).
+#   python -m pytest test/test_stream_tokens.py
+# Run from src/ so the `app` package is importable.
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core import security
+from app.core.config import settings
+from app.core.security import create_stream_token, create_stream_url, verify_stream_token
+
+# --- 1. Centralized Configuration ---
+SONG_ID = 42
+AUDIO_PATH = "artists/some band/01 - intro.mp3"
+
+
+def test_valid_token_carries_the_grant():
+    grant = verify_stream_token(create_stream_token(SONG_ID, AUDIO_PATH, expires_in=300), SONG_ID)
+    assert grant is not None
+    assert grant.song_id == SONG_ID
+    assert grant.audio_path == AUDIO_PATH
+    assert grant.expires >= time.time() + 300
+    assert grant.expires % 60 == 0
+
+
+def test_token_does_not_reveal_the_path():
+    token = create_stream_token(SONG_ID, AUDIO_PATH, expires_in=300)
+    sealed = security._b64decode(token.split(".")[2])
+    assert AUDIO_PATH.encode() not in sealed
+    assert b"intro" not in sealed and "intro" not in token
+
+
+def test_different_paths_get_different_nonces():
+    first = create_stream_token(SONG_ID, AUDIO_PATH, expires_in=300).split(".")[2]
+    second = create_stream_token(SONG_ID, AUDIO_PATH + "x", expires_in=300).split(".")[2]
+    nonce_chars = -(-security.STREAM_NONCE_BYTES * 4 // 3)
+    assert first[:nonce_chars] != second[:nonce_chars]
+
+
+def test_expiry_is_rounded_so_urls_are_cacheable(monkeypatch):
+    tokens = set()
+    for now in (999_999_961, 999_999_999):  # two moments in the same minute
+        monkeypatch.setattr(security.time, "time", lambda: now)
+        tokens.add(create_stream_token(SONG_ID, AUDIO_PATH, expires_in=300))
+    assert len(tokens) == 1
+
+
+def test_stream_url_holds_a_verifiable_token():
+    url = create_stream_url(SONG_ID, AUDIO_PATH)
+    assert url.startswith(f"{settings.API_V1_STR}/songs/{SONG_ID}/stream?token=")
+    assert verify_stream_token(url.split("token=", 1)[1], SONG_ID) is not None
+
+
+def test_expired_token_is_rejected(monkeypatch):
+    token = create_stream_token(SONG_ID, AUDIO_PATH, expires_in=60)
+    expires = int(token.split(".")[1])
+    monkeypatch.setattr(security.time, "time", lambda: expires + 1)
+    assert verify_stream_token(token, SONG_ID) is None
+
+
+def test_token_for_another_song_is_rejected():
+    assert verify_stream_token(create_stream_token(SONG_ID, AUDIO_PATH, expires_in=300), SONG_ID + 1) is None
+
+
+@pytest.mark.parametrize("tamper", [
+    lambda parts: [str(SONG_ID + 1)] + parts[1:],                       # other song
+    lambda parts: [parts[0], str(int(parts[1]) + 3600)] + parts[2:],    # later expiry
+    lambda parts: parts[:2] + [parts[2][:-2] + ("AA" if parts[2][-2:] != "AA" else "BB"), parts[3]],  # other file
+    lambda parts: parts[:3] + [parts[3][:-1] + ("A" if parts[3][-1] != "A" else "B")],  # signature
+])
+def test_tampered_token_is_rejected(tamper):
+    parts = create_stream_token(SONG_ID, AUDIO_PATH, expires_in=300).split(".")
+    tampered = ".".join(tamper(parts))
+    song_id = int(tampered.split(".")[0])
+    assert verify_stream_token(tampered, song_id) is None
+
+
+@pytest.mark.parametrize("token", ["", "garbage", "1.2.3", "a.b.c.d", "42.notanumber.eA.sig", "42.1.%%%.sig"])
+def test_malformed_token_is_rejected(token):
+    assert verify_stream_token(token, SONG_ID) is None
+
+
+def test_signed_token_without_a_path_is_rejected():
+    payload = f"{SONG_ID}.{int(time.time()) + 300}.{security._b64encode(b'short')}"
+    assert verify_stream_token(f"{payload}.{security._stream_signature(payload)}", SONG_ID) is None
@@ -7,6 +7,7 @@ import time
 import os
 import uuid
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 # --- 1. Centralized Configuration ---
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
@@ -271,6 +272,84 @@ def test_8_add_songs_to_playlist(test_state: dict):
         print_test_result(test_name, False, "No songs could be added")
         return False
 
+def test_8_1_add_song_with_delta(test_state: dict):
+    """Tests adding a song with Prefer: return=minimal (delta response)."""
+    test_name = "8.1. Add Song with Delta Response"
+    headers = {"Authorization": f"Bearer {test_state['token']}", "Prefer": "return=minimal"}
+    song_id = 3  # Assuming this exists in the DB
+
+    response = requests.post(
+        f"{API_BASE_URL}/api/v1/playlists/{test_state['playlist_id']}/songs",
+        headers=headers,
+        json={"song_id": song_id}
+    )
+    if response.status_code != 200:
+        print_test_result(test_name, False, f"API call failed with status {response.status_code}: {response.text}")
+        return False
+
+    delta = response.json()
+    with get_db() as db:
+        stored = db.execute(
+            sqlalchemy.text(
+                f"SELECT song_count, total_duration FROM {DB_SCHEMA}.playlists WHERE playlist_id = :playlist_id"
+            ),
+            {'playlist_id': test_state['playlist_id']}
+        ).first()
+
+    problems = []
+    if response.headers.get("Preference-Applied") != "return=minimal":
+        problems.append(f"Preference-Applied header: {response.headers.get('Preference-Applied')}")
+    if "songs" in delta:
+        problems.append("delta response contains the full song list")
+    if not delta.get("entry") or delta["entry"].get("song_id") != song_id:
+        problems.append(f"entry: {delta.get('entry')}")
+    if (delta.get("song_count"), delta.get("total_duration")) != (stored.song_count, stored.total_duration):
+        problems.append(f"stats {delta.get('song_count')}/{delta.get('total_duration')} != stored {tuple(stored)}")
+
+    if problems:
+        print_test_result(test_name, False, "; ".join(problems))
+        return False
+    test_state['song_ids'].append(song_id)
+    print_test_result(test_name, True, f"Entry at position {delta['entry']['position']}")
+    return True
+
+def test_8_2_concurrent_adds_get_distinct_positions(test_state: dict):
+    """Tests that concurrent appends (delta and full responses) never share a position."""
+    test_name = "8.2. Concurrent Adds Get Distinct Positions"
+    song_ids = [4, 5, 6, 7]  # Assuming these exist in the DB
+
+    def add(index_and_song):
+        index, song_id = index_and_song
+        headers = {"Authorization": f"Bearer {test_state['token']}"}
+        if index % 2 == 0:
+            headers["Prefer"] = "return=minimal"
+        return requests.post(
+            f"{API_BASE_URL}/api/v1/playlists/{test_state['playlist_id']}/songs",
+            headers=headers,
+            json={"song_id": song_id}
+        )
+
+    with ThreadPoolExecutor(max_workers=len(song_ids)) as pool:
+        responses = list(pool.map(add, enumerate(song_ids)))
+    failed = [r.text for r in responses if r.status_code != 200]
+    if failed:
+        print_test_result(test_name, False, f"Some adds failed: {failed}")
+        return False
+
+    with get_db() as db:
+        positions = [
+            row.position for row in db.execute(
+                sqlalchemy.text(f"SELECT position FROM {DB_SCHEMA}.playlist_songs WHERE playlist_id = :playlist_id"),
+                {'playlist_id': test_state['playlist_id']}
+            )
+        ]
+    if len(positions) != len(set(positions)):
+        print_test_result(test_name, False, f"Duplicate positions: {sorted(positions)}")
+        return False
+    test_state['song_ids'].extend(song_ids)
+    print_test_result(test_name, True, f"Positions: {sorted(positions)}")
+    return True
+
 def test_9_remove_song_from_playlist(test_state: dict):
     """Tests removing a song from playlist."""
     test_name = "9. Remove Song from Playlist"
@@ -370,6 +449,8 @@ def run_all_tests():
         test_6_get_playlist_by_id,
         test_7_update_playlist,
         test_8_add_songs_to_playlist,
+        test_8_1_add_song_with_delta,
+        test_8_2_concurrent_adds_get_distinct_positions,
         test_9_remove_song_from_playlist,
         test_10_get_playlist_count,
         test_11_delete_playlist,